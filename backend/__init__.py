@@ -1,3 +1,4 @@
-from .summarizer import call_llm,generate_summary
+from .logger import log_request
+from .summarizer import call_llm,generate_summary,process_medical_notes
 from .evaluator import evaluate_summary_deepeval
 from .feedback import store_feedback
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Bulk summarization of note corpora.
+
+    python -m backend.batch --input backend/clinical_notes --output results.jsonl
+    python -m backend.batch --input notes.jsonl --output results.jsonl --concurrency 8 --tpm 150000
+
+Input is a directory of .txt files (id = file name) or a JSONL file with
+{"id", "notes", "role"} objects. Results are appended to the output JSONL as
+they complete; re-running with the same output file skips notes already
+summarized successfully, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import os
+from loguru import logger
+from backend.config import BATCH_CONCURRENCY, BATCH_TOKENS_PER_MINUTE
+from backend.rate_limit import TokenBucket, current_lane
+from backend.summarizer import estimate_max_tokens, process_medical_notes
+from backend.tokens import count_tokens
+
+
+def load_notes(path, role="general"):
+    """Yield {"id", "notes", "role"} items from a directory of .txt files or a JSONL file."""
+    if os.path.isdir(path):
+        for file_name in sorted(os.listdir(path)):
+            if file_name.endswith(".txt"):
+                with open(os.path.join(path, file_name), "r", encoding="utf-8") as file:
+                    yield {"id": file_name, "notes": file.read().strip(), "role": role}
+        return
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            yield {
+                "id": str(item.get("id", line_number)),
+                "notes": item["notes"],
+                "role": item.get("role", role)
+            }
+
+
+def load_completed_ids(output_path):
+    """Ids already summarized successfully in a previous run of the same output file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn final line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(record["id"])
+    return completed
+
+
+def estimate_request_tokens(notes):
+    return count_tokens(notes) + estimate_max_tokens(notes)
+
+
+async def summarize_items(items, concurrency=BATCH_CONCURRENCY, tokens_per_minute=BATCH_TOKENS_PER_MINUTE):
+    """
+    Summarize `items` with at most `concurrency` notes in flight and a
+    tokens-per-minute budget. LLM calls run in the "batch" lane of the shared
+    limiter, behind interactive and evaluation traffic. Yields one result
+    record per item in completion order.
+    """
+    limiter = TokenBucket(tokens_per_minute)
+    items = iter(items)
+    results = asyncio.Queue()
+
+    async def worker():
+        current_lane.set("batch")
+        for item in items:
+            try:
+                await limiter.acquire(estimate_request_tokens(item["notes"]))
+                result = await process_medical_notes(item["notes"], item["role"])
+                record = {"id": item["id"], "role": item["role"], "status": "ok", "result": result}
+            except Exception as e:
+                logger.error(f"Batch item {item['id']} failed: {e}")
+                record = {"id": item["id"], "role": item["role"], "status": "failed", "error": str(e)}
+            await results.put(record)
+
+    async def run_workers():
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        await results.put(None)
+
+    runner = asyncio.create_task(run_workers())
+    try:
+        while (record := await results.get()) is not None:
+            yield record
+    finally:
+        runner.cancel()
+
+
+async def run_batch(input_path, output_path, role="general", concurrency=BATCH_CONCURRENCY,
+                    tokens_per_minute=BATCH_TOKENS_PER_MINUTE):
+    """Summarize a corpus into `output_path`, resuming from any earlier partial run."""
+    completed = load_completed_ids(output_path)
+    if completed:
+        logger.info(f"Resuming: {len(completed)} notes already summarized in {output_path}")
+
+    pending = (item for item in load_notes(input_path, role) if item["id"] not in completed)
+    counts = {"ok": 0, "failed": 0}
+
+    with open(output_path, "a+", encoding="utf-8") as output:
+        if output.tell() > 0:
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                output.write("\n")  # terminate a torn line left by an interrupted run
+        async for record in summarize_items(pending, concurrency, tokens_per_minute):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            counts[record["status"]] += 1
+            if sum(counts.values()) % 50 == 0:
+                logger.info(f"Batch progress: {counts}")
+
+    logger.info(f"Batch finished: {counts} (skipped {len(completed)} already done)")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", required=True, help="Directory of .txt notes or a JSONL file")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--role", default="general")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--tpm", type=int, default=BATCH_TOKENS_PER_MINUTE, help="Token-per-minute budget")
+    args = parser.parse_args()
+
+    asyncio.run(run_batch(args.input, args.output, args.role, args.concurrency, args.tpm))
+
+
+if __name__ == "__main__":
+    main()
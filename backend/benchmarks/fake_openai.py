@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_SUMMARY = """1. Case Overview
+- Patient Name: John Doe
+- Age & Gender: 67, Male
+- Primary Reason for Admission: Chest pain (critical: troponin elevated)
+
+2. Medical History
+- Past Diagnoses: Hypertension
+
+3. Hospital Course
+- Treatment Plan: Heparin infusion, cardiology consult
+
+4. Discharge Plan
+- Medications on Discharge: Aspirin 81 mg daily
+"""
+
+# GEval asks for raw JSON answers (no response_format) containing these keys.
+FAKE_GEVAL_RESULT = json.dumps({"score": 8, "reason": "Specific and concise."})
+FAKE_GEVAL_STEPS = json.dumps({"steps": ["Check each fact against the notes.", "Penalize repetition."]})
+
+EMBEDDING_DIMENSIONS = 64
+
+
+def fake_instance(schema, defs=None):
+    """Minimal valid instance of a JSON schema, for structured-output (`response_format`) requests."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return fake_instance(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return fake_instance(options[0], defs) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: fake_instance(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_instance(schema.get("items", {}), defs)]
+    if kind in ("integer", "number"):
+        return 8
+    if kind == "boolean":
+        return True
+    return "yes"
+
+
+def fake_embedding(text):
+    """Deterministic unit vector per text, so repeated texts embed identically across runs."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def create_app(latency=0.5, tokens_per_second=100.0, error_rate=0.0, seed=0):
+    """
+    OpenAI-compatible stand-in for chat completions and embeddings.
+
+    Every completion waits `latency` seconds (time to first token), then
+    produces its output at `tokens_per_second`: streamed completions emit one
+    word at that rate, others return once the whole output would have been
+    generated. A share `error_rate` of requests fails with HTTP 500.
+    Structured-output requests get a schema-valid JSON answer, so DeepEval
+    metrics run end to end.
+    """
+    app = FastAPI(title="Fake OpenAI")
+    app.state.requests = 0
+    app.state.errors = 0
+    rng = random.Random(seed)
+
+    def maybe_fail():
+        app.state.requests += 1
+        if error_rate and rng.random() < error_rate:
+            app.state.errors += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+                status_code=500
+            )
+        return None
+
+    async def stream_completion(model):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for word in FAKE_SUMMARY.split(" "):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(1 / tokens_per_second)
+        yield "data: [DONE]\n\n"
+
+    def completion_content(payload, prompt):
+        response_format = payload.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            return json.dumps(fake_instance(response_format["json_schema"]["schema"]))
+        if '"score"' in prompt:
+            return FAKE_GEVAL_RESULT
+        if '"steps"' in prompt:
+            return FAKE_GEVAL_STEPS
+        return FAKE_SUMMARY
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(payload: dict):
+        error = maybe_fail()
+        await asyncio.sleep(latency)
+        if error:
+            return error
+        if payload.get("stream"):
+            return StreamingResponse(stream_completion(payload.get("model", "fake")), media_type="text/event-stream")
+
+        prompt = " ".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        content = completion_content(payload, prompt)
+        n = payload.get("n") or 1
+        completion_tokens = len(content.split())
+        await asyncio.sleep(completion_tokens / tokens_per_second)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [
+                {
+                    "index": i,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }
+                for i in range(n)
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt.split()),
+                "completion_tokens": completion_tokens * n,
+                "total_tokens": len(prompt.split()) + completion_tokens * n
+            }
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(payload: dict):
+        error = maybe_fail()
+        if error:
+            return error
+        texts = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        await asyncio.sleep(latency / 10)
+        return {
+            "object": "list",
+            "model": payload.get("model", "fake"),
+            "data": [{"object": "embedding", "index": i, "embedding": fake_embedding(text)} for i, text in enumerate(texts)],
+            "usage": {"prompt_tokens": sum(len(t.split()) for t in texts), "total_tokens": sum(len(t.split()) for t in texts)}
+        }
+
+    return app
+
+
+def run_fake_server(port=8765, **app_kwargs):
+    """Start the fake server in a daemon thread and return the uvicorn server once it is serving."""
+    config = uvicorn.Config(create_app(**app_kwargs), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
@@ -0,0 +1,48 @@
+"""
+Throughput benchmark for the async LLM call path.
+
+Fires N concurrent `call_llm` requests at a local fake OpenAI-compatible server
+and compares wall-clock time with what a serial (blocking) client would take.
+
+    python -m backend.benchmarks.llm_throughput --requests 16 --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+
+from backend import config
+from backend.benchmarks.fake_openai import FAKE_SUMMARY, run_fake_server
+from backend.summarizer import call_llm
+
+
+async def run(num_requests):
+    start = time.time()
+    await asyncio.gather(*(call_llm(f"Summarize note {i}", num_variants=2) for i in range(num_requests)))
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = run_fake_server(port=args.port, latency=args.latency, tokens_per_second=args.tokens_per_second)
+    config.LLM_BASE_URL = f"http://127.0.0.1:{args.port}/v1"
+    config.LLM_API_KEY = config.LLM_API_KEY or "sk-fake"
+
+    try:
+        wall = asyncio.run(run(args.requests))
+    finally:
+        server.should_exit = True
+
+    serial = args.requests * (args.latency + len(FAKE_SUMMARY.split()) / args.tokens_per_second)
+    print(f"requests={args.requests} latency={args.latency}s concurrency_cap={config.LLM_MAX_CONCURRENCY}")
+    print(f"wall={wall:.2f}s serial_estimate={serial:.2f}s speedup={serial / wall:.1f}x "
+          f"throughput={args.requests / wall:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Offline end-to-end benchmark suite.
+
+Drives the FastAPI app in-process against a local fake OpenAI-compatible
+server (chat completions, structured outputs and embeddings), with fakeredis
+standing in for Redis when it is installed (otherwise the in-process cache
+tier only). Synthetic clinical notes of increasing size exercise /summarize
+(the short path and, above MODEL_MAX_INPUT_TOKENS, the chunking path), cached
+/summarize repeats and /evaluate.
+
+    python -m backend.benchmarks.suite
+    python -m backend.benchmarks.suite --sizes 500,2000,8000 --requests 20 --concurrency 8 \\
+        --latency 0.2 --tokens-per-second 200 --error-rate 0.02
+    python -m backend.benchmarks.suite --baseline backend/benchmarks/results/<commit>.json
+
+Each run writes throughput, p50/p95/p99 latency, error counts and memory per
+scenario and size to JSON (default: backend/benchmarks/results/<commit>.json);
+--baseline prints the change against an earlier result file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+import types
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+SECTIONS = ["History of Present Illness", "Past Medical History", "Hospital Course", "Medications", "Discharge Plan"]
+SENTENCES = [
+    "Patient is a {age}-year-old {sex} admitted on {date} with {complaint}.",
+    "Blood pressure {sys}/{dia} mmHg, heart rate {hr} bpm, SpO2 {spo2}% on room air.",
+    "Troponin {trop} ng/mL, creatinine {cr} mg/dL, potassium {k} mmol/L.",
+    "Started on {drug} {dose} mg {freq} and monitored on telemetry.",
+    "History of {history}, managed with {drug} {dose} mg {freq}.",
+    "Echocardiogram on {date} showed ejection fraction {ef}% with {finding}.",
+    "Patient developed {complication} on hospital day {day}, treated with {drug}.",
+    "Follow up with {specialty} in {weeks} weeks; repeat labs in {days} days.",
+]
+VALUES = {
+    "sex": ["male", "female"],
+    "complaint": ["chest pain", "shortness of breath", "syncope", "fever and cough", "abdominal pain"],
+    "drug": ["aspirin", "metoprolol", "heparin", "furosemide", "atorvastatin", "ceftriaxone", "lisinopril"],
+    "freq": ["daily", "twice daily", "every 8 hours", "at bedtime"],
+    "history": ["hypertension", "type 2 diabetes", "COPD", "atrial fibrillation", "chronic kidney disease"],
+    "finding": ["mild mitral regurgitation", "no wall motion abnormality", "inferior hypokinesis"],
+    "complication": ["atrial fibrillation", "acute kidney injury", "hypokalemia", "delirium"],
+    "specialty": ["cardiology", "nephrology", "primary care", "pulmonology"],
+}
+
+
+def synthetic_note(target_tokens, seed):
+    """A deterministic synthetic clinical note of roughly `target_tokens` tokens."""
+    from backend.tokens import count_tokens
+
+    rng = random.Random(seed)
+    lines, section = [], 0
+    while count_tokens("\n".join(lines)) < target_tokens:
+        lines.append(f"{SECTIONS[section % len(SECTIONS)]}:")
+        section += 1
+        for _ in range(rng.randint(4, 8)):
+            template = rng.choice(SENTENCES)
+            lines.append(template.format(
+                age=rng.randint(25, 95), date=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                sys=rng.randint(95, 185), dia=rng.randint(55, 110), hr=rng.randint(50, 130),
+                spo2=rng.randint(86, 100), trop=round(rng.uniform(0, 5), 2), cr=round(rng.uniform(0.6, 3.5), 1),
+                k=round(rng.uniform(3, 5.8), 1), dose=rng.choice([5, 10, 20, 40, 81, 500]), ef=rng.randint(20, 65),
+                day=rng.randint(1, 10), weeks=rng.randint(1, 6), days=rng.randint(2, 14),
+                **{name: rng.choice(options) for name, options in VALUES.items()}
+            ))
+    return "\n".join(lines)
+
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux), else the peak."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if platform.system() == "Darwin" else peak / 2**10
+
+
+def summarize_latencies(latencies):
+    import numpy as np
+
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {"p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1),
+            "mean_ms": round(float(np.mean(latencies)) * 1000, 1)}
+
+
+async def run_scenario(client, name, size, payloads, concurrency, fake_server_app):
+    """POST every (path, body) in `payloads` with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+    llm_requests_before = fake_server_app.state.requests
+    rss_before = rss_mb()
+
+    async def one(path, body):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                if response.status_code != 200:
+                    errors.append(f"HTTP {response.status_code}: {response.text[:200]}")
+                    return
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(path, body) for path, body in payloads))
+    wall = time.perf_counter() - start
+
+    result = {
+        "scenario": name,
+        "size_tokens": size,
+        "requests": len(payloads),
+        "errors": len(errors),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        **summarize_latencies(latencies),
+        "llm_requests": fake_server_app.state.requests - llm_requests_before,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    print(f"{name:<18} size={size:<6} ok={len(latencies):<4} errors={len(errors):<3} "
+          f"rps={result['throughput_rps']} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+          f"p99={result['p99_ms']}ms rss={result['rss_mb']}MB")
+    return result
+
+
+def use_fake_redis():
+    """Point the cache at fakeredis if it is installed; otherwise use the in-process tier only."""
+    from backend import cache
+
+    try:
+        import fakeredis
+    except ImportError:
+        cache.REDIS_ENABLED = False
+        return "disabled"
+    cache.aioredis = types.SimpleNamespace(Redis=fakeredis.aioredis.FakeRedis)
+    return "fakeredis"
+
+
+async def run_suite(args, fake_server_app):
+    import httpx
+    from backend import main
+    from backend.cache import close_cache
+    from backend.config import EVALUATION_MODE, MODEL_MAX_INPUT_TOKENS
+    from backend.eval_queue import start_evaluation_workers, stop_evaluation_workers
+    from backend.llm_client import close_async_client
+
+    if EVALUATION_MODE == "background":
+        start_evaluation_workers()
+
+    transport = httpx.ASGITransport(app=main.app)
+    results = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for size in args.sizes:
+                notes = [synthetic_note(size, seed=size * 1000 + i) for i in range(args.requests)]
+                scenario = "summarize_chunked" if size > MODEL_MAX_INPUT_TOKENS else "summarize"
+                if "summarize" in args.scenarios:
+                    payloads = [("/summarize", {"notes": note, "role": "general"}) for note in notes]
+                    results.append(await run_scenario(client, scenario, size, payloads, args.concurrency, fake_server_app))
+                    results.append(await run_scenario(client, "summarize_cached", size, payloads, args.concurrency, fake_server_app))
+                if "evaluate" in args.scenarios:
+                    payloads = [("/evaluate", {"notes": note, "generated_summary": "Patient admitted with chest pain."})
+                                for note in notes]
+                    results.append(await run_scenario(client, "evaluate", size, payloads, args.concurrency, fake_server_app))
+    finally:
+        await stop_evaluation_workers(drain_timeout=10)
+        await close_async_client()
+        await close_cache()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path):
+    """Print throughput and tail-latency changes against an earlier results file."""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(r["scenario"], r["size_tokens"]): r for r in json.load(file)["results"]}
+    print(f"\nChange vs {baseline_path}:")
+    for result in results:
+        old = baseline.get((result["scenario"], result["size_tokens"]))
+        if old is None:
+            continue
+        changes = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "rss_mb"):
+            if old.get(key) and result.get(key) is not None:
+                changes.append(f"{key} {(result[key] - old[key]) / old[key] * 100:+.1f}%")
+        print(f"  {result['scenario']:<18} size={result['size_tokens']:<6} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="500,2000,8000", help="Comma-separated note sizes in tokens")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per scenario and size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", default="summarize,evaluate")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Fake LLM generation rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM requests that fail")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="Results JSON (default: backend/benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    args.scenarios = set(args.scenarios.split(","))
+
+    # Route every OpenAI client (ours, DeepEval's and LangChain's) to the fake server
+    # before any of them is created.
+    base_url = f"http://127.0.0.1:{args.port}/v1"
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = base_url
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY") or "sk-fake"
+
+    from backend import config
+    from backend.benchmarks.fake_openai import run_fake_server
+
+    config.LLM_BASE_URL = base_url
+    config.LLM_API_KEY = config.LLM_API_KEY or "sk-fake"
+    redis_mode = use_fake_redis()
+
+    server = run_fake_server(port=args.port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+                             error_rate=args.error_rate)
+    try:
+        results = asyncio.run(run_suite(args, server.config.app))
+    finally:
+        server.should_exit = True
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "redis": redis_mode,
+            "evaluation_mode": config.EVALUATION_MODE,
+            "llm_max_concurrency": config.LLM_MAX_CONCURRENCY,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "params": {key: sorted(value) if isinstance(value, set) else value for key, value in vars(args).items()},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
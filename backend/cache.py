@@ -0,0 +1,241 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from loguru import logger
+from backend.config import CACHE_TTL, CACHE_MAX_ENTRIES, REDIS_ENABLED, REDIS_RETRY_INTERVAL
+
+if os.getenv("DOCKER_ENV"):
+    redis_url = os.getenv("DOCKER_REDIS_URL", "redis://redis:6379/0")
+else:
+    redis_url = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a TTL. Values are
+    copied on the way in and out (like the Redis tier, which stores JSON), so
+    a caller modifying a result never changes what later hits return; pass
+    copy_values=False for values that are never modified.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, copy_values=True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.copy_values = copy_values
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def set(self, key, value, ttl=None):
+        value = copy.deepcopy(value) if self.copy_values else value
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+memory_cache = TTLCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+
+_redis = None
+_redis_loop = None
+_redis_down_until = 0.0
+
+
+def make_cache_key(namespace, *parts):
+    """Stable SHA-256 key over the given parts (identical across processes and restarts)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+def summary_cache_key(notes, role, model, prompt_version):
+    return make_cache_key("summary", notes, role.lower(), model, prompt_version)
+
+
+def segment_cache_key(segment, model, prompt_version):
+    return make_cache_key("segment", segment, model, prompt_version)
+
+
+def prefix_summary_key(segment_keys, role, model, prompt_version):
+    """Key of the summary covering exactly the segments `segment_keys`, in order."""
+    return make_cache_key("summary-prefix", role.lower(), model, prompt_version, *segment_keys)
+
+
+def get_redis():
+    """Return the Redis client for the running loop, or None while Redis is disabled or down."""
+    global _redis, _redis_loop
+    if not REDIS_ENABLED or time.monotonic() < _redis_down_until:
+        return None
+    loop = asyncio.get_running_loop()
+    if _redis is None or _redis_loop is not loop:
+        _redis = aioredis.Redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=1.0)
+        _redis_loop = loop
+    return _redis
+
+
+def _mark_redis_down(error):
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+    logger.warning(f"Redis unavailable ({error}); using in-process cache only for {REDIS_RETRY_INTERVAL}s.")
+
+
+async def get_cached(key):
+    """Look up `key` in the in-process tier, then Redis. Returns None on a miss."""
+    value = memory_cache.get(key)
+    if value is not None:
+        return value
+
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(key)
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+        return None
+    if raw is None:
+        return None
+
+    value = json.loads(raw)
+    memory_cache.set(key, value)
+    return value
+
+
+async def set_cached(key, value, ttl=CACHE_TTL):
+    """Write `value` through both cache tiers."""
+    memory_cache.set(key, value, ttl)
+
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.set(key, json.dumps(value), ex=ttl)
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+
+
+# Delete the lock only if we still own it, so an expired lease that another
+# worker has since re-acquired is never released by the previous holder.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+async def acquire_lock(key, token, lease):
+    """
+    Try to take a cross-worker lease on `key` for `lease` seconds.
+
+    Returns True if the lease was acquired or Redis is unavailable (nothing to
+    coordinate with, so the caller should proceed), False if another worker holds it.
+    """
+    client = get_redis()
+    if client is None:
+        return True
+    try:
+        return bool(await client.set(key, token, nx=True, ex=lease))
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+        return True
+
+
+async def lock_exists(key):
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        return bool(await client.exists(key))
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+        return False
+
+
+async def release_lock(key, token):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+
+
+# Shared indexes are Redis sorted sets scored by the time each member was
+# added, so workers can fetch only what was added since their last refresh.
+# Members older than the TTL are dropped on every write.
+
+async def add_index_entry(key, member, ttl=CACHE_TTL):
+    """Add (or refresh) `member` in the shared index `key`."""
+    client = get_redis()
+    if client is None:
+        return
+    now = time.time()
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, {member: now})
+            pipe.zremrangebyscore(key, 0, now - ttl)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+
+
+async def load_index_entries(key, since=0.0):
+    """Members of the shared index `key` added at or after `since` (epoch seconds); [] while Redis is unavailable."""
+    client = get_redis()
+    if client is None:
+        return []
+    try:
+        members = await client.zrangebyscore(key, since, "+inf")
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+        return []
+    return [member.decode("utf-8") for member in members]
+
+
+async def remove_index_entry(key, member):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.zrem(key, member)
+    except (RedisError, OSError) as e:
+        _mark_redis_down(e)
+
+
+async def close_cache():
+    global _redis, _redis_loop
+    if _redis is not None:
+        try:
+            await _redis.aclose()
+        except (RedisError, OSError):
+            pass
+    _redis, _redis_loop = None, None
@@ -0,0 +1,165 @@
+import re
+from backend.tokens import count_tokens
+
+# A line opens a new section if it is an ALL-CAPS heading ("HOSPITAL COURSE",
+# "DISCHARGE MEDICATIONS:"), a short title-cased label on its own line
+# ("Past Medical History:"), or an ALL-CAPS label followed by inline text
+# ("HISTORY OF PRESENT ILLNESS: The patient is ...").
+SECTION_HEADER_RE = re.compile(
+    r"^(?:[A-Z][A-Z0-9 /&(),'-]{2,60}:?|[A-Z][A-Za-z0-9 /&(),'-]{2,50}:)$"
+)
+INLINE_HEADER_RE = re.compile(r"^([A-Z][A-Z0-9 /&(),'-]{2,60}:)\s*(\S.*)$")
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\-•*])|\n+")
+# A line opens a new dated entry if it starts with a date ("2024-03-02",
+# "03/02/2024", "Mar 2, 2024") or a hospital/post-op day marker ("Day 3",
+# "Hospital Day 3", "HD#3", "POD 2").
+DATE_HEADER_RE = re.compile(
+    r"^\s*(?:\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4}"
+    r"|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.? \d{1,2},? \d{4}"
+    r"|(?:Hospital |Post-?op(?:erative)? )?Day #?\d+|HD ?#?\d+|POD ?#?\d+)\b",
+    re.IGNORECASE
+)
+
+
+def match_section_header(line):
+    """Return (header, inline_text) if `line` opens a section, otherwise None."""
+    stripped = line.strip()
+    if not stripped or not any(c.isalpha() for c in stripped):
+        return None
+    if SECTION_HEADER_RE.match(stripped):
+        return stripped, ""
+    inline = INLINE_HEADER_RE.match(stripped)
+    if inline:
+        return inline.group(1), inline.group(2)
+    return None
+
+
+def split_sections(text):
+    """Split clinical notes into (header, body) sections on header lines."""
+    sections = []
+    header, lines = "", []
+
+    for line in text.splitlines():
+        match = match_section_header(line)
+        if match:
+            if header or any(l.strip() for l in lines):
+                sections.append((header, "\n".join(lines).strip()))
+            header, inline_text = match
+            lines = [inline_text] if inline_text else []
+        else:
+            lines.append(line)
+
+    if header or any(l.strip() for l in lines):
+        sections.append((header, "\n".join(lines).strip()))
+
+    return sections
+
+
+def split_segments(text):
+    """
+    Split a growing record into stable segments: one per dated entry (with any
+    undated preamble as the first segment), or one per section when the notes
+    have fewer than two dated entries. Appending notes only adds segments, so
+    earlier segments keep their exact text.
+    """
+    segments, current = [], []
+    for line in text.splitlines():
+        if DATE_HEADER_RE.match(line) and any(l.strip() for l in current):
+            segments.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        segments.append("\n".join(current).strip())
+
+    dated = sum(1 for segment in segments if DATE_HEADER_RE.match(segment))
+    if dated >= 2:
+        return segments
+    return [f"{header}\n{body}".strip() if header else body for header, body in split_sections(text) if header or body]
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+
+def _split_oversized(piece, max_chunk_size, token_counter):
+    """Hard-split a single sentence that alone exceeds the chunk budget."""
+    words = piece.split()
+    parts, current = [], []
+    for word in words:
+        current.append(word)
+        if token_counter(" ".join(current)) > max_chunk_size and len(current) > 1:
+            current.pop()
+            parts.append(" ".join(current))
+            current = [word]
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def _pack(pieces, max_chunk_size, token_counter, prefix=""):
+    """Greedily pack text pieces into chunks that stay within the token budget."""
+    chunks, current = [], []
+    budget = max_chunk_size - (token_counter(prefix) if prefix else 0)
+
+    for piece in pieces:
+        if token_counter(piece) > budget:
+            candidates = _split_oversized(piece, budget, token_counter)
+        else:
+            candidates = [piece]
+
+        for candidate in candidates:
+            if current and token_counter(" ".join(current + [candidate])) > budget:
+                chunks.append(current)
+                current = []
+            current.append(candidate)
+
+    if current:
+        chunks.append(current)
+
+    return [(prefix + "\n" if prefix else "") + " ".join(chunk) for chunk in chunks]
+
+
+def smart_chunk_text(text, max_chunk_size=2000, token_counter=count_tokens):
+    """
+    Split long clinical notes into chunks of at most `max_chunk_size` tokens.
+
+    Section boundaries are preferred; sections that are too large are split
+    on sentence boundaries and every continuation chunk repeats the section
+    header so the map step keeps its clinical context.
+
+    Args:
+        text (str): Clinical notes to be chunked.
+        max_chunk_size (int): Token budget per chunk.
+        token_counter (callable): Function returning the token count of a string.
+
+    Returns:
+        list[str]: Ordered chunks covering the full input.
+    """
+    if not text or not text.strip():
+        return []
+
+    chunks, current = [], ""
+
+    for header, body in split_sections(text):
+        section = f"{header}\n{body}".strip() if header else body
+        if not section:
+            continue
+
+        if token_counter(section) > max_chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_pack(split_sentences(body), max_chunk_size, token_counter, prefix=header))
+            continue
+
+        candidate = f"{current}\n\n{section}" if current else section
+        if current and token_counter(candidate) > max_chunk_size:
+            chunks.append(current)
+            current = section
+        else:
+            current = candidate
+
+    if current:
+        chunks.append(current)
+
+    return chunks
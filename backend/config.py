@@ -9,11 +9,118 @@ load_dotenv(dotenv_path=env_path)
 LLM_API_KEY = os.getenv("LLM_API_KEY")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4-turbo")
 LOG_FILE = os.getenv("LOG_FILE", "logs/summary.log")
+LOG_DIR = os.getenv("LOG_DIR", "backend/logs")
 CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
-REDIS_ENABLED = False
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+REDIS_ENABLED = os.getenv("REDIS_ENABLED", "true").lower() in ("1", "true", "yes")
+REDIS_RETRY_INTERVAL = int(os.getenv("REDIS_RETRY_INTERVAL", "30"))
+SINGLE_FLIGHT_LEASE = int(os.getenv("SINGLE_FLIGHT_LEASE", "300"))
+SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "0.5"))
 REDIS_URL = os.getenv("REDIS_URL", "Not Found")
 
-if not os.getenv("OPENAI_API_KEY"):
+# LLM transport
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# Evaluation: "sync" scores variants before /summarize returns, "background"
+# returns the first variant immediately and scores it in a local worker queue.
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "sync").lower()
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "2"))
+EVALUATION_QUEUE_SIZE = int(os.getenv("EVALUATION_QUEUE_SIZE", "1000"))
+EVALUATION_RESULT_TTL = int(os.getenv("EVALUATION_RESULT_TTL", "86400"))
+EVALUATION_METRIC_CONCURRENCY = int(os.getenv("EVALUATION_METRIC_CONCURRENCY", "8"))
+
+# Variant selection: "full" (default) always generates two variants and runs
+# the whole metric suite, so every response carries evaluation and final_score.
+# "adaptive" (opt-in) generates one variant and escalates to more variants plus
+# DeepEval only when cheap local checks fail; responses that pass the checks
+# have evaluation=None and final_score=None.
+SELECTION_STRATEGY = os.getenv("SELECTION_STRATEGY", "full").lower()
+SELECTION_POLICIES = os.getenv("SELECTION_POLICIES", "")
+
+# Embeddings for coherence scoring: "openai" or "local" (sentence-transformers)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_LOCAL_MODEL = os.getenv("EMBEDDING_LOCAL_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "20000"))
+
+# spaCy entity density: only the NER pipe (and what it depends on) is loaded
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+NLP_EXCLUDE_PIPES = [p for p in os.getenv("NLP_EXCLUDE_PIPES", "parser,tagger,attribute_ruler,lemmatizer,senter").split(",") if p]
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "32"))
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+
+# Token budgeting: 0 means use the known context window for LLM_MODEL
+MODEL_CONTEXT_WINDOW = int(os.getenv("MODEL_CONTEXT_WINDOW", "0"))
+SUMMARY_OUTPUT_RATIO = float(os.getenv("SUMMARY_OUTPUT_RATIO", "0.5"))
+
+# Logging: one structured JSON sink; full summaries/notes are logged for a
+# sample of requests only, otherwise a preview plus length and hash.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "4000"))
+LOG_TEXT_SAMPLE_RATE = float(os.getenv("LOG_TEXT_SAMPLE_RATE", "0.05"))
+LOG_TEXT_PREVIEW_CHARS = int(os.getenv("LOG_TEXT_PREVIEW_CHARS", "200"))
+
+# Observability: attach per-stage timings to responses as a Server-Timing header.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+
+# Feedback store (SQLite, WAL) and its batch writer
+FEEDBACK_DB_PATH = os.getenv("FEEDBACK_DB_PATH", "backend/logs/feedback.db")
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "200"))
+FEEDBACK_FLUSH_INTERVAL = float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "0.05"))
+FEEDBACK_QUEUE_SIZE = int(os.getenv("FEEDBACK_QUEUE_SIZE", "10000"))
+
+# Result store: every computed summary with its variants, metrics and timings
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", "backend/logs/results.db")
+# Records older than this many days are pruned (at startup and hourly on write); 0 keeps them forever
+RESULTS_TTL_DAYS = float(os.getenv("RESULTS_TTL_DAYS", "30"))
+# Keep the full notes with each record. When off only their hash is stored, so
+# re-scoring and near-duplicate answers from stored notes are unavailable.
+RESULTS_STORE_NOTES = os.getenv("RESULTS_STORE_NOTES", "true").lower() == "true"
+
+# Incremental summarization: growing notes are split into dated (or section)
+# segments; partial summaries are cached per segment content, and a request
+# only summarizes new segments and folds them into the cached earlier summary.
+INCREMENTAL_SUMMARIES = os.getenv("INCREMENTAL_SUMMARIES", "false").lower() == "true"
+INCREMENTAL_CACHE_TTL = int(os.getenv("INCREMENTAL_CACHE_TTL", "604800"))
+
+# Preprocessing before prompting: template boilerplate lines are stripped and
+# older near-duplicate (copy-forwarded) paragraphs and sentences are dropped.
+# BOILERPLATE_PATTERNS is a JSON list of extra whole-line regexes.
+PREPROCESS_ENABLED = os.getenv("PREPROCESS_ENABLED", "true").lower() == "true"
+DEDUP_SIMILARITY = float(os.getenv("DEDUP_SIMILARITY", "0.85"))
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "8"))
+BOILERPLATE_PATTERNS = os.getenv("BOILERPLATE_PATTERNS", "")
+
+# Near-duplicate cache lookup (opt-in): on an exact miss, a summary whose source
+# notes are at least SIMILARITY_THRESHOLD similar (estimated Jaccard over
+# normalized lines) and only had lines added is "update"d with the new lines,
+# or "reuse"d as is. Any removed or changed line means a full summary.
+SIMILARITY_CACHE_ENABLED = os.getenv("SIMILARITY_CACHE_ENABLED", "false").lower() == "true"
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.9"))
+SIMILARITY_MODE = os.getenv("SIMILARITY_MODE", "update").lower()
+SIMILARITY_INDEX_MAX_ENTRIES = int(os.getenv("SIMILARITY_INDEX_MAX_ENTRIES", "10000"))
+SIMILARITY_REFRESH_INTERVAL = float(os.getenv("SIMILARITY_REFRESH_INTERVAL", "30"))
+
+# Shared LLM rate limits across all workers (Redis; per process while Redis is
+# down). Set them to the provider's limits for LLM_MODEL; 0 disables a limit.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "300000"))
+
+# Long-document (map-reduce) summarization
+MODEL_MAX_INPUT_TOKENS = int(os.getenv("MODEL_MAX_INPUT_TOKENS", "4000"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "2000"))
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
+
+# Batch / bulk summarization
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_TOKENS_PER_MINUTE = int(os.getenv("BATCH_TOKENS_PER_MINUTE", "90000"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+if not os.getenv("OPENAI_API_KEY") and os.getenv("llm_api_key"):
     os.environ["OPENAI_API_KEY"] = os.getenv("llm_api_key")
 
 print(f"Loaded Config: REDIS_URL={REDIS_URL}, CACHE_TTL={CACHE_TTL}")
\ No newline at end of file
@@ -0,0 +1,41 @@
+from deepeval.metrics import GEval, SummarizationMetric
+from deepeval.test_case import LLMTestCase, LLMTestCaseParams
+
+# DeepEval imports langchain and llama_index, which take seconds and tens of
+# MB, so the evaluator imports this module on first use instead of at startup.
+
+
+class PreparedSummarizationMetric(SummarizationMetric):
+    """
+    SummarizationMetric that takes the truths, assessment questions and the
+    notes' answers to them from a precomputed note analysis instead of
+    regenerating them from the same notes for every summary.
+    """
+
+    def __init__(self, notes, analysis, **kwargs):
+        super().__init__(assessment_questions=analysis["questions"], **kwargs)
+        self._notes = notes
+        self._analysis = analysis
+
+    async def _a_generate_truths(self, text):
+        return list(self._analysis["truths"])
+
+    async def _a_generate_answers(self, text):
+        if text == self._notes:
+            return list(self._analysis["answers"])
+        return await super()._a_generate_answers(text)
+
+
+def summarization_metric(notes=None, analysis=None, **kwargs):
+    if analysis is None:
+        return SummarizationMetric(**kwargs)
+    return PreparedSummarizationMetric(notes, analysis, **kwargs)
+
+
+def geval_metric(name, criteria, evaluation_steps=None):
+    return GEval(name=name, criteria=criteria, evaluation_steps=evaluation_steps,
+                 evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT])
+
+
+def summary_test_case(notes, summary):
+    return LLMTestCase(input=notes, actual_output=summary)
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import numpy as np
+from loguru import logger
+from backend.cache import TTLCache
+from backend.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_LOCAL_MODEL,
+    EMBEDDING_MODEL,
+)
+from backend.llm_client import get_async_client
+
+# Unit-normalized vectors keyed on (backend, model, text). Summaries repeat the
+# same section headings and boilerplate constantly, so most sentences hit here.
+# Vectors are only read (stacked into new arrays), so they are not copied.
+embedding_cache = TTLCache(max_entries=EMBEDDING_CACHE_SIZE, ttl=7 * 24 * 3600, copy_values=False)
+
+_local_model = None
+
+
+def embedding_key(text):
+    model = EMBEDDING_LOCAL_MODEL if EMBEDDING_BACKEND == "local" else EMBEDDING_MODEL
+    return hashlib.sha256(f"{EMBEDDING_BACKEND}:{model}:{text}".encode("utf-8")).hexdigest()
+
+
+async def _embed_openai(texts):
+    client = get_async_client()
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        response = await client.embeddings.create(model=EMBEDDING_MODEL, input=texts[start:start + EMBEDDING_BATCH_SIZE])
+        vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _get_local_model():
+    global _local_model
+    if _local_model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=local requires the sentence-transformers package.") from e
+        logger.info(f"Loading local embedding model {EMBEDDING_LOCAL_MODEL}")
+        _local_model = SentenceTransformer(EMBEDDING_LOCAL_MODEL)
+    return _local_model
+
+
+async def _embed_local(texts):
+    model = _get_local_model()
+    vectors = await asyncio.to_thread(model.encode, texts, batch_size=EMBEDDING_BATCH_SIZE)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+async def embed_texts(texts):
+    """
+    Embed `texts` with the configured backend, in one batched request for all
+    cache misses. Returns an (n, d) array of unit-normalized vectors.
+    """
+    keys = [embedding_key(text) for text in texts]
+    found, missing = {}, {}
+    for key, text in zip(keys, texts):
+        vector = embedding_cache.get(key)
+        if vector is not None:
+            found[key] = vector
+        else:
+            missing[key] = text
+
+    if missing:
+        embed = _embed_local if EMBEDDING_BACKEND == "local" else _embed_openai
+        vectors = await embed(list(missing.values()))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        for key, vector in zip(missing, vectors):
+            embedding_cache.set(key, vector)
+            found[key] = vector
+
+    logger.debug(f"Embeddings: {len(texts) - len(missing)}/{len(texts)} served from cache")
+    return np.stack([found[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
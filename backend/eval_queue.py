@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+from loguru import logger
+from backend.cache import get_cached, make_cache_key, set_cached
+from backend.config import EVALUATION_QUEUE_SIZE, EVALUATION_RESULT_TTL, EVALUATION_WORKERS
+from backend.rate_limit import current_lane
+
+# Local worker queue for DeepEval scoring that runs after /summarize has returned.
+# Job status is stored in the shared cache so any worker can answer a poll.
+_queue = None
+_workers = []
+_loop = None
+
+
+def evaluation_key(request_id):
+    return make_cache_key("evaluation", request_id)
+
+
+async def get_evaluation(request_id):
+    """Return the stored evaluation record for `request_id`, or None if unknown."""
+    return await get_cached(evaluation_key(request_id))
+
+
+async def _store(request_id, record):
+    record = {**record, "request_id": request_id, "updated_at": datetime.now().isoformat()}
+    await set_cached(evaluation_key(request_id), record, ttl=EVALUATION_RESULT_TTL)
+    return record
+
+
+async def _worker(worker_id):
+    # Background scoring yields LLM capacity to interactive requests.
+    current_lane.set("evaluation")
+    while True:
+        request_id, evaluate = await _queue.get()
+        try:
+            await _store(request_id, {"status": "running"})
+            result = await evaluate()
+            await _store(request_id, {**result, "status": "complete"})
+            logger.info(f"Evaluation worker {worker_id}: completed {request_id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Evaluation worker {worker_id}: {request_id} failed")
+            await _store(request_id, {"status": "failed", "error": str(e)})
+        finally:
+            _queue.task_done()
+
+
+def start_evaluation_workers(num_workers=EVALUATION_WORKERS):
+    """Start the evaluation workers on the running event loop (idempotent)."""
+    global _queue, _workers, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop and _workers:
+        return
+    _loop = loop
+    _queue = asyncio.Queue(maxsize=EVALUATION_QUEUE_SIZE)
+    _workers = [asyncio.create_task(_worker(i)) for i in range(num_workers)]
+    logger.info(f"Started {num_workers} evaluation workers.")
+
+
+async def stop_evaluation_workers(drain_timeout=None):
+    """Optionally wait for queued jobs, then cancel the workers."""
+    global _workers, _loop
+    if _queue is not None and drain_timeout:
+        try:
+            await asyncio.wait_for(_queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{_queue.qsize()} evaluation jobs still queued at shutdown.")
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers, _loop = [], None
+
+
+async def enqueue_evaluation(request_id, evaluate):
+    """
+    Queue `evaluate` (a zero-argument coroutine function returning a dict of
+    results) to run in the background under `request_id`.
+
+    Returns:
+        dict: The initial evaluation record ("pending", or "skipped" if the queue is full).
+    """
+    start_evaluation_workers()
+    if _queue.full():
+        logger.warning(f"Evaluation queue full; skipping evaluation for {request_id}")
+        return await _store(request_id, {"status": "skipped"})
+    # Record "pending" before queueing so a fast worker's "running" is never overwritten.
+    record = await _store(request_id, {"status": "pending"})
+    try:
+        _queue.put_nowait((request_id, evaluate))
+    except asyncio.QueueFull:
+        logger.warning(f"Evaluation queue full; skipping evaluation for {request_id}")
+        return await _store(request_id, {"status": "skipped"})
+    return record
@@ -1,156 +1,346 @@
-from deepeval.test_case import LLMTestCase, LLMTestCaseParams
-from deepeval.metrics import SummarizationMetric, GEval
-from deepeval import evaluate
-import spacy
-import nltk
 import numpy as np
-from scipy.spatial.distance import cosine
-from backend.config import LLM_MODEL, LLM_API_KEY
-from langchain_openai import OpenAIEmbeddings
-import openai
+from backend.cache import get_cached, make_cache_key, set_cached
+from backend.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_LOCAL_MODEL,
+    EMBEDDING_MODEL,
+    EVALUATION_METRIC_CONCURRENCY,
+    EVALUATION_RESULT_TTL,
+    LLM_MODEL,
+    SPACY_MODEL,
+)
+from backend.llm_client import get_async_client
+from backend.rate_limit import llm_limiter
+from backend.tokens import count_tokens
+from backend.embeddings import embed_texts
+from backend.nlp import entity_densities
+from backend.singleflight import single_flight
+from backend.tracing import span, traced
 import asyncio
-import sys
-from loguru import logger
+from functools import lru_cache
+from backend.logger import logger
 
-logger.add("backend/logs/evaluator.log", rotation="1 MB", level="INFO", format="{time} | {level} | {message}")
 
+# To capture important clinical terms
+def get_medical_entity_density(text):
+    return entity_densities([text])[0]
 
-nlp = spacy.load("en_core_web_sm")
 
-openai_client = openai.OpenAI(api_key=LLM_API_KEY)
+def split_summary_sentences(summary):
+    return [s.strip() for s in summary.split('.') if any(c.isalnum() for c in s)]
 
-# To capture important clinical terms
-def get_medical_entity_density(text):
-    tokens = nltk.word_tokenize(text)
-    num_tokens = len(tokens)
-    doc = nlp(text)
-    num_entities = len(doc.ents)
-    return num_entities / max(num_tokens, 1)
-
-# To detect sentence disconnects
-def compute_coherence_score(summary):
-    sentences = summary.split('.')
-    if len(sentences) < 2:
-        return 0
-
-    embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
-    sentence_embeddings = embedding_model.embed_documents(sentences)
-
-    similarities = []
-    for i in range(len(sentence_embeddings) - 2):
-        emb1 = np.array(sentence_embeddings[i])
-        emb2 = np.array(sentence_embeddings[i + 2])
-        similarity = 1 - cosine(emb1, emb2)
-        similarities.append(similarity)
-
-    return np.mean(similarities) if similarities else 0
-
-
-medical_redundancy_metric = GEval(
-    name="Medical Repetitiveness",
-    criteria="Avoid repeating symptoms, conditions, or treatments unnecessarily.",
-    evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT],  # FIXED
-    verbose_mode=True
-)
 
-medical_vagueness_metric = GEval(
-    name="Medical Vagueness",
-    criteria="Avoid vague descriptions and ensure specificity.",
-    evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT], 
-    verbose_mode=True
-)
+# To detect sentence disconnects: mean cosine similarity between each sentence
+# and the one two positions later, for every summary in a single embedding call.
+@traced("embeddings.coherence")
+async def compute_coherence_scores(summaries):
+    sentence_lists = [split_summary_sentences(summary) for summary in summaries]
+    embeddings = await embed_texts([s for sentences in sentence_lists for s in sentences])
+
+    scores, offset = [], 0
+    for sentences in sentence_lists:
+        vectors = embeddings[offset:offset + len(sentences)]
+        offset += len(sentences)
+        if len(vectors) < 3:
+            scores.append(0)
+            continue
+        # Rows are unit-normalized, so the row-wise dot product is the cosine similarity.
+        similarities = np.einsum("ij,ij->i", vectors[:-2], vectors[2:])
+        scores.append(float(similarities.mean()))
+    return scores
+
+
+async def compute_coherence_score(summary):
+    return (await compute_coherence_scores([summary]))[0]
+
+
+# GEval criteria. Metric objects keep per-measurement state, so a fresh instance
+# is built for every test case; the evaluation steps derived from the criteria
+# are generated once and cached.
+GEVAL_CRITERIA = {
+    "Medical Repetitiveness": "Avoid repeating symptoms, conditions, or treatments unnecessarily.",
+    "Medical Vagueness": "Avoid vague descriptions and ensure specificity.",
+}
+
+SUMMARIZATION_QUESTIONS = 20
+TRUTHS_EXTRACTION_LIMIT = 50
+
+# DeepEval calls the LLM through its own client, so each step reserves an
+# estimate in the shared rate limits up front: the number of calls it makes
+# and, per call, the text it sends plus instructions and JSON output.
+EVAL_CALL_TOKENS = 800
+SUMMARIZATION_CALLS = 4
+NOTE_ANALYSIS_CALLS = 3
+
+_metric_semaphores = {}
+
+
+def _metric_semaphore():
+    loop = asyncio.get_running_loop()
+    if loop not in _metric_semaphores:
+        _metric_semaphores[loop] = asyncio.Semaphore(EVALUATION_METRIC_CONCURRENCY)
+    return _metric_semaphores[loop]
+
+
+def load_deepeval():
+    """DeepEval-backed metric builders, imported on first use (see backend.deepeval_metrics)."""
+    from backend import deepeval_metrics
+
+    return deepeval_metrics
+
+
+def _summarization_metric(notes=None, analysis=None):
+    return load_deepeval().summarization_metric(
+        notes, analysis, n=SUMMARIZATION_QUESTIONS, truths_extraction_limit=TRUTHS_EXTRACTION_LIMIT
+    )
+
+
+async def reserve_evaluation_calls(calls, text=""):
+    await llm_limiter.acquire(calls * (count_tokens(text) + EVAL_CALL_TOKENS), requests=calls)
+
+
+async def analyze_notes(notes):
+    """
+    Truths, assessment questions and the notes' own answers, computed once per
+    note and cached by note hash (in-process and Redis) for every later variant.
+    """
+    metric = _summarization_metric()
+    key = make_cache_key("eval-notes", notes, metric.evaluation_model, SUMMARIZATION_QUESTIONS, TRUTHS_EXTRACTION_LIMIT)
+
+    cached = await get_cached(key)
+    if cached is not None:
+        return cached
+
+    async def compute():
+        metric.evaluation_cost = 0  # normally initialized by a_measure()
+        await reserve_evaluation_calls(NOTE_ANALYSIS_CALLS, notes)
+        try:
+            truths, questions = await asyncio.gather(
+                metric._a_generate_truths(notes),
+                metric._a_generate_assessment_questions(notes),
+            )
+        except AttributeError as e:
+            logger.error(f"DeepEval Error: {e}. Using manual truth generation.")
+            truths = [await generate_truths(notes)]
+            questions = await metric._a_generate_assessment_questions(notes)
+        metric.assessment_questions = questions
+        analysis = {"truths": truths, "questions": questions, "answers": await metric._a_generate_answers(notes)}
+        await set_cached(key, analysis)
+        return analysis
+
+    return await single_flight(key, compute)
+
+
+async def geval_steps(name):
+    """Evaluation steps for a GEval criterion, generated once per model and cached."""
+    metric = load_deepeval().geval_metric(name, GEVAL_CRITERIA[name])
+    key = make_cache_key("geval-steps", name, GEVAL_CRITERIA[name], metric.evaluation_model)
+
+    cached = await get_cached(key)
+    if cached is not None:
+        return cached
+
+    async def compute():
+        metric.evaluation_cost = 0  # normally initialized by a_measure()
+        await reserve_evaluation_calls(1)
+        steps = await metric._a_generate_evaluation_steps()
+        await set_cached(key, steps)
+        return steps
+
+    return await single_flight(key, compute)
+
+
+async def _measure(metric, test_case, calls=1):
+    await reserve_evaluation_calls(calls, test_case.actual_output)
+    async with _metric_semaphore():
+        with span(f"metric.{metric.__name__}"):
+            await metric.a_measure(test_case, _show_indicator=False)
+    logger.debug(f"{metric.__name__}: {metric.verbose_logs}")
+    return metric
 
 #def is_uvloop():
 #    return isinstance(asyncio.get_event_loop(), asyncio.AbstractEventLoop) and 'uvloop' in sys.modules
 
 async def generate_truths(prompt):
+    """Truths for `prompt` straight from the LLM. Raises on failure, so no placeholder is ever cached as truths."""
     try:
-        response = await openai_client.chat.completions.create(
+        response = await get_async_client().chat.completions.create(
             model=LLM_MODEL,
             messages=[{"role":"user", "content":prompt}],
             temperature=0.4
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"OpenAI API Error: {e}")
-        return "Error generating truths."
+        raise
+    return response.choices[0].message.content.strip()
+
+
+# Metrics that can be requested individually; results are cached per metric
+# so any subset reuses what an earlier call (e.g. /summarize) computed.
+METRICS = ("summarization", "redundancy", "vagueness", "coherence", "entity_density")
+GEVAL_METRICS = {"redundancy": "Medical Repetitiveness", "vagueness": "Medical Vagueness"}
+
+
+@lru_cache(maxsize=1)
+def _evaluation_model():
+    return _summarization_metric().evaluation_model
+
+
+def metric_config(name):
+    """Everything besides the texts that determines a metric's score."""
+    if name == "summarization":
+        return (_evaluation_model(), SUMMARIZATION_QUESTIONS, TRUTHS_EXTRACTION_LIMIT)
+    if name in GEVAL_METRICS:
+        return (_evaluation_model(), GEVAL_CRITERIA[GEVAL_METRICS[name]])
+    if name == "coherence":
+        return (EMBEDDING_BACKEND, EMBEDDING_LOCAL_MODEL if EMBEDDING_BACKEND == "local" else EMBEDDING_MODEL)
+    return (SPACY_MODEL,)
+
+
+def metric_cache_key(name, notes, summary):
+    # Only the summarization metric compares against the notes.
+    notes_part = notes if name == "summarization" else ""
+    return make_cache_key("eval-metric", name, notes_part, summary, *metric_config(name))
+
+
+async def _compute_metrics(notes, summary_texts, pending):
+    """
+    Compute `pending` {metric name: [summary index, ...]} and return
+    {(name, index): {"score", "reason"}}.
+    """
+    scores = {}
+    tasks = []
+
+    llm_metrics = [name for name in ("summarization", *GEVAL_METRICS) if pending.get(name)]
+    if llm_metrics:
+        # Note-level work (truths, questions, GEval steps) once, then every metric
+        # for every summary concurrently on the event loop.
+        analysis = await analyze_notes(notes) if "summarization" in llm_metrics else None
+        steps = dict(zip(
+            [name for name in llm_metrics if name in GEVAL_METRICS],
+            await asyncio.gather(*(geval_steps(GEVAL_METRICS[name]) for name in llm_metrics if name in GEVAL_METRICS))
+        ))
+
+        deepeval = load_deepeval()
+
+        async def run(name, index):
+            if name == "summarization":
+                metric = _summarization_metric(notes, analysis)
+            else:
+                criterion = GEVAL_METRICS[name]
+                metric = deepeval.geval_metric(criterion, GEVAL_CRITERIA[criterion], evaluation_steps=steps[name])
+            calls = SUMMARIZATION_CALLS if name == "summarization" else 1
+            await _measure(metric, deepeval.summary_test_case(notes, summary_texts[index]), calls)
+            scores[(name, index)] = {"score": metric.score, "reason": metric.reason}
+
+        tasks += [run(name, index) for name in llm_metrics for index in pending[name]]
+
+    async def coherence():
+        indices = pending["coherence"]
+        for index, score in zip(indices, await compute_coherence_scores([summary_texts[i] for i in indices])):
+            scores[("coherence", index)] = {"score": score, "reason": None}
+
+    async def entity_density():
+        indices = pending["entity_density"]
+        densities = await asyncio.to_thread(entity_densities, [summary_texts[i] for i in indices])
+        for index, score in zip(indices, densities):
+            scores[("entity_density", index)] = {"score": score, "reason": None}
+
+    if pending.get("coherence"):
+        tasks.append(coherence())
+    if pending.get("entity_density"):
+        tasks.append(entity_density())
+
+    await asyncio.gather(*tasks)
+    return scores
+
+
+def format_metrics(scores):
+    """Report names used by the API for the computed {metric name: score} subset."""
+    metrics = {}
+    if "summarization" in scores:
+        summarization_score = scores["summarization"]  # Measures alignment & factual accuracy to prevent hallucinations
+        alignment_score = summarization_score
+        coverage_score = summarization_score
+        final_score = (2 * alignment_score * coverage_score) / (alignment_score + coverage_score) if alignment_score + coverage_score > 0 else 0
+        metrics.update({
+            "Summarization Score": summarization_score,
+            "Alignment Score": alignment_score,
+            "Coverage Score": coverage_score,
+        })
+    if "entity_density" in scores:
+        metrics["Entity Density Score"] = scores["entity_density"]
+    if "coherence" in scores:
+        metrics["Coherence Score"] = scores["coherence"]
+    if "vagueness" in scores:
+        metrics["Vagueness Score"] = scores["vagueness"]  # To ensure medical clarity
+    if "redundancy" in scores:
+        metrics["Repetitiveness Score"] = scores["redundancy"]  # To improve summary efficiency
+    if "summarization" in scores:
+        metrics["final score"] = final_score
+    return metrics
 
 
 # DeepEval-Based Evaluation
-async def evaluate_summary_deepeval(input_notes, summaries):
+@traced("evaluation")
+async def evaluate_summary_deepeval(input_notes, summaries, metrics=None):
+    """
+    Score each summary against `input_notes` on `metrics` (default: all of
+    METRICS). Scores are cached per (metric, configuration, notes, summary), so
+    repeated pairs and subsets of earlier evaluations cost no LLM calls.
+
+    Raises:
+        ValueError: for unknown metric names.
+    """
     logger.info("Starting evaluation of summaries...")
 
     if isinstance(summaries, dict):  
         summaries = [summaries]  
 
     if not isinstance(summaries, list):
-        logger.error("ERROR: `summaries` is not a list! It is:", type(summaries))
+        logger.error(f"ERROR: `summaries` is not a list! It is: {type(summaries)}")
         return {"error": "Evaluation failed: summaries must be a list of dictionaries."}
 
     if not all(isinstance(s, dict) and "summary" in s for s in summaries):
-        logger.error("ERROR: Summaries do not contain 'summary' keys! Received:", summaries)
+        logger.error(f"ERROR: Summaries do not contain 'summary' keys! Received: {summaries}")
         return {"error": "Evaluation failed: Each item must be a dictionary with 'summary' key."}
 
-    test_cases = [LLMTestCase(input=input_notes, actual_output=s["summary"]) for s in summaries]
+    requested = list(dict.fromkeys(metrics or METRICS))
+    unknown = [name for name in requested if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}. Available: {', '.join(METRICS)}")
 
-    summarization_metric = SummarizationMetric(
-        verbose_mode=True,
-        n=20,
-        truths_extraction_limit=50
-    )
+    summary_texts = [s["summary"] for s in summaries]
+    keys = {(name, i): metric_cache_key(name, input_notes, text) for name in requested for i, text in enumerate(summary_texts)}
+    cached = dict(zip(keys, await asyncio.gather(*(get_cached(key) for key in keys.values()))))
 
-    try:
-        eval_results = evaluate(
-            test_cases,
-            [summarization_metric, medical_redundancy_metric, medical_vagueness_metric]
-        )
-    except AttributeError as e:
-        logger.error(f"DeepEval Error: {e}. Using manual truth generation.")
-        truth_data = await generate_truths(input_notes)
-        summarization_metric.truths = [truth_data]
-        eval_results = evaluate(
-            test_cases,
-            [summarization_metric, medical_redundancy_metric, medical_vagueness_metric]
-        )
-
-    formatted_results = []
+    # Compute each missing (metric, summary text) once, even if a text repeats in this call.
+    pending, first_index = {}, {}
+    for (name, i), key in keys.items():
+        if cached[(name, i)] is None and key not in first_index:
+            first_index[key] = i
+            pending.setdefault(name, []).append(i)
 
-    for i, result in enumerate(eval_results.test_results):  
-        try:
-            metrics_data = result.metrics_data 
-        except AttributeError:
-            logger.error(f"ERROR: Test result does not contain expected `metrics_data` field: {result}")
-            continue 
-
-        summarization_score = metrics_data[0].score  # Measures alignment & factual accuracy to prevent hallucinations
-        redundancy_score = metrics_data[1].score  # To improve summary efficiency
-        vagueness_score = metrics_data[2].score  # To ensure medical clarity
-
-        
-        coherence_score = compute_coherence_score(summaries[i]["summary"])
-        entity_density_score = get_medical_entity_density(summaries[i]["summary"])
-
-        
-        alignment_score = summarization_score  
-        coverage_score = summarization_score  
-        final_score = (2 * alignment_score * coverage_score) / (alignment_score + coverage_score) if alignment_score + coverage_score > 0 else 0
+    computed = await _compute_metrics(input_notes, summary_texts, pending) if pending else {}
+    await asyncio.gather(*(
+        set_cached(keys[(name, i)], value, ttl=EVALUATION_RESULT_TTL) for (name, i), value in computed.items()
+    ))
+    logger.info(f"Evaluation: {len(keys) - len(computed)}/{len(keys)} metric scores served from cache")
 
+    formatted_results = []
+    for i, text in enumerate(summary_texts):
+        values = {
+            name: cached[(name, i)] or computed[(name, first_index[keys[(name, i)]])]
+            for name in requested
+        }
+        summarization = values.get("summarization")
         formatted_results.append({
             "summary_index": i,
-            "metrics": {
-                "Summarization Score": summarization_score,
-                "Alignment Score": alignment_score,
-                "Coverage Score": coverage_score,
-                "Entity Density Score": entity_density_score,
-                "Coherence Score": coherence_score,
-                "Vagueness Score": vagueness_score,
-                "Repetitiveness Score": redundancy_score,
-                "final score":final_score
-            },
-            "feedback": result.feedback if hasattr(result, 'feedback') else "Evaluation completed.",
-            "summary": summaries[i]["summary"]
+            "metrics": format_metrics({name: value["score"] for name, value in values.items()}),
+            "feedback": (summarization or {}).get("reason") or "Evaluation completed.",
+            "summary": text
         })
         logger.info(f"Evaluation Metrics for summary {i}: {formatted_results[-1]['metrics']}")
     logger.success("Evaluation completed successfully!")
 
-    return formatted_results
\ No newline at end of file
+    return formatted_results
@@ -1,25 +1,236 @@
+"""
+Clinician feedback store: SQLite in WAL mode, written through an async batch
+writer and read newest-first with keyset pagination.
+
+Migrate the legacy JSONL file once with:
+
+    python -m backend.feedback import [--path backend/logs/feedback.json]
+"""
+import argparse
+import asyncio
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
 from loguru import logger
+from backend.config import FEEDBACK_BATCH_SIZE, FEEDBACK_DB_PATH, FEEDBACK_FLUSH_INTERVAL, FEEDBACK_QUEUE_SIZE
 
-FEEDBACK_FILE = "backend/logs/feedback.json"
+FEEDBACK_DB = FEEDBACK_DB_PATH
+LEGACY_FEEDBACK_FILE = "backend/logs/feedback.json"
 
-def store_feedback(request_id, summary, feedback):
-    """Store clinician feedback for model improvement."""
-    feedback_entry = {
-        "request_id": request_id,
-        "summary": summary,
-        "feedback": feedback,
-        "timestamp": datetime.now().isoformat()
-    }
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_id TEXT NOT NULL,
+    summary TEXT,
+    feedback TEXT,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_request_id ON feedback (request_id, id);
+CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback (timestamp);
+"""
+
+INSERT_SQL = "INSERT INTO feedback (request_id, summary, feedback, timestamp) VALUES (?, ?, ?, ?)"
+
+_queue = None
+_writer = None
+_loop = None
+# One long-lived connection each for writes (batch writer and the QueueFull
+# fallback) and reads; each lock keeps its connection's statements from
+# interleaving across threads.
+_write_conn = None
+_read_conn = None
+_write_lock = threading.Lock()
+_read_lock = threading.Lock()
+
+
+def connect(db_path=None):
+    db_path = db_path or FEEDBACK_DB
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def insert_feedback(rows, db_path=None):
+    """Insert (request_id, summary, feedback, timestamp) rows in one transaction."""
+    global _write_conn
+    if db_path:
+        conn = connect(db_path)
+        try:
+            with conn:
+                conn.executemany(INSERT_SQL, rows)
+        finally:
+            conn.close()
+        return
+    with _write_lock:
+        if _write_conn is None:
+            _write_conn = connect()
+        with _write_conn:
+            _write_conn.executemany(INSERT_SQL, rows)
+
+
+def query_feedback(limit=50, before_id=None, request_id=None, since=None, until=None, db_path=None):
+    """
+    Newest feedback first. Pass the returned `next_before` as `before_id` to
+    get the following page; `since`/`until` are ISO timestamps.
+    """
+    global _read_conn
+    clauses, params = [], []
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if request_id:
+        clauses.append("request_id = ?")
+        params.append(request_id)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    sql = f"SELECT id, request_id, summary, feedback, timestamp FROM feedback {where} ORDER BY id DESC LIMIT ?"
+    if db_path:
+        conn = connect(db_path)
+        try:
+            rows = conn.execute(sql, params + [limit]).fetchall()
+        finally:
+            conn.close()
+    else:
+        with _read_lock:
+            if _read_conn is None:
+                _read_conn = connect()
+            rows = _read_conn.execute(sql, params + [limit]).fetchall()
+
+    entries = [dict(row) for row in rows]
+    return {"feedback": entries, "next_before": entries[-1]["id"] if len(entries) == limit else None}
+
+
+async def _write_batches():
+    while True:
+        batch = [await _queue.get()]
+        # Let a burst accumulate so it lands in a single transaction.
+        await asyncio.sleep(FEEDBACK_FLUSH_INTERVAL)
+        while len(batch) < FEEDBACK_BATCH_SIZE and not _queue.empty():
+            batch.append(_queue.get_nowait())
+        try:
+            await asyncio.to_thread(insert_feedback, batch)
+        except Exception:
+            logger.exception(f"Failed to write {len(batch)} feedback entries")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def start_feedback_writer():
+    """Start the batch writer on the running event loop (idempotent)."""
+    global _queue, _writer, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop and _writer is not None:
+        return
+    _loop = loop
+    _queue = asyncio.Queue(maxsize=FEEDBACK_QUEUE_SIZE)
+    _writer = asyncio.create_task(_write_batches())
+    if os.path.exists(LEGACY_FEEDBACK_FILE):
+        logger.warning(f"{LEGACY_FEEDBACK_FILE} has not been imported; run `python -m backend.feedback import`.")
 
-    os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
 
-    with open(FEEDBACK_FILE, "a") as file:
-        json.dump(feedback_entry, file)
-        file.write("\n")
+async def stop_feedback_writer(drain_timeout=10):
+    """Flush queued feedback, then stop the writer."""
+    global _writer, _loop
+    if _queue is not None:
+        try:
+            await asyncio.wait_for(_queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{_queue.qsize()} feedback entries were not written at shutdown.")
+    if _writer is not None:
+        _writer.cancel()
+        await asyncio.gather(_writer, return_exceptions=True)
+    _writer, _loop = None, None
+    close_feedback()
+
+
+def close_feedback():
+    """Close the shared connections (they reopen on next use)."""
+    global _write_conn, _read_conn
+    with _write_lock:
+        if _write_conn is not None:
+            _write_conn.close()
+        _write_conn = None
+    with _read_lock:
+        if _read_conn is not None:
+            _read_conn.close()
+        _read_conn = None
+
+
+async def store_feedback(request_id, summary, feedback):
+    """Store clinician feedback for model improvement."""
+    start_feedback_writer()
+    row = (request_id, summary, feedback, datetime.now().isoformat())
+    try:
+        _queue.put_nowait(row)
+    except asyncio.QueueFull:
+        # Apply backpressure rather than drop feedback.
+        await asyncio.to_thread(insert_feedback, [row])
 
     logger.info(f"Feedback received for Request ID: {request_id}")
 
     return {"status": "Feedback recorded successfully"}
+
+
+async def get_feedback(**filters):
+    return await asyncio.to_thread(query_feedback, **filters)
+
+
+def import_jsonl(path=LEGACY_FEEDBACK_FILE, db_path=None):
+    """
+    One-time migration of the legacy JSONL feedback file, in a single
+    transaction. The file is renamed to `<path>.imported` afterwards so it is
+    never imported twice. Returns the number of entries imported.
+    """
+    def rows():
+        with open(path, "r", encoding="utf-8") as file:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed feedback line {line_number}")
+                    continue
+                yield (entry.get("request_id", ""), entry.get("summary"), entry.get("feedback"),
+                       entry.get("timestamp") or datetime.now().isoformat())
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            before = conn.total_changes
+            conn.executemany(INSERT_SQL, rows())
+            imported = conn.total_changes - before
+    finally:
+        conn.close()
+
+    os.replace(path, f"{path}.imported")
+    logger.info(f"Imported {imported} feedback entries from {path}")
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    import_parser = subcommands.add_parser("import", help="Migrate the legacy JSONL feedback file")
+    import_parser.add_argument("--path", default=LEGACY_FEEDBACK_FILE)
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(f"Imported {import_jsonl(args.path)} entries into {FEEDBACK_DB}")
+
+
+if __name__ == "__main__":
+    main()
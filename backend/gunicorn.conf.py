@@ -0,0 +1,25 @@
+# Preload-and-fork serving: the app and its models are loaded once in the
+# master and shared copy-on-write by the forked uvicorn workers.
+#
+#     gunicorn -c gunicorn.conf.py main:app
+#
+# /metrics is kept in each worker's memory and is only complete with a single
+# worker (WEB_CONCURRENCY=1); see backend/tracing.py.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+graceful_timeout = 30
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded app is imported and before any worker forks.
+    if workers > 1:
+        server.log.warning(f"{workers} workers: /metrics reports only the worker that answers each scrape.")
+    if preload_app:
+        from backend.preload import preload_models
+
+        preload_models()
@@ -0,0 +1,74 @@
+import asyncio
+import httpx
+import openai
+from backend import config
+
+# One pooled client and one concurrency gate per event loop. httpx connection
+# pools are bound to the loop that opened them, so a new loop (e.g. a test
+# calling asyncio.run) gets its own client instead of reusing dead sockets.
+# A client must also be closed on its own loop while that loop still runs, so
+# each one gets a closer task that asyncio.run() cancels (and thus runs) at
+# shutdown. Settings are read from `backend.config` when the client is built,
+# so overrides applied before first use (benchmarks, tests) take effect.
+_clients = {}  # event loop -> (AsyncOpenAI client, semaphore, closer task)
+
+
+def _build_client():
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(config.LLM_TIMEOUT, connect=10.0),
+    )
+    return openai.AsyncOpenAI(
+        api_key=config.LLM_API_KEY or None,
+        base_url=config.LLM_BASE_URL,
+        http_client=http_client,
+        max_retries=0,  # retries are handled by tenacity in the callers
+    )
+
+
+async def _close_at_loop_shutdown(loop, client):
+    try:
+        await loop.create_future()
+    finally:
+        if _clients.get(loop, (None,))[0] is client:
+            del _clients[loop]
+        if not client.is_closed():
+            await client.close()
+
+
+def _entry_for_current_loop():
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None:
+        # Loops closed without cancelling their tasks leave entries behind; drop them.
+        for closed in [other for other in _clients if other.is_closed()]:
+            del _clients[closed]
+        client = _build_client()
+        closer = loop.create_task(_close_at_loop_shutdown(loop, client))
+        entry = _clients[loop] = (client, asyncio.Semaphore(config.LLM_MAX_CONCURRENCY), closer)
+    return entry
+
+
+def get_async_client():
+    """Return the shared, connection-pooled AsyncOpenAI client for the running loop."""
+    return _entry_for_current_loop()[0]
+
+
+def get_llm_semaphore():
+    """Return the per-process cap on concurrent LLM requests."""
+    return _entry_for_current_loop()[1]
+
+
+async def close_async_client():
+    """
+    Close the running loop's pooled HTTP transport (called on application
+    shutdown). Clients of other loops are closed when those loops shut down.
+    """
+    entry = _clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        client, _, closer = entry
+        closer.cancel()
+        await client.close()
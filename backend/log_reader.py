@@ -0,0 +1,162 @@
+import asyncio
+import glob
+import json
+import os
+import re
+import zipfile
+from datetime import datetime
+
+# Reads log records newest-first without loading whole files: the active file
+# is read backwards in fixed-size blocks, then rotated segments (plain or
+# zip-compressed) are read in order of age until enough records are found.
+
+BLOCK_SIZE = 64 * 1024
+
+LEVELS = {"TRACE": 5, "DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Records are JSON lines ({"time": ..., "level": ...}); older segments may hold
+# loguru ("2024-01-01 10:00:00.123 | INFO | ...") or stdlib
+# ("2024-01-01 10:00:00,123 - INFO - ...") text records, whose extra lines
+# continue the previous record.
+RECORD_START_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)\S*\s*[|-]\s*([A-Z]+)\b"
+)
+
+
+def parse_header(line):
+    """Return (timestamp, level) if `line` starts a record, else None. Timestamps are naive local time."""
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+            return datetime.fromisoformat(entry["time"]).replace(tzinfo=None), entry["level"]
+        except (ValueError, KeyError, TypeError):
+            return None
+    match = RECORD_START_RE.match(line)
+    if not match:
+        return None
+    timestamp = datetime.fromisoformat(match.group(1).replace(",", "."))
+    return timestamp, match.group(2)
+
+
+def reverse_lines(file, block_size=BLOCK_SIZE):
+    """Yield the lines of a binary file object from last to first, reading backwards in blocks."""
+    file.seek(0, os.SEEK_END)
+    position = file.tell()
+    remainder = b""
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        file.seek(position)
+        block = file.read(read_size) + remainder
+        lines = block.split(b"\n")
+        remainder = lines.pop(0)  # may be the tail of a line that starts in an earlier block
+        for line in reversed(lines):
+            yield line.decode("utf-8", errors="replace")
+    yield remainder.decode("utf-8", errors="replace")
+
+
+def log_segments(path):
+    """The active log file followed by its rotated segments, newest first."""
+    stem, ext = os.path.splitext(path)
+    rotated = glob.glob(f"{glob.escape(stem)}.*{ext}") + glob.glob(f"{glob.escape(stem)}.*{ext}.zip")
+    rotated.sort(key=os.path.getmtime, reverse=True)
+    return ([path] if os.path.exists(path) else []) + rotated
+
+
+def _segment_lines(segment):
+    """Lines of one segment, newest first. Zip members cannot be read backwards, so they are read whole."""
+    if segment.endswith(".zip"):
+        with zipfile.ZipFile(segment) as archive:
+            for name in reversed(archive.namelist()):
+                yield from reversed(archive.read(name).decode("utf-8", errors="replace").split("\n"))
+        return
+    with open(segment, "rb") as file:
+        yield from reverse_lines(file)
+
+
+def reverse_records(path):
+    """Yield (timestamp, level, text) records across all segments, newest first."""
+    for segment in log_segments(path):
+        continuation = []
+        for line in _segment_lines(segment):
+            header = parse_header(line)
+            if header is None:
+                if line.strip():
+                    continuation.append(line)
+                continue
+            yield header[0], header[1], "\n".join([line] + continuation[::-1])
+            continuation = []
+
+
+def matches(level, timestamp, min_level=None, until=None):
+    if min_level and LEVELS.get(level, 0) < LEVELS.get(min_level.upper(), 0):
+        return False
+    if until and timestamp >= until:
+        return False
+    return True
+
+
+def tail_logs(path, lines=50, level=None, since=None, until=None):
+    """
+    The last `lines` records at or above `level` within [since, until), in
+    chronological order. Scanning stops as soon as records get older than `since`.
+    """
+    since = datetime.fromisoformat(since) if isinstance(since, str) else since
+    until = datetime.fromisoformat(until) if isinstance(until, str) else until
+    records = []
+    for timestamp, record_level, text in reverse_records(path):
+        if since and timestamp < since:
+            break
+        if matches(record_level, timestamp, level, until):
+            records.append(text)
+            if len(records) >= lines:
+                break
+    return records[::-1]
+
+
+async def follow_logs(path, level=None, poll_interval=0.5):
+    """Yield new records appended to `path` as they are written, following rotation."""
+    file, from_start = None, False
+    try:
+        while True:
+            if file is None:
+                if not os.path.exists(path):
+                    await asyncio.sleep(poll_interval)
+                    continue
+                file = open(path, "r", encoding="utf-8", errors="replace")
+                if not from_start:
+                    file.seek(0, os.SEEK_END)
+                inode, buffer, pending = os.fstat(file.fileno()).st_ino, "", None
+
+            chunk = file.read()
+            if chunk:
+                buffer += chunk
+                *complete, buffer = buffer.split("\n")
+                for line in complete:
+                    header = parse_header(line)
+                    if header is not None:
+                        if pending and matches(pending[1], pending[0], level):
+                            yield pending[2]
+                        pending = (header[0], header[1], line)
+                    elif pending and line.strip():
+                        pending = (pending[0], pending[1], pending[2] + "\n" + line)
+                continue
+
+            # A quiet file means the pending record is complete.
+            if pending and matches(pending[1], pending[0], level):
+                yield pending[2]
+            pending = None
+
+            try:
+                rotated = os.stat(path).st_ino != inode
+            except FileNotFoundError:
+                rotated = True
+            if rotated:
+                # Read the replacement file from its start so nothing written after rotation is missed.
+                file.close()
+                file, from_start = None, True
+                continue
+            await asyncio.sleep(poll_interval)
+    finally:
+        if file is not None:
+            file.close()
@@ -1,37 +1,113 @@
-from loguru import logger
+import hashlib
+import json
+import logging
 import os
+import random
+from loguru import logger
+from backend.config import LOG_DIR, LOG_LEVEL, LOG_MAX_MESSAGE_CHARS, LOG_TEXT_PREVIEW_CHARS, LOG_TEXT_SAMPLE_RATE
 
-LOG_DIR = "backend/logs"
 LOG_FILE = os.path.join(LOG_DIR, "summary.log")
 
 
-os.makedirs(LOG_DIR, exist_ok=True)
+def _truncate(text):
+    if len(text) <= LOG_MAX_MESSAGE_CHARS:
+        return text
+    return f"{text[:LOG_MAX_MESSAGE_CHARS]}... [truncated {len(text) - LOG_MAX_MESSAGE_CHARS} chars]"
+
+
+def _json_line(record):
+    """One compact JSON object per record: standard fields, bound extras, capped message."""
+    entry = {
+        "time": record["time"].isoformat(timespec="milliseconds"),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": _truncate(record["message"]),
+    }
+    entry.update((key, value) for key, value in record["extra"].items() if not key.startswith("_"))
+    if record["exception"] is not None:
+        exc_type, exc_value, _ = record["exception"]
+        entry["exception"] = _truncate(f"{exc_type.__name__ if exc_type else 'Exception'}: {exc_value}")
+    return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _format(record):
+    record["extra"]["_json"] = _json_line(record)
+    return "{extra[_json]}\n"
+
 
+class InterceptHandler(logging.Handler):
+    """Route stdlib `logging` records (libraries, uvicorn) into the same pipeline."""
 
-logger.remove()
+    def emit(self, record):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        frame, depth = logging.currentframe(), 2
+        while frame and frame.f_code.co_filename == logging.__file__:
+            frame, depth = frame.f_back, depth + 1
+        logger.bind(logger=record.name).opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
 
-logger.add(
-    LOG_FILE,
-    rotation="10 MB",  
-    retention="10 days",  
-    compression="zip",  
-    enqueue=True,  
-    backtrace=True,  
-    diagnose=False,  
-    level="INFO"
-)
+def configure_logging(log_dir=LOG_DIR):
+    """
+    (Re)install the single structured sink at `log_dir`/summary.log. The
+    directory and file are created on the first record, so importing the
+    package writes nothing. Returns the log file path.
+    """
+    global LOG_FILE
+    LOG_FILE = os.path.join(log_dir, "summary.log")
+    logger.remove()
+    # enqueue=True hands each formatted line to a background writer thread,
+    # so request paths never wait on file I/O.
+    logger.add(
+        LOG_FILE,
+        format=_format,
+        rotation="10 MB",
+        retention="10 days",
+        compression="zip",
+        enqueue=True,
+        delay=True,
+        backtrace=False,
+        diagnose=False,
+        level=LOG_LEVEL
+    )
+    return LOG_FILE
 
 
-logger.info("Logging system initialized successfully!")
+configure_logging()
+
+logging.basicConfig(handlers=[InterceptHandler()], level=logging.WARNING, force=True)
+
+
+def sampled_text(text, sample_rate=None):
+    """
+    Full `text` for a sample of calls (LOG_TEXT_SAMPLE_RATE), otherwise a short
+    preview with its length and hash so entries can still be correlated.
+    """
+    sample_rate = LOG_TEXT_SAMPLE_RATE if sample_rate is None else sample_rate
+    if len(text) <= LOG_TEXT_PREVIEW_CHARS or random.random() < sample_rate:
+        return text
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    return f"{text[:LOG_TEXT_PREVIEW_CHARS]}... [{len(text)} chars, sha256:{digest}]"
+
 
 def log_request(input_text, output_text, input_tokens, output_tokens, duration):
     """Log each API request for debugging and monitoring."""
-    logger.info(f"""
-    REQUEST LOG:
-    Input Tokens: {input_tokens}
-    Output Tokens: {output_tokens}
-    Duration: {duration:.2f} seconds
-    Input (Preview): {input_text[:300]}...
-    Output (Preview): {output_text[:300]}...
-    """)
+    logger.bind(
+        event="request",
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        duration=round(duration, 3),
+        input_preview=input_text[:LOG_TEXT_PREVIEW_CHARS],
+        output=sampled_text(output_text)
+    ).info("Request completed")
+
+
+async def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    logger.info("Shutting down... Closing log files.")
+    await logger.complete()
+    logger.remove()
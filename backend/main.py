@@ -1,20 +1,35 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
+import asyncio
+import json
+import os
 import traceback
 import time
-from loguru import logger
-from backend.summarizer import generate_summary
-from backend.evaluator import evaluate_summary_deepeval
-from backend.feedback import store_feedback
-from backend.utils import get_cached_summary, set_cached_summary
-from backend.logger import log_request
+from backend.summarizer import process_medical_notes, rescore_summary, stream_summary
+from backend.results import close_results, get_result
+from backend.streaming import format_sse
+from backend.evaluator import METRICS as EVALUATION_METRICS, evaluate_summary_deepeval
+from backend.feedback import get_feedback, start_feedback_writer, stop_feedback_writer, store_feedback
+from backend import logger as logging_setup
+from backend.logger import log_request, logger, shutdown_logging
+from backend.log_reader import follow_logs, tail_logs
 from backend.summarizer import SummarizationError
+from backend.llm_client import close_async_client
+from backend.cache import close_cache
+from backend.eval_queue import get_evaluation, start_evaluation_workers, stop_evaluation_workers
+from backend.config import EVALUATION_MODE, BATCH_MAX_ITEMS, SERVER_TIMING_ENABLED
+from backend.batch import summarize_items
+from backend.tracing import render_metrics, server_timing, span, start_trace
 
 
 app = FastAPI(title="Medical Text Summarization API")
 
+MIN_NOTES_LENGTH = 50
+NOTES_TOO_SHORT = f"Notes must be at least {MIN_NOTES_LENGTH} characters."
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # Allow frontend
@@ -24,12 +39,12 @@ app.add_middleware(
 )
 
 
-def cors_json_response(content, status_code=200):
+def cors_json_response(content, status_code=200, headers=None):
     """Return a JSON response with CORS headers."""
     return JSONResponse(
         content=content,
         status_code=status_code,
-        headers={"Access-Control-Allow-Origin": "http://localhost:3000"}
+        headers={"Access-Control-Allow-Origin": "http://localhost:3000", **(headers or {})}
     )
 
 @app.exception_handler(Exception)
@@ -63,6 +78,16 @@ async def preflight_handler(request: Request):
 class SummarizeRequest(BaseModel):
     notes: str
     role: str = "general"
+    incremental: Optional[bool] = None
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    notes: str
+    role: Optional[str] = None
+
+class BatchSummarizeRequest(BaseModel):
+    items: List[BatchItem]
+    role: str = "general"
 
 class FeedbackRequest(BaseModel):
     request_id: str
@@ -70,8 +95,11 @@ class FeedbackRequest(BaseModel):
     feedback: str
 
 class EvaluationRequest(BaseModel):
-    notes: str
-    generated_summary: str
+    notes: Optional[str] = None
+    generated_summary: Optional[str] = None
+    summaries: Optional[List[str]] = None
+    summary_id: Optional[str] = None
+    metrics: Optional[List[str]] = None
 
 # API Routes
 
@@ -85,69 +113,210 @@ async def summarize(request: SummarizeRequest):
     try:
         """Generate a clinical note summary with caching, evaluation, and logging."""
         start_time = time.time()
-        if len(request.notes) < 50:
-            return cors_json_response({"detail": "Notes must be at least 50 characters."}, status_code=400)
+        if len(request.notes) < MIN_NOTES_LENGTH:
+            return cors_json_response({"detail": NOTES_TOO_SHORT}, status_code=400)
 
-        cached = get_cached_summary(request.notes, request.role)
-        if cached:
-            return cors_json_response(cached)
-
-        # Generate Summary
-        result = await generate_summary(request.notes, request.role)
+        trace = start_trace()
+        with span("summarize"):
+            # Generate Summary (long notes are chunked and merged automatically)
+            result = await process_medical_notes(request.notes, request.role, incremental=request.incremental)
         end_time = time.time()
         result["response_time"] = round(end_time - start_time, 2)
         log_request(request.notes, result["summary"], result["input_tokens"], result["output_tokens"], result["duration"])
 
-        return cors_json_response(result)
+        headers = {"Server-Timing": server_timing(trace)} if SERVER_TIMING_ENABLED else None
+        return cors_json_response(result, headers=headers)
     except SummarizationError as e:
         
         logger.error(f"Summarization failed: {e}")
         return cors_json_response({"detail": str(e)}, status_code=500)
 
-@app.get("/feedback")
-def get_feedback():
-    """Retrieve recent feedback entries."""
-    feedback_path = "backend/logs/feedback.json"
+@app.post("/summarize/stream")
+async def summarize_stream(request: SummarizeRequest):
+    """Stream summary tokens, completed sections and critical highlights as Server-Sent Events."""
+    if len(request.notes) < MIN_NOTES_LENGTH:
+        return cors_json_response({"detail": NOTES_TOO_SHORT}, status_code=400)
+
+    async def events():
+        start_time = time.time()
+        try:
+            async for event, data in stream_summary(request.notes, request.role):
+                if event == "done":
+                    data["response_time"] = round(time.time() - start_time, 2)
+                    log_request(request.notes, data["summary"], data["input_tokens"], data["output_tokens"], data["duration"])
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Streaming summarization failed: {e}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Access-Control-Allow-Origin": "http://localhost:3000",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.post("/summarize/batch")
+async def summarize_batch(request: BatchSummarizeRequest):
+    """
+    Summarize many notes with bounded concurrency; results stream back as NDJSON
+    in completion order. Items with notes that are too short get a "failed"
+    record up front and are not summarized.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        return cors_json_response({"detail": f"At most {BATCH_MAX_ITEMS} items per batch."}, status_code=400)
+
+    items, rejected = [], []
+    for i, item in enumerate(request.items):
+        item = {"id": item.id or str(i), "notes": item.notes, "role": item.role or request.role}
+        if len(item["notes"]) < MIN_NOTES_LENGTH:
+            rejected.append({"id": item["id"], "role": item["role"], "status": "failed", "error": NOTES_TOO_SHORT})
+        else:
+            items.append(item)
+
+    async def results():
+        for record in rejected:
+            yield json.dumps(record) + "\n"
+        async for record in summarize_items(items):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Access-Control-Allow-Origin": "http://localhost:3000"}
+    )
+
+@app.get("/evaluations/{request_id}")
+async def get_evaluation_status(request_id: str):
+    """Poll the status and scores of a background evaluation."""
+    record = await get_evaluation(request_id)
+    if record is None:
+        return cors_json_response({"detail": "Unknown request_id."}, status_code=404)
+    return cors_json_response(record)
+
+@app.get("/summaries/{request_id}")
+async def get_summary(request_id: str):
+    """A stored summary with its notes, variants, metrics, timings and linked feedback."""
+    record = await get_result(request_id)
+    if record is None:
+        return cors_json_response({"detail": "Unknown request_id."}, status_code=404)
+    record["feedback"] = (await get_feedback(request_id=request_id))["feedback"]
+    return cors_json_response(record)
+
+@app.post("/summaries/{request_id}/evaluate")
+async def rescore_stored_summary(request_id: str):
+    """Re-score a stored summary's variants from the stored artifacts, without calling the summarization LLM."""
     try:
-        with open(feedback_path, "r") as feedback_file:
-            feedback_lines = feedback_file.readlines()[-50:]
-        feedback_entries = [json.loads(line) for line in feedback_lines]
-        return cors_json_response({"feedback": feedback_entries})
-    except Exception:
-        return cors_json_response({"detail": "No feedback available."}, status_code=500)
+        result = await rescore_summary(request_id)
+    except SummarizationError as e:
+        return cors_json_response({"detail": str(e)}, status_code=500)
+    if result is None:
+        return cors_json_response({"detail": "Unknown request_id."}, status_code=404)
+    return cors_json_response(result)
+
+@app.get("/feedback")
+async def list_feedback(
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[int] = None,
+    request_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    """Recent feedback, newest first. Pass `next_before` back as `before` for the next page."""
+    page = await get_feedback(limit=limit, before_id=before, request_id=request_id, since=since, until=until)
+    return cors_json_response(page)
 
 @app.post("/feedback")
-def submit_feedback(request: FeedbackRequest):
+async def submit_feedback(request: FeedbackRequest):
     """Submit clinician feedback for model improvement."""
-    response = store_feedback(request.request_id, request.summary, request.feedback)
+    response = await store_feedback(request.request_id, request.summary, request.feedback)
     return cors_json_response(response)
 
 @app.post("/evaluate")
-def evaluate_summary_endpoint(request: EvaluationRequest):
-    """Evaluate the generated summary for quality."""
-    evaluation = evaluate_summary_deepeval(request.notes, request.generated_summary)
+async def evaluate_summary_endpoint(request: EvaluationRequest):
+    """
+    Evaluate one or more summaries of the same notes, optionally on a subset of
+    metrics. With `summary_id`, the notes and variants come from the result store.
+    Scores are cached, so repeated pairs are answered without re-running metrics.
+    """
+    notes = request.notes
+    summaries = list(request.summaries or [])
+    if request.generated_summary:
+        summaries.insert(0, request.generated_summary)
+
+    if request.summary_id:
+        record = await get_result(request.summary_id)
+        if record is None:
+            return cors_json_response({"detail": "Unknown summary_id."}, status_code=404)
+        notes = notes or record["notes"]
+        if not summaries:
+            summaries = [v["summary"] for v in record["variants"] or []] or [record["result"]["summary"]]
+
+    if not notes or not summaries:
+        return cors_json_response({"detail": "Provide notes and at least one summary, or a summary_id."}, status_code=400)
+    unknown = sorted(set(request.metrics or []) - set(EVALUATION_METRICS))
+    if unknown:
+        return cors_json_response(
+            {"detail": f"Unknown metrics: {', '.join(unknown)}. Available: {', '.join(EVALUATION_METRICS)}"},
+            status_code=400
+        )
+
+    evaluation = await evaluate_summary_deepeval(notes, [{"summary": s} for s in summaries], request.metrics)
     return cors_json_response({"evaluation": evaluation})
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: stage latency and token histograms, cache hit ratio (per worker process)."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/logs")
-def get_logs():
-    """Return the last 50 log lines for debugging."""
-    log_path = "backend/logs/summary.log"
+async def get_logs(
+    lines: int = Query(50, ge=1, le=5000),
+    level: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+):
+    """Return the last log records (newest last), optionally filtered by minimum level and time range."""
     try:
-        with open(log_path, "r") as log_file:
-            log_lines = log_file.readlines()[-50:]
-        return cors_json_response({"logs": "".join(log_lines)})
-    except Exception:
-        return cors_json_response({"detail": "No logs available."}, status_code=500)
-
-def close_logs():
-    logger.info("Shutting down... Closing log files.")
-    time.sleep(1)  
-    for handler in logger._core.handlers:
-        try:
-            handler._sink._file.close()
-        except Exception:
-            pass
+        records = await asyncio.to_thread(tail_logs, logging_setup.LOG_FILE, lines, level, since, until)
+    except ValueError as e:
+        return cors_json_response({"detail": f"Invalid filter: {e}"}, status_code=400)
+    if not records and not os.path.exists(logging_setup.LOG_FILE):
+        return cors_json_response({"detail": "No logs available."}, status_code=404)
+    return cors_json_response({"logs": "\n".join(records) + "\n" if records else "", "count": len(records)})
+
+@app.get("/logs/stream")
+async def stream_logs(level: Optional[str] = None):
+    """Live tail of the log as Server-Sent Events."""
+    async def events():
+        async for record in follow_logs(logging_setup.LOG_FILE, level):
+            yield format_sse("log", {"line": record})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Access-Control-Allow-Origin": "http://localhost:3000",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Logging system initialized successfully!")
+    start_feedback_writer()
+    if EVALUATION_MODE == "background":
+        start_evaluation_workers()
 
 @app.on_event("shutdown")
-def shutdown_event():
-    close_logs()
+async def shutdown_event():
+    await stop_evaluation_workers(drain_timeout=10)
+    await stop_feedback_writer()
+    await close_async_client()
+    await close_cache()
+    close_results()
+    await shutdown_logging()
@@ -0,0 +1,35 @@
+from loguru import logger
+from backend.config import NLP_BATCH_SIZE, NLP_EXCLUDE_PIPES, NLP_N_PROCESS, SPACY_MODEL
+from backend.tracing import traced
+
+# Loaded on first use rather than at import, with only the components NER needs.
+_nlp = None
+
+
+def get_nlp():
+    """Return the shared spaCy pipeline, loading it on first use."""
+    global _nlp
+    if _nlp is None:
+        import spacy
+
+        _nlp = spacy.load(SPACY_MODEL, exclude=NLP_EXCLUDE_PIPES)
+        logger.info(f"Loaded spaCy model {SPACY_MODEL} with pipes {_nlp.pipe_names}")
+    return _nlp
+
+
+@traced("spacy.entities")
+def entity_densities(texts, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS):
+    """
+    Named entities per token for each text, processed as one `nlp.pipe` batch.
+    Tokens come from spaCy's own tokenizer (whitespace tokens excluded).
+
+    Args:
+        texts (list[str]): Summaries to score.
+        batch_size (int): Texts per spaCy batch.
+        n_process (int): Worker processes for large offline runs; 1 in request paths.
+    """
+    densities = []
+    for doc in get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process):
+        num_tokens = sum(1 for token in doc if not token.is_space)
+        densities.append(len(doc.ents) / max(num_tokens, 1))
+    return densities
@@ -0,0 +1,36 @@
+"""
+Load heavy dependencies and models once, before workers fork, so every worker
+shares them copy-on-write instead of importing and loading its own copy.
+Used by gunicorn's preload mode (see gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py main:app
+"""
+import gc
+import time
+from loguru import logger
+from backend.config import EMBEDDING_BACKEND
+from backend.embeddings import _get_local_model
+from backend.evaluator import _evaluation_model
+from backend.nlp import get_nlp
+from backend.tokens import get_encoding
+
+
+def preload_models():
+    """Import DeepEval and load the tokenizer, spaCy and (if local) embedding models; skip what is unavailable."""
+    loaders = {"deepeval": _evaluation_model, "tokenizer": get_encoding, "spacy": get_nlp}
+    if EMBEDDING_BACKEND == "local":
+        loaders["embeddings"] = _get_local_model
+
+    for name, load in loaders.items():
+        start = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            logger.warning(f"Preload of {name} skipped: {e}")
+            continue
+        logger.info(f"Preloaded {name} in {time.perf_counter() - start:.2f}s")
+
+    # Move everything loaded so far out of the collector's generations: collections
+    # in the workers then never write to (and so never copy) these shared pages.
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,130 @@
+import hashlib
+import re
+
+# Prompt templates are static text compiled once at import. The system message
+# is identical for every request and role so providers can cache the prefix;
+# only the short role instruction and the notes vary, and they come last.
+
+ROLE_PROMPTS = {
+    "general": "Provide a comprehensive summary.",
+    "cardiologist": "Focus on cardiac conditions and ECG interpretations.",
+    "oncologist": "Highlight cancer-related findings and treatment plans.",
+    "nurse": "Provide a simplified summary focusing on patient care needs."
+}
+
+
+def normalize_whitespace(text):
+    """Strip trailing/indenting whitespace, collapse inner runs of spaces and extra blank lines."""
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+SUMMARY_SYSTEM_PROMPT = normalize_whitespace("""
+    You are a highly-skilled **clinical documentation assistant** specialized in **medical note summarization**. Extract all **medically relevant information** and create a **structured, factual, accurate summary** of the patient's medical history, findings, and treatment course.
+
+    Rules:
+    - Start with a 2-3 sentence high-level summary mentioning why the patient was admitted, primary condition, major interventions, and final outcome.
+    - Preserve important medical details exactly.
+    - Explicitly state if data is missing: ("No information available").
+    - Do NOT add any new information or assumptions.
+    - Maintain original dates, conditions, clinical sequences.
+    - Include patient details: name, gender, age.
+    - Maintain chronological order (admission -> diagnosis -> hospital course -> discharge).
+
+    Summary Structure:
+
+    1. Case Overview
+    - Patient Name:
+    - Age & Gender:
+    - Admission Date:
+    - Discharge Date:
+    - Primary Reason for Admission:
+    - Primary Discharge Diagnoses:
+    - Outcome:
+
+    2. Medical History
+    - Past Diagnoses:
+    - Allergies:
+    - Comorbidities:
+    - Medications on Admission:
+    - Surgical History:
+
+    3. Hospital Course
+    - Initial Presentation & Key Symptoms:
+    - Vital Signs & Emergency Measures:
+    - Major Diagnostic Findings (highlight critical issues):
+    - Current Diagnoses:
+    - Treatment Plan:
+    - Procedures Performed:
+    - Medical Management:
+    - Complications:
+    - Response to Treatment:
+    - Important Dates:
+    - Attending Physician and Hospital Info:
+
+    4. Discharge Plan
+    - Medications on Discharge:
+    - Follow-up Recommendations:
+    - Final Outcome:
+""")
+
+# Per-role user-message prefixes, compiled once; the notes are appended verbatim.
+SUMMARY_USER_PREFIXES = {
+    role: f"Role focus: {instruction}\n\nClinical Notes to Summarize:\n"
+    for role, instruction in ROLE_PROMPTS.items()
+}
+
+CHUNK_SYSTEM_PROMPT = normalize_whitespace("""
+    You summarize one part of a longer clinical record.
+    Extract every medically relevant fact from this part as concise bullet points.
+    Preserve dates, values, doses, diagnoses and procedures exactly. Do NOT add information or assumptions.
+""")
+
+MERGE_SYSTEM_PROMPT = normalize_whitespace("""
+    Combine partial summaries of consecutive parts of one clinical record into a single set of concise bullet points.
+    Keep chronological order, remove duplicates, and preserve dates, values, doses, diagnoses and procedures exactly. Do NOT add information.
+""")
+
+UPDATE_SYSTEM_PROMPT = normalize_whitespace("""
+    You update an existing structured clinical summary with facts from newer notes of the same record.
+    Return the complete updated summary in exactly the same structure. Add new events to the hospital course in chronological order, revise fields the new facts change (current diagnoses, outcome, discharge plan), and keep every other detail.
+    Preserve dates, values, doses, diagnoses and procedures exactly. Do NOT add information or assumptions.
+""")
+
+# Changes whenever any template changes, so cached summaries from older prompts are never served.
+PROMPT_VERSION = hashlib.sha256("\x1f".join(
+    [SUMMARY_SYSTEM_PROMPT, CHUNK_SYSTEM_PROMPT, MERGE_SYSTEM_PROMPT, UPDATE_SYSTEM_PROMPT]
+    + [f"{role}={prefix}" for role, prefix in sorted(SUMMARY_USER_PREFIXES.items())]
+).encode("utf-8")).hexdigest()[:12]
+
+
+def build_summary_messages(notes, role="general"):
+    """Chat messages for the structured clinical summary of `notes`."""
+    prefix = SUMMARY_USER_PREFIXES.get(role.lower(), SUMMARY_USER_PREFIXES["general"])
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": prefix + normalize_whitespace(notes)}
+    ]
+
+
+def build_chunk_messages(chunk, index, total):
+    return [
+        {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Clinical Notes (part {index} of {total}):\n{normalize_whitespace(chunk)}"}
+    ]
+
+
+def build_merge_messages(summaries):
+    return [
+        {"role": "system", "content": MERGE_SYSTEM_PROMPT},
+        {"role": "user", "content": "Partial Summaries:\n" + "\n\n".join(summaries)}
+    ]
+
+
+def build_update_messages(summary, updates, role="general"):
+    """Chat messages that fold partial summaries of newer notes into an existing `summary`."""
+    instruction = ROLE_PROMPTS.get(role.lower(), ROLE_PROMPTS["general"])
+    return [
+        {"role": "system", "content": UPDATE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Role focus: {instruction}\n\nCurrent Summary:\n{summary}\n\nNew Notes (summarized):\n" + "\n\n".join(updates)}
+    ]
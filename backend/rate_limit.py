@@ -0,0 +1,223 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from loguru import logger
+from redis.exceptions import RedisError
+from backend.cache import _mark_redis_down, get_redis
+from backend.tracing import span
+from backend.config import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate_per_minute` units refill continuously up to
+    `capacity` (one minute's worth by default). Waiters are served in FIFO order.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount=1):
+        """Wait until `amount` units are available and consume them."""
+        # A request larger than the bucket could never be satisfied; cap it.
+        amount = min(amount, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+# Cluster-wide LLM limits: one requests-per-minute and one tokens-per-minute
+# bucket shared by every worker through Redis (per process while Redis is
+# down). Callers queue in priority lanes: waiters in a lane wait while any
+# higher lane has waiters in this process, and lower lanes may only draw a
+# bucket down to a reserved share of its capacity, which leaves headroom for
+# interactive traffic on other workers too.
+
+LANES = ("interactive", "evaluation", "batch")
+LANE_RESERVES = {"interactive": 0.0, "evaluation": 0.1, "batch": 0.3}
+POLL_INTERVAL = 0.05
+MAX_SLEEP = 1.0
+DEFAULT_RETRY_AFTER = 2.0
+
+current_lane = ContextVar("llm_lane", default="interactive")
+
+# Refill both buckets for the elapsed time, then take `requests` and `tokens`
+# if both stay above the lane's reserve. Returns the seconds to wait (0 when
+# granted) as a string, since Redis truncates Lua numbers to integers.
+ACQUIRE_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local want, reserve, calls = tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5])
+local state = redis.call("HMGET", KEYS[1], "requests", "tokens", "updated", "paused_until")
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local updated = tonumber(state[3]) or now
+local paused_until = tonumber(state[4]) or 0
+if paused_until > now then
+    return tostring(paused_until - now)
+end
+local elapsed = math.max(0, now - updated)
+requests = math.min(rpm, requests + elapsed * rpm / 60)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60)
+local wait = 0
+if rpm > 0 and requests - calls < rpm * reserve then
+    wait = math.max(wait, (rpm * reserve + calls - requests) * 60 / rpm)
+end
+if tpm > 0 and tokens - want < tpm * reserve then
+    wait = math.max(wait, (tpm * reserve + want - tokens) * 60 / tpm)
+end
+if wait == 0 then
+    requests = requests - calls
+    tokens = tokens - want
+end
+redis.call("HSET", KEYS[1], "requests", requests, "tokens", tokens, "updated", now)
+redis.call("EXPIRE", KEYS[1], 120)
+return tostring(wait)
+"""
+
+PAUSE_SCRIPT = """
+local t = redis.call("TIME")
+local until_ts = tonumber(t[1]) + tonumber(t[2]) / 1000000 + tonumber(ARGV[1])
+local current = tonumber(redis.call("HGET", KEYS[1], "paused_until")) or 0
+if until_ts > current then
+    redis.call("HSET", KEYS[1], "paused_until", until_ts)
+    redis.call("EXPIRE", KEYS[1], 120)
+end
+return 1
+"""
+
+
+class LocalBuckets:
+    """In-process equivalent of ACQUIRE_SCRIPT, used while Redis is unavailable."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.requests = requests_per_minute
+        self.tokens = tokens_per_minute
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def try_acquire(self, tokens, requests, reserve):
+        now = time.monotonic()
+        if self.paused_until > now:
+            return self.paused_until - now
+        elapsed = now - self.updated_at
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+        self.updated_at = now
+        wait = 0.0
+        if self.rpm and self.requests - requests < self.rpm * reserve:
+            wait = max(wait, (self.rpm * reserve + requests - self.requests) * 60 / self.rpm)
+        if self.tpm and self.tokens - tokens < self.tpm * reserve:
+            wait = max(wait, (self.tpm * reserve + tokens - self.tokens) * 60 / self.tpm)
+        if wait == 0:
+            self.requests -= requests
+            self.tokens -= tokens
+        return wait
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class ClusterRateLimiter:
+    """Shared requests- and tokens-per-minute limits with priority lanes (0 disables a limit)."""
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute):
+        self.key = f"ratelimit:{name}"
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.local = LocalBuckets(requests_per_minute, tokens_per_minute)
+        self._waiting = dict.fromkeys(LANES, 0)
+
+    async def _try_acquire(self, tokens, requests, reserve):
+        client = get_redis()
+        if client is not None:
+            try:
+                return float(await client.eval(ACQUIRE_SCRIPT, 1, self.key, self.rpm, self.tpm, tokens, reserve, requests))
+            except (RedisError, OSError) as e:
+                _mark_redis_down(e)
+        return self.local.try_acquire(tokens, requests, reserve)
+
+    async def acquire(self, tokens=0, requests=1, lane=None):
+        """
+        Wait until `requests` calls and `tokens` tokens may be spent in `lane`
+        (default: the caller's current_lane). Returns the seconds waited.
+        """
+        if not self.rpm and not self.tpm:
+            return 0.0
+        lane = lane or current_lane.get()
+        reserve = LANE_RESERVES[lane]
+        # Amounts larger than the lane's share of a bucket could never be granted; cap them.
+        if self.tpm:
+            tokens = min(tokens, self.tpm * (1 - reserve))
+        if self.rpm:
+            requests = min(requests, self.rpm * (1 - reserve))
+        higher = LANES[:LANES.index(lane)]
+        start = time.monotonic()
+        self._waiting[lane] += 1
+        try:
+            with span("llm.rate_limit"):
+                while True:
+                    if any(self._waiting[other] for other in higher):
+                        await asyncio.sleep(POLL_INTERVAL)
+                        continue
+                    wait = await self._try_acquire(tokens, requests, reserve)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(min(max(wait, POLL_INTERVAL), MAX_SLEEP))
+        finally:
+            self._waiting[lane] -= 1
+        waited = time.monotonic() - start
+        if waited > MAX_SLEEP:
+            logger.info(f"Rate limiter {self.key}: {lane} lane waited {waited:.1f}s for {requests} requests, {tokens} tokens")
+        return waited
+
+    async def pause(self, seconds):
+        """Hold every lane on every worker for `seconds` (e.g. the provider's Retry-After)."""
+        self.local.pause(seconds)
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await client.eval(PAUSE_SCRIPT, 1, self.key, seconds)
+        except (RedisError, OSError) as e:
+            _mark_redis_down(e)
+
+
+def retry_after_seconds(error, default=DEFAULT_RETRY_AFTER):
+    """Delay requested by a 429 response (Retry-After / retry-after-ms headers), else `default`."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            value = headers["retry-after"]
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        pass
+    return default
+
+
+llm_limiter = ClusterRateLimiter("llm", LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from backend.config import RESULTS_DB_PATH, RESULTS_STORE_NOTES, RESULTS_TTL_DAYS
+from backend.logger import logger
+
+# Persistent record of every computed summary, keyed on its request id, so a
+# summary can be re-opened, linked to feedback and re-scored without calling
+# the LLM again. Cache hits return the stored request id rather than a new one.
+# Records are kept for RESULTS_TTL_DAYS; with RESULTS_STORE_NOTES off the notes
+# column is left empty and only their hash identifies them.
+
+RESULTS_DB = RESULTS_DB_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    notes_hash TEXT NOT NULL,
+    role TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    notes TEXT NOT NULL,
+    result TEXT NOT NULL,
+    variants TEXT,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_notes_hash ON summaries (notes_hash);
+CREATE INDEX IF NOT EXISTS idx_summaries_created_at ON summaries (created_at);
+"""
+
+UPSERT_SQL = """
+INSERT INTO summaries (id, created_at, updated_at, notes_hash, role, model, prompt_version, notes, result, variants, timings)
+VALUES (:id, :now, :now, :notes_hash, :role, :model, :prompt_version, :notes, :result, :variants, :timings)
+ON CONFLICT (id) DO UPDATE SET
+    updated_at = excluded.updated_at,
+    result = excluded.result,
+    variants = COALESCE(excluded.variants, summaries.variants),
+    timings = COALESCE(excluded.timings, summaries.timings)
+"""
+
+JSON_COLUMNS = ("result", "variants", "timings")
+
+PRUNE_INTERVAL = 3600.0
+
+# One connection shared by the worker threads; the lock keeps statements from interleaving.
+_conn = None
+_lock = threading.Lock()
+_next_prune = 0.0
+
+
+def notes_hash(notes):
+    return hashlib.sha256(notes.encode("utf-8")).hexdigest()
+
+
+def connect(db_path=None):
+    db_path = db_path or RESULTS_DB
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _connection():
+    global _conn
+    if _conn is None:
+        _conn = connect()
+    return _conn
+
+
+def prune_results(conn, ttl_days=None):
+    """Delete records created more than `ttl_days` (default RESULTS_TTL_DAYS) ago; 0 keeps everything."""
+    ttl_days = RESULTS_TTL_DAYS if ttl_days is None else ttl_days
+    if ttl_days <= 0:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=ttl_days)).isoformat()
+    deleted = conn.execute("DELETE FROM summaries WHERE created_at < ?", (cutoff,)).rowcount
+    if deleted:
+        logger.info(f"Pruned {deleted} stored summaries older than {ttl_days:g} days.")
+    return deleted
+
+
+def _prune_if_due(conn):
+    global _next_prune
+    now = time.monotonic()
+    if now >= _next_prune:
+        _next_prune = now + PRUNE_INTERVAL
+        prune_results(conn)
+
+
+def write_result(request_id, notes, role, model, prompt_version, result, variants=None, timings=None):
+    """Insert the record for `request_id`, or update its result (e.g. once evaluation completes)."""
+    with _lock, _connection() as conn:
+        _prune_if_due(conn)
+        conn.execute(UPSERT_SQL, {
+            "id": request_id,
+            "now": datetime.now().isoformat(),
+            "notes_hash": notes_hash(notes),
+            "role": role.lower(),
+            "model": model,
+            "prompt_version": prompt_version,
+            "notes": notes if RESULTS_STORE_NOTES else "",
+            "result": json.dumps(result),
+            "variants": json.dumps(variants) if variants is not None else None,
+            "timings": json.dumps(timings) if timings is not None else None,
+        })
+
+
+def read_result(request_id):
+    with _lock:
+        row = _connection().execute("SELECT * FROM summaries WHERE id = ?", (request_id,)).fetchone()
+    if row is None:
+        return None
+    record = dict(row)
+    record["notes"] = record["notes"] or None
+    for column in JSON_COLUMNS:
+        record[column] = json.loads(record[column]) if record[column] else None
+    return record
+
+
+async def save_result(request_id, notes, role, model, prompt_version, result, variants=None, timings=None):
+    await asyncio.to_thread(write_result, request_id, notes, role, model, prompt_version, result, variants, timings)
+
+
+async def get_result(request_id):
+    """
+    The stored record for `request_id` (notes, result, variants, timings...), or
+    None. Its "notes" are None when RESULTS_STORE_NOTES was off when it was saved.
+    """
+    return await asyncio.to_thread(read_result, request_id)
+
+
+def close_results():
+    global _conn, _next_prune
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+        _conn = None
+        _next_prune = 0.0
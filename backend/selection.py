@@ -0,0 +1,115 @@
+import json
+import re
+from backend.config import SELECTION_POLICIES
+from backend.nlp import entity_densities
+from backend.streaming import SECTION_HEADING_RE, SECTION_TITLES
+
+# Adaptive selection: generate `initial_variants` first and accept one if it
+# passes the cheap local checks below; otherwise escalate to `max_variants` and
+# the full DeepEval suite. Thresholds can be overridden per role with the
+# SELECTION_POLICIES env var, e.g. '{"oncologist": {"max_missing_ratio": 0.2}}'.
+DEFAULT_POLICY = {
+    "initial_variants": 1,
+    "max_variants": 2,
+    "min_entity_density": 0.04,
+    "max_missing_ratio": 0.4,
+    "required_sections": SECTION_TITLES,
+}
+
+ROLE_POLICIES = {
+    "general": {},
+    "cardiologist": {},
+    "oncologist": {},
+    "nurse": {"min_entity_density": 0.03},
+}
+
+
+
+def parse_selection_policies(raw):
+    """
+    Parse and validate the SELECTION_POLICIES JSON: an object mapping roles to
+    overrides of DEFAULT_POLICY settings. Raises ValueError naming the bad key.
+    """
+    if not raw:
+        return {}
+    try:
+        policies = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"SELECTION_POLICIES is not valid JSON: {e}") from e
+    if not isinstance(policies, dict):
+        raise ValueError("SELECTION_POLICIES must be a JSON object mapping roles to settings.")
+
+    overrides = {}
+    for role, settings in policies.items():
+        if not isinstance(settings, dict):
+            raise ValueError(f"SELECTION_POLICIES[{role!r}] must be an object of settings.")
+        for key, value in settings.items():
+            if key not in DEFAULT_POLICY:
+                raise ValueError(f"SELECTION_POLICIES[{role!r}] has unknown setting {key!r}; expected one of {', '.join(DEFAULT_POLICY)}.")
+            if key == "required_sections":
+                valid = isinstance(value, list) and all(isinstance(v, str) for v in value)
+            elif key in ("initial_variants", "max_variants"):
+                valid = isinstance(value, int) and not isinstance(value, bool) and value >= 1
+            else:
+                valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if not valid:
+                raise ValueError(f"SELECTION_POLICIES[{role!r}][{key!r}] has an invalid value: {value!r}.")
+        overrides[role.lower()] = settings
+    return overrides
+
+
+# Parsed at import so a bad SELECTION_POLICIES fails at startup, not on the first request.
+POLICY_OVERRIDES = parse_selection_policies(SELECTION_POLICIES)
+
+FIELD_LINE_RE = re.compile(r"^\s*[-*•]\s*[^:\n]{2,80}:\s*(.*)$")
+MISSING_VALUE_RE = re.compile(r"no information available|not (?:available|documented|mentioned|provided)", re.IGNORECASE)
+
+
+def get_selection_policy(role="general"):
+    role = role.lower()
+    return {**DEFAULT_POLICY, **ROLE_POLICIES.get(role, {}), **POLICY_OVERRIDES.get(role, {})}
+
+
+def missing_info_ratio(summary):
+    """Share of "- Field: value" lines whose value is empty or "No information available"."""
+    values = [m.group(1).strip() for m in map(FIELD_LINE_RE.match, summary.splitlines()) if m]
+    if not values:
+        return 1.0
+    return sum(1 for v in values if not v or MISSING_VALUE_RE.search(v)) / len(values)
+
+
+def present_sections(summary):
+    return {m.group(2).title() for m in map(SECTION_HEADING_RE.match, summary.splitlines()) if m}
+
+
+def run_cheap_checks(summaries, policy):
+    """
+    Local, LLM-free quality checks for each summary.
+
+    Returns:
+        list[dict]: Per summary: the measured values, failure reasons, `passed`,
+        and a `score` used to rank passing variants.
+    """
+    densities = entity_densities(summaries)
+    checks = []
+    for summary, density in zip(summaries, densities):
+        missing_sections = [s for s in policy["required_sections"] if s not in present_sections(summary)]
+        ratio = missing_info_ratio(summary)
+
+        reasons = []
+        if missing_sections:
+            reasons.append(f"missing sections: {', '.join(missing_sections)}")
+        if density < policy["min_entity_density"]:
+            reasons.append(f"entity density {density:.3f} < {policy['min_entity_density']}")
+        if ratio > policy["max_missing_ratio"]:
+            reasons.append(f"missing-info ratio {ratio:.2f} > {policy['max_missing_ratio']}")
+
+        checks.append({
+            "entity_density": density,
+            "missing_info_ratio": ratio,
+            "missing_sections": missing_sections,
+            "passed": not reasons,
+            "reasons": reasons,
+            "score": density * (1 - ratio),
+        })
+    return checks
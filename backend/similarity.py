@@ -0,0 +1,151 @@
+"""
+Near-duplicate summary lookup. Every cached summary's source notes get a
+MinHash fingerprint over their normalized lines, so whitespace changes and
+reordered lines do not change it and an added line changes it only a little.
+Fingerprints are kept in an in-process LSH index per (role, model, prompt
+version) and persisted to a Redis sorted set; each worker periodically pulls
+the entries added since its last refresh, so a summary made by one worker is
+found by all of them.
+"""
+import re
+import time
+from collections import OrderedDict
+import numpy as np
+from backend.cache import add_index_entry, get_cached, load_index_entries, make_cache_key, remove_index_entry, summary_cache_key
+from backend.preprocess import LSH_BANDS, NUM_PERMUTATIONS, minhash, shingles
+from backend.prompts import PROMPT_VERSION
+from backend.tracing import record_cache_lookup, span
+from backend.config import CACHE_TTL, LLM_MODEL, SIMILARITY_INDEX_MAX_ENTRIES, SIMILARITY_REFRESH_INTERVAL, SIMILARITY_THRESHOLD
+
+
+def normalized_lines(notes):
+    return [re.sub(r"\s+", " ", line).strip().lower() for line in notes.splitlines() if line.strip()]
+
+
+def fingerprint(notes):
+    """MinHash signature of the union of per-line shingles (independent of line order)."""
+    return minhash(set().union(*(shingles(line) for line in normalized_lines(notes))) or {""})
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity: the share of equal signature slots."""
+    return float(np.mean(a == b))
+
+
+def added_lines(source_notes, notes):
+    """Lines of `notes` whose normalized text does not occur in `source_notes`, in order."""
+    known = set(normalized_lines(source_notes))
+    return [line.strip() for line, norm in zip(
+        (l for l in notes.splitlines() if l.strip()), normalized_lines(notes)
+    ) if norm not in known]
+
+
+def removed_lines(source_notes, notes):
+    """Lines of `source_notes` missing from `notes` (removed, or changed in place)."""
+    return added_lines(notes, source_notes)
+
+
+class SimilarityIndex:
+    """Bounded LSH index from summary cache keys to note fingerprints (oldest entries evicted first)."""
+
+    def __init__(self, max_entries=SIMILARITY_INDEX_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.refreshed_at = 0.0
+
+    def _bands(self, signature):
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+    def add(self, key, signature):
+        self.remove(key)
+        self.entries[key] = signature
+        for band in self._bands(signature):
+            self.buckets.setdefault(band, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        signature = self.entries.pop(key, None)
+        if signature is None:
+            return
+        for band in self._bands(signature):
+            bucket = self.buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band]
+
+    def query(self, signature, threshold=SIMILARITY_THRESHOLD):
+        """(similarity, key) pairs at or above `threshold`, most similar first."""
+        candidates = set().union(*(self.buckets.get(band, ()) for band in self._bands(signature)))
+        scored = ((similarity(signature, self.entries[key]), key) for key in candidates)
+        return sorted((pair for pair in scored if pair[0] >= threshold), reverse=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+REFRESH_OVERLAP = 5.0
+
+_indexes = {}
+
+
+def index_key(role):
+    return make_cache_key("similarity-index", role.lower(), LLM_MODEL, PROMPT_VERSION)
+
+
+def index_member(summary_key, signature):
+    return f"{summary_key} {signature.tobytes().hex()}"
+
+
+def parse_member(member):
+    summary_key, signature = member.rsplit(" ", 1)
+    return summary_key, np.frombuffer(bytes.fromhex(signature), dtype=np.uint64)
+
+
+async def get_index(role):
+    """The index for `role`, merged with entries other workers persisted since the last refresh."""
+    key = index_key(role)
+    index = _indexes.setdefault(key, SimilarityIndex())
+    now = time.time()
+    if now - index.refreshed_at >= SIMILARITY_REFRESH_INTERVAL:
+        # Overlap the previous window a little so entries written during the last pull are not missed.
+        since = index.refreshed_at - REFRESH_OVERLAP if index.refreshed_at else 0.0
+        index.refreshed_at = now
+        for member in await load_index_entries(key, since):
+            summary_key, signature = parse_member(member)
+            if summary_key not in index.entries:
+                index.add(summary_key, signature)
+    return index
+
+
+async def index_summary(notes, role):
+    """Make the cached summary of `notes` findable by near-duplicate lookups."""
+    signature = fingerprint(notes)
+    summary_key = summary_cache_key(notes, role, LLM_MODEL, PROMPT_VERSION)
+    (await get_index(role)).add(summary_key, signature)
+    await add_index_entry(index_key(role), index_member(summary_key, signature), ttl=CACHE_TTL)
+
+
+async def find_similar_summary(notes, role, threshold=SIMILARITY_THRESHOLD):
+    """
+    The cached summary whose source notes are most similar to `notes`.
+
+    Returns:
+        tuple: (similarity, cached summary dict), or None if nothing is similar enough.
+    """
+    with span("cache.similar"):
+        index = await get_index(role)
+        for score, summary_key in index.query(fingerprint(notes), threshold):
+            cached = await get_cached(summary_key)
+            if cached:
+                record_cache_lookup("similar", True)
+                return score, dict(cached)
+            # The summary expired; forget its fingerprint everywhere.
+            member = index_member(summary_key, index.entries[summary_key])
+            index.remove(summary_key)
+            await remove_index_entry(index_key(role), member)
+    record_cache_lookup("similar", False)
+    return None
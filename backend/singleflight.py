@@ -0,0 +1,78 @@
+import asyncio
+import time
+import uuid
+from loguru import logger
+from backend.cache import acquire_lock, get_cached, lock_exists, release_lock
+from backend.config import SINGLE_FLIGHT_LEASE, SINGLE_FLIGHT_POLL_INTERVAL
+
+# Computations currently running in this process, keyed on the cache key.
+_inflight = {}
+
+
+async def single_flight(key, compute, lease=SINGLE_FLIGHT_LEASE, poll_interval=SINGLE_FLIGHT_POLL_INTERVAL):
+    """
+    Coalesce concurrent identical requests into one computation.
+
+    Callers in the same process await the same task. Across workers, a Redis
+    lease on `lock:<key>` elects one leader; the others poll the shared cache
+    for the leader's result until the lease is released or expires, then fall
+    back to computing it themselves. `compute` must store its result under `key`.
+
+    Args:
+        key (str): Cache key of the result being computed.
+        compute (callable): Zero-argument coroutine function producing the result.
+        lease (int): Seconds a worker may hold the lease before others take over.
+        poll_interval (float): Seconds between cache polls while waiting on a peer.
+
+    Returns:
+        The computed (or peer-computed) result.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run(key, compute, lease, poll_interval))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        logger.info(f"Single-flight: joining in-flight computation for {key}")
+
+    # Shield so a disconnecting client does not cancel work other callers await.
+    return await asyncio.shield(task)
+
+
+async def _run(key, compute, lease, poll_interval):
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + lease
+
+    while True:
+        if await acquire_lock(lock_key, token, lease):
+            try:
+                # A peer may have stored the result and released its lease
+                # between our cache miss and taking the lease.
+                result = await get_cached(key)
+                if result is not None:
+                    logger.info(f"Single-flight: {key} was computed by another worker")
+                    return result
+                return await compute()
+            finally:
+                await release_lock(lock_key, token)
+
+        logger.info(f"Single-flight: waiting on another worker for {key}")
+        result = await _wait_for_peer(key, lock_key, deadline, poll_interval)
+        if result is not None:
+            return result
+        if time.monotonic() >= deadline:
+            logger.warning(f"Single-flight: lease wait timed out for {key}; computing locally.")
+            return await compute()
+        # The peer released its lease without storing a result; try to lead.
+
+
+async def _wait_for_peer(key, lock_key, deadline, poll_interval):
+    while time.monotonic() < deadline:
+        await asyncio.sleep(poll_interval)
+        result = await get_cached(key)
+        if result is not None:
+            return result
+        if not await lock_exists(lock_key):
+            return await get_cached(key)
+    return None
@@ -0,0 +1,70 @@
+import json
+import re
+
+SECTION_TITLES = ["Case Overview", "Medical History", "Hospital Course", "Discharge Plan"]
+
+# Matches the numbered section headings requested by the summary prompt, with or
+# without markdown decoration: "2. Medical History", "### **3. Hospital Course**".
+SECTION_HEADING_RE = re.compile(
+    r"^\s*(?:#+\s*)?\**\s*([1-4])\.\s*\**\s*(" + "|".join(SECTION_TITLES) + r")\b",
+    re.IGNORECASE
+)
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SummaryStreamParser:
+    """
+    Incrementally parses streamed summary text into completed lines, emitting
+    a "section" event whenever a numbered section is closed and a "highlight"
+    event for every completed line mentioning a critical finding.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.section = None
+        self.section_lines = []
+        self.highlights = []
+
+    def feed(self, text):
+        """Consume a token delta and return the events it completes."""
+        self.buffer += text
+        events = []
+        while "\n" in self.buffer:
+            line, self.buffer = self.buffer.split("\n", 1)
+            events.extend(self._process_line(line))
+        return events
+
+    def close(self):
+        """Flush the trailing partial line and the last open section."""
+        events = []
+        if self.buffer:
+            events.extend(self._process_line(self.buffer))
+            self.buffer = ""
+        events.extend(self._close_section())
+        return events
+
+    def _process_line(self, line):
+        events = []
+        heading = SECTION_HEADING_RE.match(line)
+        if heading:
+            events.extend(self._close_section())
+            self.section = {"index": int(heading.group(1)), "title": heading.group(2).title()}
+            return events
+
+        if self.section is not None:
+            self.section_lines.append(line)
+        if "critical" in line.lower():
+            self.highlights.append(line)
+            events.append(("highlight", {"line": line}))
+        return events
+
+    def _close_section(self):
+        if self.section is None:
+            return []
+        event = ("section", {**self.section, "content": "\n".join(self.section_lines).strip()})
+        self.section, self.section_lines = None, []
+        return [event]
@@ -1,87 +1,378 @@
 import openai
 import time
-import logging
 import json
-from backend.utils import count_tokens
-from backend.config import LLM_API_KEY, LLM_MODEL, CACHE_TTL
+import asyncio
+import uuid
+from backend.tokens import ContextWindowExceeded, count_message_tokens, count_tokens, plan_token_budget
+from backend.prompts import PROMPT_VERSION, build_chunk_messages, build_merge_messages, build_summary_messages, build_update_messages, normalize_whitespace
+from backend.chunking import smart_chunk_text, split_segments
+from backend.preprocess import prepare_notes, record_preprocessing
+from backend.similarity import added_lines, find_similar_summary, index_summary, removed_lines
+from backend.llm_client import get_async_client, get_llm_semaphore
+from backend.rate_limit import llm_limiter, retry_after_seconds
+from backend.cache import get_cached, prefix_summary_key, segment_cache_key, set_cached, summary_cache_key
+from backend.singleflight import single_flight
+from backend.eval_queue import enqueue_evaluation
+from backend.streaming import SummaryStreamParser
+from backend.selection import get_selection_policy, run_cheap_checks
+from backend.tracing import record_cache_lookup, record_llm_tokens, span, stage_totals, traced
+from backend.results import get_result, save_result
+from backend.config import LLM_API_KEY, LLM_MODEL, CACHE_TTL, MODEL_MAX_INPUT_TOKENS, CHUNK_MAX_TOKENS, CHUNK_CONCURRENCY, EVALUATION_MODE, SUMMARY_OUTPUT_RATIO, SELECTION_STRATEGY, INCREMENTAL_SUMMARIES, INCREMENTAL_CACHE_TTL, SIMILARITY_CACHE_ENABLED, SIMILARITY_MODE
 from backend.evaluator import evaluate_summary_deepeval
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import redis
-import os
+from backend.logger import logger, sampled_text
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
 class SummarizationError(Exception):
     pass
 
 
-logging.basicConfig(
-    filename='backend/logs/summary.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+async def get_cached_summary(notes, role):
+    with span("cache.lookup"):
+        cached = await get_cached(summary_cache_key(notes, role, LLM_MODEL, PROMPT_VERSION))
+    record_cache_lookup("summary", cached is not None)
+    return dict(cached) if cached else None
+
+
+async def set_cached_summary(notes, role, summary):
+    await set_cached(summary_cache_key(notes, role, LLM_MODEL, PROMPT_VERSION), summary, ttl=CACHE_TTL)
 
-best_summary_logger = logging.getLogger("best_summary")
-best_summary_logger.setLevel(logging.INFO)
 
-best_summary_handler = logging.FileHandler("backend/logs/best_summary.log", mode="w")  # Overwrites for new runs
-best_summary_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-best_summary_logger.addHandler(best_summary_handler)
+def variant_records(summary_variants):
+    """Variants as stored in the result store, with any per-variant checks or metrics."""
+    return [
+        {key: variant.get(key) for key in ("summary", "input_tokens", "output_tokens", "duration", "usage", "checks", "evaluation")}
+        for variant in summary_variants
+    ]
+
 
+async def save_summary(notes, role, result, summary_variants=None, index=True):
+    """
+    Persist `result` (assigning its request id on first save) with its variants
+    and stage timings in the result store, then cache it. Only summaries written
+    from the notes themselves are `index`ed for near-duplicate lookups, so
+    lookups never chain from one near-duplicate to the next.
+    """
+    result.setdefault("request_id", uuid.uuid4().hex)
+    timings = {"duration": result.get("duration"), "stages": stage_totals()}
+    await save_result(
+        result["request_id"], notes, role, LLM_MODEL, PROMPT_VERSION, result,
+        variant_records(summary_variants) if summary_variants is not None else None, timings
+    )
+    await set_cached_summary(notes, role, result)
+    if index and SIMILARITY_CACHE_ENABLED:
+        await index_summary(notes, role)
 
-openai.api_key = LLM_API_KEY
 
+async def summarize_chunk(chunk, index, total, semaphore):
+    """Summarize one chunk of a long note (map step)."""
+    async with semaphore:
+        messages = build_chunk_messages(chunk, index, total)
+        variants = await call_llm(messages, temperature=0.2, num_variants=1)
+        return variants[0]
 
-ROLE_PROMPTS = {
-    "general": "Provide a comprehensive summary",
-    "cardiologist": "Focus on cardiac conditions and ECG interpretations.",
-    "oncologist": "Highlight cancer-related findings and treatment plans.",
-    "nurse": "Provide a simplified summary focusing on patient care needs."
-}
 
-if os.getenv("DOCKER_ENV"):  
-    redis_url = os.getenv("DOCKER_REDIS_URL", "redis://redis:6379/0")
-else: 
-    redis_url = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0") 
-r = redis.Redis.from_url(redis_url)
+async def call_llm_parallel(chunks, max_concurrency=CHUNK_CONCURRENCY):
+    """
+    Summarize all chunks concurrently, with at most `max_concurrency` LLM calls in flight.
 
-def get_cached_summary(notes, role):
-    key = f"{role}:{hash(notes)}"
-    cached = r.get(key)
+    Returns:
+        list[dict]: One variant dict per chunk, in the original chunk order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    total = len(chunks)
+    return await asyncio.gather(
+        *(summarize_chunk(chunk, i + 1, total, semaphore) for i, chunk in enumerate(chunks))
+    )
+
+
+def group_by_token_budget(texts, max_tokens):
+    """Group consecutive texts so that each group stays within `max_tokens`."""
+    groups, current = [], []
+    for text in texts:
+        if current and count_tokens("\n\n".join(current + [text])) > max_tokens:
+            groups.append(current)
+            current = []
+        current.append(text)
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def recursive_merge(summaries, role="general", max_tokens=MODEL_MAX_INPUT_TOKENS, max_concurrency=CHUNK_CONCURRENCY):
+    """
+    Hierarchically merge partial summaries until they fit in one prompt (reduce step),
+    then produce the final structured summary from the merged text.
+
+    Returns:
+        dict: Final summary variant plus the accumulated token usage and merge depth.
+    """
+    texts = [s["summary"] for s in summaries]
+    input_tokens = sum(s["input_tokens"] for s in summaries)
+    output_tokens = sum(s["output_tokens"] for s in summaries)
+    depth = 0
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def merge_group(group):
+        async with semaphore:
+            messages = build_merge_messages(group)
+            variants = await call_llm(messages, temperature=0.2, num_variants=1)
+            return variants[0]
+
+    while count_tokens("\n\n".join(texts)) > max_tokens and len(texts) > 1:
+        depth += 1
+        groups = group_by_token_budget(texts, max_tokens)
+        if len(groups) == len(texts):
+            # Every partial summary already fills the budget on its own; merge pairwise.
+            groups = [texts[i:i + 2] for i in range(0, len(texts), 2)]
+        logger.info(f"Merge level {depth}: {len(texts)} partial summaries -> {len(groups)} groups.")
+        merged = await asyncio.gather(*(merge_group(group) for group in groups))
+        texts = [m["summary"] for m in merged]
+        input_tokens += sum(m["input_tokens"] for m in merged)
+        output_tokens += sum(m["output_tokens"] for m in merged)
+
+    messages = build_summary_messages("\n\n".join(texts), role)
+    final = (await call_llm(messages, temperature=0.4, num_variants=1))[0]
+
+    return {
+        "summary": final["summary"],
+        "input_tokens": input_tokens + final["input_tokens"],
+        "output_tokens": output_tokens + final["output_tokens"],
+        "merge_depth": depth
+    }
+
+
+async def process_medical_notes(notes, role="general", model_max_tokens=MODEL_MAX_INPUT_TOKENS, incremental=None):
+    """
+    Entry point for /summarize: serve from cache, otherwise summarize once even if
+    identical requests arrive concurrently (in this process or on other workers).
+    `incremental` (default: INCREMENTAL_SUMMARIES) reuses the cached summary of
+    an earlier version of a growing record.
+    """
+    cached = await get_cached_summary(notes, role)
     if cached:
-        return json.loads(cached)
-    return None
+        logger.info("Cache hit: Returning cached summary.")
+        return cached
 
-def set_cached_summary(notes, role, summary):
-    key = f"{role}:{hash(notes)}"
-    r.set(key, json.dumps(summary), ex=86400)  # Cache for 1 day
+    key = summary_cache_key(notes, role, LLM_MODEL, PROMPT_VERSION)
+    similar = await find_similar_summary(notes, role) if SIMILARITY_CACHE_ENABLED else None
+    incremental = INCREMENTAL_SUMMARIES if incremental is None else incremental
+    summarize = summarize_incremental if incremental else summarize_notes
+
+    async def compute():
+        if similar:
+            logger.info(f"Near-duplicate hit (similarity {similar[0]:.2f}).")
+            result = await summarize_from_similar(notes, role, *similar)
+            if result is not None:
+                return result
+        return await summarize(notes, role, model_max_tokens)
+
+    result = await single_flight(key, compute)
+    return dict(result)
+
+
+async def summarize_from_similar(notes, role, score, cached):
+    """
+    Answer from the summary of near-duplicate notes. With SIMILARITY_MODE
+    "update", lines that are new in `notes` are folded into it through the
+    update prompt; otherwise (or when nothing was added) it is reused as is.
+    The result is flagged with "near_duplicate" either way.
+
+    Returns None (summarize from scratch) when the source notes are no longer
+    in the result store (pruned, or not stored at all), or when any of their lines was removed or changed,
+    since the cached summary may then state something the notes no longer say.
+    """
+    start_time = time.time()
+    source = await get_result(cached["request_id"]) if cached.get("request_id") else None
+    if source is None or source["notes"] is None:
+        logger.info("Near-duplicate source notes not found; summarizing in full.")
+        return None
+    if removed_lines(source["notes"], notes):
+        logger.info("Near-duplicate notes removed or changed source lines; summarizing in full.")
+        return None
+    added = added_lines(source["notes"], notes)
+
+    if SIMILARITY_MODE == "update" and added:
+        messages = build_update_messages(cached["summary"], ["\n".join(added)], role)
+        variant = (await call_llm(messages, temperature=0.4, num_variants=1))[0]
+        result = build_result(variant)
+        result["evaluation_status"] = "not_evaluated"
+        mode = "updated"
+    else:
+        result = {key: value for key, value in cached.items() if key not in ("request_id", "near_duplicate")}
+        result.update(input_tokens=0, output_tokens=0, usage=None)
+        mode = "reused"
+
+    result["duration"] = time.time() - start_time
+    result["near_duplicate"] = {
+        "similarity": round(score, 3),
+        "source_request_id": cached.get("request_id"),
+        "mode": mode,
+        "added_lines": len(added)
+    }
+    await save_summary(notes, role, result, index=False)
+    return result
 
 
 # Dynamically Decide Whether to Chunk
-def process_medical_notes(notes, model_max_tokens=4000):
+async def summarize_notes(notes, role="general", model_max_tokens=MODEL_MAX_INPUT_TOKENS):
     """
     Automatically determines if chunking is required based on input token length.
     - If within limits, sends the full note.
-    - If too long, applies smart chunking and merges results.
+    - If too long, applies smart chunking, summarizes chunks in parallel and merges results.
+    Both decide on, and send, the preprocessed notes (boilerplate and copy-forward removed).
     """
-    input_tokens = len(notes.split())  
+    with span("preprocess"):
+        prepared = prepare_notes(notes)
+    input_tokens = count_tokens(prepared["text"])
 
     if input_tokens <= model_max_tokens:
-        logging.info(f"Processing full input without chunking ({input_tokens} tokens).")
-        return generate_summary(notes)  
+        logger.info(f"Processing full input without chunking ({input_tokens} tokens).")
+        return await generate_summary(notes, role, prepared)
 
-    logging.info(f"Input too long ({input_tokens} tokens). Applying chunking.")
+    logger.info(f"Input too long ({input_tokens} tokens). Applying chunking.")
+    record_preprocessing(prepared)
 
-    
-    chunks = smart_chunk_text(notes, max_chunk_size=2000)
-    chunk_summaries = call_llm_parallel(chunks)
-    final_summary = recursive_merge(chunk_summaries)
+    start_time = time.time()
+    chunks = smart_chunk_text(prepared["text"], max_chunk_size=min(CHUNK_MAX_TOKENS, model_max_tokens))
+    chunk_summaries = await call_llm_parallel(chunks)
+    final_summary = await recursive_merge(chunk_summaries, role, max_tokens=model_max_tokens)
+    duration = time.time() - start_time
 
-    return {
-        "summary": final_summary,
+    logger.info(f"Summarized {len(chunks)} chunks (merge depth {final_summary['merge_depth']}) in {duration:.2f}s")
+
+    result = {
+        "summary": final_summary["summary"],
+        "highlights": extract_highlights(final_summary["summary"]),
+        "evaluation": None,
+        "final_score": None,
+        "evaluation_status": "not_evaluated",
         "chunks_used": len(chunks),
+        "merge_depth": final_summary["merge_depth"],
+        "preprocessing": prepared["stats"],
         "total_tokens": input_tokens,
-        "output_tokens": len(final_summary.split())
+        "input_tokens": final_summary["input_tokens"],
+        "output_tokens": final_summary["output_tokens"],
+        "duration": duration
     }
 
+    await save_summary(notes, role, result)
+
+    return result
+
+async def summarize_segment(segment, key, semaphore):
+    """
+    Partial summary of one segment, cached by its content and computed once
+    even when several requests (on any worker) share a new segment. Segments
+    larger than a chunk are summarized per chunk. Segments summarized
+    elsewhere report zero tokens spent.
+    """
+    with span("cache.lookup"):
+        cached = await get_cached(key)
+    record_cache_lookup("segment", cached is not None)
+    if cached:
+        return {"summary": cached["summary"], "input_tokens": 0, "output_tokens": 0, "cached": True}
+
+    async def compute():
+        chunks = smart_chunk_text(segment, max_chunk_size=CHUNK_MAX_TOKENS)
+        parts = await asyncio.gather(*(summarize_chunk(chunk, i + 1, len(chunks), semaphore) for i, chunk in enumerate(chunks)))
+        summary = "\n".join(part["summary"] for part in parts)
+        await set_cached(key, {"summary": summary}, ttl=INCREMENTAL_CACHE_TTL)
+        return {
+            "summary": summary,
+            "input_tokens": sum(part["input_tokens"] for part in parts),
+            "output_tokens": sum(part["output_tokens"] for part in parts),
+            "cached": False
+        }
+
+    result = await single_flight(key, compute)
+    if "cached" not in result:
+        # Stored by another worker: only the summary is shared.
+        return {"summary": result["summary"], "input_tokens": 0, "output_tokens": 0, "cached": True}
+    return result
+
+
+async def summarize_segments(segments, keys, max_concurrency=CHUNK_CONCURRENCY):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(summarize_segment(segment, key, semaphore) for segment, key in zip(segments, keys)))
+
+
+async def find_prefix_summary(keys, role):
+    """
+    The longest run of leading segments that already has a cached summary.
+
+    Returns:
+        tuple: (number of segments covered, summary text or None)
+    """
+    with span("cache.lookup"):
+        cached = await asyncio.gather(*(
+            get_cached(prefix_summary_key(keys[:n], role, LLM_MODEL, PROMPT_VERSION)) for n in range(1, len(keys) + 1)
+        ))
+    for n in range(len(keys), 0, -1):
+        if cached[n - 1]:
+            record_cache_lookup("summary_prefix", True)
+            return n, cached[n - 1]["summary"]
+    record_cache_lookup("summary_prefix", False)
+    return 0, None
+
+
+async def summarize_incremental(notes, role="general", model_max_tokens=MODEL_MAX_INPUT_TOKENS):
+    """
+    Summarize a growing record from its segments (dated entries or sections).
+
+    The summary of the longest already-summarized run of leading segments is
+    updated with partial summaries of the remaining (new or changed) segments
+    only. Without such a summary, all segment partials (cached by content) are
+    merged from scratch. Notes with a single segment are summarized as usual.
+    """
+    segments = [normalize_whitespace(segment) for segment in split_segments(notes)]
+    if len(segments) < 2:
+        return await summarize_notes(notes, role, model_max_tokens)
+
+    start_time = time.time()
+    keys = [segment_cache_key(segment, LLM_MODEL, PROMPT_VERSION) for segment in segments]
+    covered, previous = await find_prefix_summary(keys, role)
+
+    if covered == len(segments):
+        mode, partials = "reused", []
+        final = {"summary": previous, "input_tokens": 0, "output_tokens": 0}
+    else:
+        partials = await summarize_segments(segments[covered:], keys[covered:])
+        messages = build_update_messages(previous, [p["summary"] for p in partials], role) if previous else None
+        if messages and count_message_tokens(messages) <= model_max_tokens:
+            mode = "updated"
+            update = (await call_llm(messages, temperature=0.4, num_variants=1))[0]
+            final = {
+                "summary": update["summary"],
+                "input_tokens": sum(p["input_tokens"] for p in partials) + update["input_tokens"],
+                "output_tokens": sum(p["output_tokens"] for p in partials) + update["output_tokens"]
+            }
+        else:
+            mode = "rebuilt"
+            partials = await summarize_segments(segments, keys) if covered else partials
+            final = await recursive_merge(partials, role, max_tokens=model_max_tokens)
+        await set_cached(prefix_summary_key(keys, role, LLM_MODEL, PROMPT_VERSION), {"summary": final["summary"]}, ttl=INCREMENTAL_CACHE_TTL)
+
+    duration = time.time() - start_time
+    summarized = sum(1 for p in partials if not p["cached"])
+    logger.info(f"Incremental summary ({mode}): {len(segments)} segments, {covered} covered by a cached summary, {summarized} summarized, in {duration:.2f}s")
+
+    result = {
+        "summary": final["summary"],
+        "highlights": extract_highlights(final["summary"]),
+        "evaluation": None,
+        "final_score": None,
+        "evaluation_status": "not_evaluated",
+        "incremental": {"mode": mode, "segments": len(segments), "segments_covered": covered, "segments_summarized": summarized},
+        "total_tokens": count_tokens(notes),
+        "input_tokens": final["input_tokens"],
+        "output_tokens": final["output_tokens"],
+        "duration": duration
+    }
+
+    await save_summary(notes, role, result)
+
+    return result
+
 def estimate_max_tokens(input_text, base_limit=500, max_limit=2000):
     """
     Dynamically estimate max_tokens based on input length.
@@ -94,154 +385,427 @@ def estimate_max_tokens(input_text, base_limit=500, max_limit=2000):
     Returns:
         int: Optimized max_tokens value.
     """
-    input_length = len(input_text.split())  
-    token_estimate = input_length * 1.0
-    
+    token_estimate = count_tokens(input_text) * SUMMARY_OUTPUT_RATIO
+
     return min(max(base_limit, int(token_estimate)), max_limit)
 
-# Rate-Limiting and Retries for LLM Calls
+
+def plan_call(prompt):
+    """Normalize `prompt` (a string or chat messages) and check the token budget before calling the LLM."""
+    messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+    try:
+        prompt_tokens, max_tokens = plan_token_budget(messages, estimate_max_tokens(messages[-1]["content"]))
+    except ContextWindowExceeded as e:
+        logger.error(f"Prompt does not fit the model context window: {e}")
+        raise SummarizationError(str(e)) from e
+    return messages, prompt_tokens, max_tokens
+
+
+def usage_from_response(usage, prompt_tokens, completion_tokens):
+    """Token usage as reported by the API, or our exact local count if it is absent."""
+    if usage is not None:
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "source": "api"
+        }
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "source": "tokenizer"
+    }
+
+def is_retryable(error):
+    """Connection errors, timeouts and 429s, except an exhausted quota (retrying cannot help)."""
+    if isinstance(error, openai.RateLimitError):
+        return getattr(error, "code", None) != "insufficient_quota"
+    return isinstance(error, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+_backoff = wait_exponential(multiplier=1, min=2, max=10)
+
+
+def retry_wait(retry_state):
+    # After a 429 the shared limiter is paused for the provider's Retry-After,
+    # so the next attempt waits there (in its lane) rather than in tenacity.
+    if isinstance(retry_state.outcome.exception(), openai.RateLimitError):
+        return 0
+    return _backoff(retry_state)
+
+
+async def reserve_llm_call(prompt_tokens, completion_tokens):
+    """Wait for room in the shared request and token limits (the caller's lane decides priority)."""
+    await llm_limiter.acquire(prompt_tokens + completion_tokens)
+
+
+async def pause_after_rate_limit(error):
+    seconds = retry_after_seconds(error)
+    logger.warning(f"LLM rate limited ({error}); pausing all LLM calls for {seconds:.1f}s.")
+    await llm_limiter.pause(seconds)
+
+
+# Rate-Limiting and Retries for LLM Calls (tenacity awaits asyncio.sleep between attempts)
 @retry(
-    retry=retry_if_exception_type(openai.APIConnectionError),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception(is_retryable),
+    wait=retry_wait,
     stop=stop_after_attempt(3),
     reraise=True
 )
-
-def call_llm(prompt, temperature=0.4, num_variants=2):
+@traced("llm.generate")
+async def call_llm(prompt, temperature=0.4, num_variants=2):
     """Generate multiple summary variations in a single LLM call."""
-    max_tokens = estimate_max_tokens(prompt)
-    logging.info("LLM Call: No cache, directly querying API.")
-
-    start_time = time.time()
-    response = openai.chat.completions.create(
-        model=LLM_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-        max_tokens=max_tokens,
-        n=num_variants
-    )
-    duration = time.time() - start_time
+    messages, prompt_tokens, max_tokens = plan_call(prompt)
+    logger.info(f"LLM Call: No cache, directly querying API ({prompt_tokens} prompt tokens, max_tokens={max_tokens}).")
+
+    client = get_async_client()
+    await reserve_llm_call(prompt_tokens, max_tokens * num_variants)
+    async with get_llm_semaphore():
+        start_time = time.time()
+        try:
+            response = await client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                n=num_variants
+            )
+        except openai.RateLimitError as e:
+            await pause_after_rate_limit(e)
+            raise
+        duration = time.time() - start_time
+
+    summaries = [(choice.message.content or "").strip() for choice in response.choices]
+    output_counts = [count_tokens(summary) for summary in summaries]
+    usage = usage_from_response(response.usage, prompt_tokens, sum(output_counts))
+    record_llm_tokens(usage["prompt_tokens"], usage["completion_tokens"])
 
     output_variants = [
         {
-            "summary": choice.message.content.strip(),
-            "input_tokens": count_tokens(prompt),
-            "output_tokens": count_tokens(choice.message.content.strip()),
-            "duration": duration
+            "summary": summary,
+            "input_tokens": usage["prompt_tokens"],
+            "output_tokens": output_tokens,
+            "duration": duration,
+            "usage": usage
         }
-        for choice in response.choices
+        for summary, output_tokens in zip(summaries, output_counts)
     ]
 
-    logging.info(f"Generated {num_variants} summary variations in {duration:.2f}s")
+    logger.info(f"Generated {num_variants} summary variations in {duration:.2f}s (usage: {usage})")
 
     for i, variant in enumerate(output_variants):
-        logging.info(f"Summary {i+1}: {variant['summary']}")
+        logger.bind(event="summary_variant", index=i + 1).info(sampled_text(variant["summary"]))
 
     return output_variants
 
-async def generate_summary(notes, role="general"):
-
-    cached = get_cached_summary(notes, role)
-    if cached:
-        logging.info("Cache hit: Returning cached summary.")
-        return cached
-
-    """Generate multiple summaries and select the best using LLM-based evaluation."""
-    role_prompt = ROLE_PROMPTS.get(role.lower(), ROLE_PROMPTS["general"])
-    prompt = f"""
-    You are a highly-skilled **clinical documentation assistant** specialized in **medical note summarization**. Extract all **medically relevant information** and create a **structured, factual, accurate summary** of the patient's medical history, findings, and treatment course.
-
-    Start with a 2-3 sentence high-level summary mentioning why the patient was admitted, primary condition, major interventions, and final outcome.
-
-    Rules:
-	- Start with a 2-3 sentence high-level summary of the case
-    - Preserve important medical details exactly.
-    - Explicitly state if data is missing: ("No information available").
-	- Do NOT add any new information or assumptions.
-    - Maintain original dates, conditions, clinical sequences.
-    - Include patient details: name, gender, age.
-    - Maintain chronological order (admission -> diagnosis -> hospital course -> discharge).
-
-    Summary Structure:
-
-    1. Case Overview
-    - Patient Name:
-    - Age & Gender:
-    - Admission Date:
-    - Discharge Date:
-    - Primary Reason for Admission:
-    - Primary Discharge Diagnoses:
-    - Outcome:
-
-    2. Medical History
-    - Past Diagnoses:
-    - Allergies:
-    - Comorbidities:
-    - Medications on Admission:
-    - Surgical History:
-
-    3. Hospital Course
-    - Initial Presentation & Key Symptoms:
-    - Vital Signs & Emergency Measures:
-    - Major Diagnostic Findings (highlight critical issues):
-    - Current Diagnoses:
-    - Treatment Plan:
-    - Procedures Performed:
-    - Medical Management:
-    - Complications:
-    - Response to Treatment:
-    - Important Dates:
-    - Attending Physician and Hospital Info:
-
-    4. Discharge Plan
-    - Medications on Discharge:
-    - Follow-up Recommendations:
-    - Final Outcome:
-
-    Clinical Notes to Summarize:
-    {notes}
+async def stream_llm(prompt, temperature=0.4, usage=None):
     """
+    Yield summary text deltas as the LLM produces them (single variant).
+    If a `usage` dict is passed, it is filled from the final usage chunk.
+    """
+    messages, prompt_tokens, max_tokens = plan_call(prompt)
+    logger.info(f"LLM Call: streaming single variant ({prompt_tokens} prompt tokens, max_tokens={max_tokens}).")
+
+    client = get_async_client()
+    await reserve_llm_call(prompt_tokens, max_tokens)
+    async with get_llm_semaphore():
+        try:
+            stream = await client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+        except openai.RateLimitError as e:
+            await pause_after_rate_limit(e)
+            raise
+        async for chunk in stream:
+            if chunk.usage is not None and usage is not None:
+                usage.update(usage_from_response(chunk.usage, prompt_tokens, 0))
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def extract_highlights(summary):
+    return [line for line in summary.split('\n') if 'critical' in line.lower()]
+
+
+def build_result(variant, evaluation=None):
+    return {
+        "summary": variant["summary"],
+        "highlights": extract_highlights(variant["summary"]),
+        "evaluation": evaluation,
+        "final_score": evaluation["final score"] if evaluation else None,
+        "input_tokens": variant["input_tokens"],
+        "output_tokens": variant["output_tokens"],
+        "duration": variant["duration"],
+        "usage": variant.get("usage")
+    }
 
-        # Generate multiple summaries in a single call
-    summary_variants   = call_llm(prompt, num_variants=2)
 
-    if not isinstance(summary_variants, list):
-        logging.error("LLM response was not a list!")
-        raise SummarizationError("LLM response was not a list!")
-
-    if not all(isinstance(item, dict) and "summary" in item for item in summary_variants):
-        logging.error("Malformed response from LLM!")
-        raise SummarizationError("Malformed response from LLM!")
-        
-    
+async def evaluate_and_select(notes, summary_variants):
+    """Score all variants with DeepEval and return the result for the best one."""
     evaluation_results = await evaluate_summary_deepeval(notes, summary_variants)
 
-   
     if not isinstance(evaluation_results, list):
-        logging.error("Evaluation results not in expected format!")
+        logger.error("Evaluation results not in expected format!")
         raise SummarizationError("Evaluation results not in expected format!")
 
+    for evaluation in evaluation_results:
+        summary_variants[evaluation["summary_index"]]["evaluation"] = evaluation["metrics"]
+
     best_summary = max(evaluation_results, key=lambda x: x["metrics"]["final score"])
     best_summary_index = best_summary["summary_index"]
     best_summary_content = summary_variants[best_summary_index]
 
-    best_summary_logger.info(f'evaluation: {best_summary["metrics"]}\n{best_summary_content["summary"]}')
-    best_summary_handler.flush()
+    logger.bind(event="best_summary", index=best_summary_index, metrics=best_summary["metrics"]).info(
+        sampled_text(best_summary_content["summary"])
+    )
 
-    highlights = [line for line in best_summary_content["summary"].split('\n') if 'critical' in line.lower()]
+    result = build_result(best_summary_content, best_summary["metrics"])
+    result["best_summary_index"] = best_summary_index
+    return result
 
-    result =  {
-        "summary": best_summary_content["summary"],
-        "highlights": highlights,
-        "evaluation": best_summary["metrics"],
-        "final_score": best_summary["metrics"]["final score"],
-        "input_tokens": best_summary_content["input_tokens"],
-        "output_tokens": best_summary_content["output_tokens"],
-        "duration": best_summary_content["duration"]
-    }
 
-    set_cached_summary(notes, role, result)
+def validate_variants(summary_variants):
+    if not isinstance(summary_variants, list):
+        logger.error("LLM response was not a list!")
+        raise SummarizationError("LLM response was not a list!")
+
+    if not all(isinstance(item, dict) and "summary" in item for item in summary_variants):
+        logger.error("Malformed response from LLM!")
+        raise SummarizationError("Malformed response from LLM!")
 
 
-    return result 
-    
\ No newline at end of file
+async def generate_summary(notes, role="general", prepared=None):
+    """
+    Generate a summary. With the adaptive strategy, one variant is generated and
+    accepted if it passes cheap local checks; only otherwise are more variants
+    generated and the best selected with LLM-based evaluation. `prepared` is
+    prepare_notes(notes) if the caller already has it.
+    """
+    cached = await get_cached_summary(notes, role)
+    if cached:
+        logger.info("Cache hit: Returning cached summary.")
+        return cached
+
+    if prepared is None:
+        with span("preprocess"):
+            prepared = prepare_notes(notes)
+    record_preprocessing(prepared)
+    with span("prompt.build"):
+        messages = build_summary_messages(prepared["text"], role)
+
+    if SELECTION_STRATEGY != "adaptive":
+        # Generate multiple summaries in a single call
+        summary_variants = await call_llm(messages, num_variants=2)
+        validate_variants(summary_variants)
+        return await evaluate_variants(notes, role, summary_variants)
+
+    policy = get_selection_policy(role)
+    summary_variants = await call_llm(messages, num_variants=policy["initial_variants"])
+    validate_variants(summary_variants)
+
+    result = await accept_if_checks_pass(notes, role, summary_variants, policy)
+    if result:
+        return result
+
+    checks = [variant["checks"] for variant in summary_variants]
+    logger.info(f"Cheap checks failed ({[c['reasons'] for c in checks]}); escalating to {policy['max_variants']} variants.")
+    extra_variants = policy["max_variants"] - len(summary_variants)
+    if extra_variants > 0:
+        more_variants = await call_llm(messages, num_variants=extra_variants)
+        validate_variants(more_variants)
+        summary_variants += more_variants
+
+    return await evaluate_variants(notes, role, summary_variants)
+
+
+async def accept_if_checks_pass(notes, role, summary_variants, policy):
+    """
+    Run the cheap local checks on every variant (recorded as variant["checks"])
+    and save and return the result for the best passing one, or None if none passes.
+    """
+    try:
+        checks = await asyncio.to_thread(run_cheap_checks, [v["summary"] for v in summary_variants], policy)
+    except Exception as e:
+        logger.warning(f"Cheap checks unavailable ({e}); falling back to full evaluation.")
+        checks = [{"passed": False, "reasons": ["checks unavailable"]} for _ in summary_variants]
+    for variant, check in zip(summary_variants, checks):
+        variant["checks"] = check
+    passing = [(variant, check) for variant, check in zip(summary_variants, checks) if check["passed"]]
+    if not passing:
+        return None
+
+    variant, check = max(passing, key=lambda pair: pair[1]["score"])
+    logger.info(f"Cheap checks passed; skipping extra variants and LLM metrics ({check}).")
+    result = build_result(variant)
+    result.update(checks=check, evaluation_status="checks_passed")
+    await save_summary(notes, role, result, summary_variants)
+    return result
+
+
+async def evaluate_variants(notes, role, summary_variants):
+    """Select the best variant with DeepEval, now or in the background evaluation queue."""
+    if EVALUATION_MODE == "background":
+        return await generate_summary_background(notes, role, summary_variants)
+
+    result = await evaluate_and_select(notes, summary_variants)
+    result["evaluation_status"] = "complete"
+
+    await save_summary(notes, role, result, summary_variants)
+
+    return result
+
+
+async def generate_summary_background(notes, role, summary_variants):
+    """Return the first valid variant now; score and pick the best one in the evaluation queue."""
+    valid_variants = [v for v in summary_variants if v["summary"]]
+    if not valid_variants:
+        logger.error("LLM returned only empty summaries!")
+        raise SummarizationError("LLM returned only empty summaries!")
+
+    request_id = uuid.uuid4().hex
+
+    async def evaluate():
+        result = await evaluate_and_select(notes, valid_variants)
+        result.update(request_id=request_id, evaluation_status="complete")
+        await save_summary(notes, role, result, valid_variants)
+        return result
+
+    # Save the pending result before queueing, so a fast evaluation (e.g. all
+    # scores cached) is never overwritten by it.
+    result = build_result(valid_variants[0])
+    result.update(request_id=request_id, evaluation_status="pending")
+    await save_summary(notes, role, result, valid_variants)
+
+    record = await enqueue_evaluation(request_id, evaluate)
+    if record["status"] != "pending":
+        # Not queued (queue full), so nothing else will write this result.
+        result["evaluation_status"] = record["status"]
+        await save_summary(notes, role, result, valid_variants)
+
+    return result
+
+
+async def rescore_summary(request_id):
+    """
+    Re-run evaluation on a stored summary's variants, reading the notes and
+    variants from the result store instead of calling the LLM. Returns the
+    updated result, or None if `request_id` is unknown. Raises
+    SummarizationError if the record's notes were not stored.
+    """
+    record = await get_result(request_id)
+    if record is None:
+        return None
+    if record["notes"] is None:
+        raise SummarizationError("The notes for this summary were not stored, so it cannot be re-scored.")
+
+    stored = record["result"]
+    summary_variants = record["variants"] or [{
+        "summary": stored["summary"],
+        "input_tokens": stored["input_tokens"],
+        "output_tokens": stored["output_tokens"],
+        "duration": stored["duration"],
+        "usage": stored.get("usage")
+    }]
+    result = await evaluate_and_select(record["notes"], summary_variants)
+    result = {**stored, **result, "request_id": request_id, "evaluation_status": "complete"}
+
+    await save_summary(record["notes"], record["role"], result, summary_variants)
+    return result
+
+
+async def stream_summary(notes, role="general"):
+    """
+    Stream a summary as (event, data) pairs: "token" deltas as they arrive,
+    "section" when a numbered section completes, "highlight" for each critical
+    line, and a final "done" carrying the full result.
+
+    Streaming shows one variant as it is generated, so a streamed summary is a
+    single variant, selected like /summarize's: accepted on passing cheap checks
+    (adaptive strategy), otherwise scored now or in the background evaluation
+    queue per EVALUATION_MODE. Everything /summarize does that cannot stream
+    (long notes, incremental and near-duplicate summaries) goes through
+    process_medical_notes, and the finished summary is emitted whole; so is a
+    result computed by a concurrent identical request, which it waits for
+    instead of calling the LLM again.
+    """
+    parser = SummaryStreamParser()
+    cached = await get_cached_summary(notes, role)
+    if cached is None:
+        with span("preprocess"):
+            prepared = prepare_notes(notes)
+        similar = await find_similar_summary(notes, role) if SIMILARITY_CACHE_ENABLED else None
+        if similar or INCREMENTAL_SUMMARIES or count_tokens(prepared["text"]) > MODEL_MAX_INPUT_TOKENS:
+            cached = await process_medical_notes(notes, role)
+
+    if cached:
+        for event in parser.feed(cached["summary"]) + parser.close():
+            yield event
+        yield "done", cached
+        return
+
+    deltas = asyncio.Queue()
+    key = summary_cache_key(notes, role, LLM_MODEL, PROMPT_VERSION)
+    task = asyncio.ensure_future(single_flight(key, lambda: stream_and_select(notes, role, prepared, deltas)))
+    streamed = False
+    while True:
+        getter = asyncio.ensure_future(deltas.get())
+        await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not getter.done():
+            getter.cancel()
+            break
+        delta = getter.result()
+        if delta is None:
+            break
+        streamed = True
+        yield "token", {"text": delta}
+        for event in parser.feed(delta):
+            yield event
+
+    result = dict(await task)
+    if not streamed:
+        # Another request produced the summary; emit it whole.
+        for event in parser.feed(result["summary"]):
+            yield event
+    for event in parser.close():
+        yield event
+    yield "done", result
+
+
+async def stream_and_select(notes, role, prepared, deltas):
+    """Generate one variant, putting its deltas on `deltas` (None when done), then select it like generate_summary."""
+    try:
+        record_preprocessing(prepared)
+        with span("prompt.build"):
+            messages = build_summary_messages(prepared["text"], role)
+        start_time = time.time()
+        parts = []
+        usage = {}
+        async for delta in stream_llm(messages, usage=usage):
+            parts.append(delta)
+            deltas.put_nowait(delta)
+    finally:
+        deltas.put_nowait(None)
+
+    summary = "".join(parts).strip()
+    output_tokens = count_tokens(summary)
+    usage = usage or usage_from_response(None, count_message_tokens(messages), output_tokens)
+    summary_variants = [{
+        "summary": summary,
+        "input_tokens": usage["prompt_tokens"],
+        "output_tokens": output_tokens,
+        "duration": time.time() - start_time,
+        "usage": usage
+    }]
+    validate_variants(summary_variants)
+
+    if SELECTION_STRATEGY == "adaptive":
+        result = await accept_if_checks_pass(notes, role, summary_variants, get_selection_policy(role))
+        if result:
+            return result
+    return await evaluate_variants(notes, role, summary_variants)
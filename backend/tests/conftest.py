@@ -0,0 +1,18 @@
+import os
+import pytest
+from backend.logger import configure_logging
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    """Send the app's log file to a temporary directory instead of backend/logs."""
+    path = tmp_path_factory.mktemp("logs")
+    configure_logging(str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def openai_api_key(monkeypatch):
+    """DeepEval builds its OpenAI model when a metric is created, which needs some key; no request uses it."""
+    if not os.getenv("OPENAI_API_KEY"):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import time
+from backend import batch
+from backend.rate_limit import TokenBucket
+
+
+def test_run_batch_writes_results_and_resumes(tmp_path, monkeypatch):
+    notes_file = tmp_path / "notes.jsonl"
+    notes_file.write_text("".join(
+        json.dumps({"id": f"n{i}", "notes": f"Patient {i} admitted with pneumonia."}) + "\n" for i in range(6)
+    ))
+    output = tmp_path / "results.jsonl"
+    calls = []
+
+    async def fake_process(notes, role):
+        calls.append(notes)
+        if "Patient 3 " in notes and len(calls) <= 6:
+            raise RuntimeError("LLM timeout")
+        return {"summary": f"summary of {notes}"}
+
+    monkeypatch.setattr(batch, "process_medical_notes", fake_process)
+
+    first = asyncio.run(batch.run_batch(str(notes_file), str(output), concurrency=3))
+    assert first == {"ok": 5, "failed": 1}
+
+    # The second run only retries the failed note.
+    second = asyncio.run(batch.run_batch(str(notes_file), str(output), concurrency=3))
+    assert second == {"ok": 1, "failed": 0}
+    assert len(calls) == 7
+    assert batch.load_completed_ids(str(output)) == {f"n{i}" for i in range(6)}
+
+
+def test_token_bucket_throttles_to_rate():
+    bucket = TokenBucket(rate_per_minute=6000, capacity=100)
+
+    async def drain():
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire(100)
+        return time.monotonic() - start
+
+    # 100 tokens up front, then 200 more at 100 tokens/second.
+    assert 1.8 < asyncio.run(drain()) < 2.5
+
+
+def test_batch_endpoint_rejects_short_notes_per_item(monkeypatch):
+    from backend import main
+    summarized = []
+
+    async def fake_summarize_items(items):
+        for item in items:
+            summarized.append(item["id"])
+            yield {"id": item["id"], "role": item["role"], "status": "ok", "result": {"summary": "ok"}}
+
+    monkeypatch.setattr(main, "summarize_items", fake_summarize_items)
+    request = main.BatchSummarizeRequest(items=[
+        {"id": "long", "notes": "Patient admitted with community-acquired pneumonia, treated with ceftriaxone."},
+        {"id": "short", "notes": "Pneumonia.", "role": "nurse"},
+    ])
+
+    async def read_stream():
+        response = await main.summarize_batch(request)
+        return [json.loads(line) async for line in response.body_iterator]
+
+    records = {record["id"]: record for record in asyncio.run(read_stream())}
+
+    assert summarized == ["long"]
+    assert records["long"]["status"] == "ok"
+    assert records["short"] == {"id": "short", "role": "nurse", "status": "failed", "error": main.NOTES_TOO_SHORT}
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from backend.benchmarks.fake_openai import fake_embedding, fake_instance
+from backend.benchmarks.suite import synthetic_note, summarize_latencies
+from backend.tokens import count_tokens
+
+
+class Verdict(BaseModel):
+    verdict: str
+    reason: Optional[str] = None
+
+
+class Verdicts(BaseModel):
+    verdicts: List[Verdict]
+
+
+def test_fake_structured_output_matches_schema():
+    instance = fake_instance(Verdicts.model_json_schema())
+    assert Verdicts.model_validate(instance).verdicts[0].verdict == "yes"
+
+
+def test_fake_embeddings_are_deterministic_unit_vectors():
+    assert fake_embedding("chest pain") == fake_embedding("chest pain")
+    assert abs(sum(x * x for x in fake_embedding("chest pain")) - 1) < 1e-6
+
+
+def test_synthetic_notes_are_reproducible_and_sized():
+    note = synthetic_note(1000, seed=7)
+    assert note == synthetic_note(1000, seed=7)
+    assert 1000 <= count_tokens(note) < 1300
+
+
+def test_latency_percentiles():
+    stats = summarize_latencies([i / 100 for i in range(1, 101)])
+    assert stats["p50_ms"] == 505.0 and stats["p99_ms"] == 990.1
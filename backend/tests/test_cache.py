@@ -0,0 +1,59 @@
+import asyncio
+import time
+from backend import cache
+from backend.cache import TTLCache, make_cache_key, summary_cache_key
+
+
+def test_summary_cache_key_is_stable_and_scoped():
+    key = summary_cache_key("Patient admitted with sepsis.", "Nurse", "gpt-4-turbo", "1")
+
+    assert key == summary_cache_key("Patient admitted with sepsis.", "nurse", "gpt-4-turbo", "1")
+    assert key.startswith("summary:") and len(key) == len("summary:") + 64
+    assert key != summary_cache_key("Patient admitted with sepsis.", "nurse", "gpt-4-turbo", "2")
+    assert key != summary_cache_key("Patient admitted with sepsis.", "nurse", "gpt-4o", "1")
+    assert make_cache_key("x", "ab", "c") != make_cache_key("x", "a", "bc")
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    lru = TTLCache(max_entries=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+
+
+def test_ttl_cache_values_cannot_be_aliased():
+    lru = TTLCache(max_entries=2, ttl=60)
+    result = {"summary": "ok", "usage": {"total_tokens": 10}}
+    lru.set("a", result)
+    result["response_time"] = 1.5
+    lru.get("a")["usage"]["total_tokens"] = 0
+
+    assert lru.get("a") == {"summary": "ok", "usage": {"total_tokens": 10}}
+
+
+def test_ttl_cache_expires_entries():
+    lru = TTLCache(max_entries=2, ttl=0.01)
+    lru.set("a", 1)
+    time.sleep(0.02)
+
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_degrades_to_memory_when_redis_is_down(monkeypatch):
+    monkeypatch.setattr(cache, "redis_url", "redis://127.0.0.1:1/0")
+    monkeypatch.setattr(cache, "_redis", None)
+    monkeypatch.setattr(cache, "_redis_down_until", 0.0)
+    cache.memory_cache.clear()
+
+    async def roundtrip():
+        await cache.set_cached("summary:test", {"summary": "ok"})
+        return await cache.get_cached("summary:test")
+
+    assert asyncio.run(roundtrip()) == {"summary": "ok"}
+    assert cache._redis_down_until > time.monotonic()
@@ -0,0 +1,63 @@
+from backend.chunking import smart_chunk_text, split_sections, split_segments
+
+
+def word_count(text):
+    return len(text.split())
+
+
+NOTES = """DISCHARGE SUMMARY
+Patient: John Doe, 67M.
+
+HISTORY OF PRESENT ILLNESS: The patient presented with chest pain. Troponin was elevated.
+
+HOSPITAL COURSE
+""" + " ".join(f"Day {i} the patient remained stable on heparin." for i in range(1, 60)) + """
+
+Discharge Medications:
+Aspirin 81 mg daily. Atorvastatin 80 mg nightly.
+"""
+
+
+def test_split_sections_detects_headers():
+    headers = [header for header, _ in split_sections(NOTES)]
+    assert headers == ["DISCHARGE SUMMARY", "HISTORY OF PRESENT ILLNESS:", "HOSPITAL COURSE", "Discharge Medications:"]
+
+
+def test_chunks_respect_budget_and_keep_all_text():
+    chunks = smart_chunk_text(NOTES, max_chunk_size=60, token_counter=word_count)
+
+    assert len(chunks) > 1
+    assert all(word_count(chunk) <= 60 for chunk in chunks)
+    joined = " ".join(chunks)
+    for i in range(1, 60):
+        assert f"Day {i} the patient" in joined
+    assert "Atorvastatin 80 mg nightly." in joined
+
+
+def test_split_section_repeats_header():
+    chunks = smart_chunk_text(NOTES, max_chunk_size=60, token_counter=word_count)
+    course_chunks = [chunk for chunk in chunks if "remained stable" in chunk]
+
+    assert len(course_chunks) > 1
+    assert all(chunk.startswith("HOSPITAL COURSE") for chunk in course_chunks)
+
+
+def test_short_notes_are_a_single_chunk():
+    assert smart_chunk_text("Patient admitted with pneumonia. Treated with antibiotics.", 2000) == [
+        "Patient admitted with pneumonia. Treated with antibiotics."
+    ]
+    assert smart_chunk_text("   ") == []
+
+
+def test_split_segments_by_date_and_appending_keeps_earlier_segments():
+    day_two = "ADMISSION H&P\nJohn Doe, 67M, chest pain.\n\n2024-03-01 Troponin 2.1. Heparin started.\n03/02/2024 Cath: LAD stent placed."
+    day_three = day_two + "\nHospital Day 3: Ambulating, discharge planned."
+
+    assert split_segments(day_two) == [
+        "ADMISSION H&P\nJohn Doe, 67M, chest pain.",
+        "2024-03-01 Troponin 2.1. Heparin started.",
+        "03/02/2024 Cath: LAD stent placed."
+    ]
+    assert split_segments(day_three)[:3] == split_segments(day_two)
+    assert len(split_segments(NOTES)) == 4  # day entries share one line: falls back to sections
+    assert split_segments("HPI: chest pain\nPLAN\nheparin") == ["HPI:\nchest pain", "PLAN\nheparin"]
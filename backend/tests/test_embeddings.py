@@ -0,0 +1,42 @@
+import asyncio
+import numpy as np
+from backend import embeddings
+from backend.evaluator import compute_coherence_scores
+
+
+def fake_embedder(calls):
+    async def embed(texts):
+        calls.append(list(texts))
+        # Deterministic 3-d vectors: headings point one way, clinical sentences another.
+        return np.array([[1.0, 0.0, 0.0] if t.startswith("Heading") else [0.0, 2.0, 0.0] for t in texts])
+    return embed
+
+
+def test_embeddings_are_batched_and_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(embeddings, "_embed_openai", fake_embedder(calls))
+    embeddings.embedding_cache.clear()
+
+    vectors = asyncio.run(embeddings.embed_texts(["Heading A", "Sepsis treated", "Heading A"]))
+    assert calls == [["Heading A", "Sepsis treated"]]
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    asyncio.run(embeddings.embed_texts(["Sepsis treated", "Heading B"]))
+    assert calls[-1] == ["Heading B"]
+
+
+def test_coherence_scores_for_all_variants_use_one_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(embeddings, "_embed_openai", fake_embedder(calls))
+    embeddings.embedding_cache.clear()
+
+    scores = asyncio.run(compute_coherence_scores([
+        "Heading one. Heading two. Heading three.",
+        "Heading one. Sepsis noted. Cultures sent. Heading two.",
+        "Too short.",
+    ]))
+
+    assert len(calls) == 1
+    assert scores[0] == 1.0
+    assert scores[1] == 0.0
+    assert scores[2] == 0
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from backend import cache, results, summarizer
+from backend.eval_queue import enqueue_evaluation, get_evaluation, stop_evaluation_workers
+
+
+def test_background_evaluation_records_status(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+
+    async def evaluate():
+        await asyncio.sleep(0.01)
+        return {"final_score": 0.9}
+
+    async def fail():
+        raise RuntimeError("metric crashed")
+
+    async def run():
+        pending = await enqueue_evaluation("req-ok", evaluate)
+        await enqueue_evaluation("req-bad", fail)
+        await asyncio.sleep(0.1)
+        records = await get_evaluation("req-ok"), await get_evaluation("req-bad")
+        await stop_evaluation_workers()
+        return pending, records
+
+    pending, (done, failed) = asyncio.run(run())
+
+    assert pending["status"] == "pending"
+    assert done["status"] == "complete" and done["final_score"] == 0.9
+    assert failed["status"] == "failed" and "metric crashed" in failed["error"]
+
+
+def test_fast_background_evaluation_is_not_overwritten_by_the_pending_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    results.close_results()
+
+    async def instant_evaluation(notes, variants):
+        # Every metric score already cached: selection finishes without awaiting anything slow.
+        return {**summarizer.build_result(variants[0], {"final score": 0.8}), "best_summary_index": 0}
+
+    async def slow_pending_save(request_id, notes, role, model, prompt_version, result, *args):
+        if result.get("evaluation_status") == "pending":
+            await asyncio.sleep(0.05)
+        await save_result(request_id, notes, role, model, prompt_version, result, *args)
+
+    save_result = summarizer.save_result
+    monkeypatch.setattr(summarizer, "evaluate_and_select", instant_evaluation)
+    monkeypatch.setattr(summarizer, "save_result", slow_pending_save)
+    notes = "Background race test: 70M, COPD exacerbation, nebulizers and prednisone."
+    variant = {"summary": "COPD exacerbation, treated.", "input_tokens": 30, "output_tokens": 4, "duration": 0.1}
+
+    async def run():
+        returned = await summarizer.generate_summary_background(notes, "general", [variant])
+        await asyncio.sleep(0.1)
+        cached = await summarizer.get_cached_summary(notes, "general")
+        stored = await results.get_result(returned["request_id"])
+        await stop_evaluation_workers()
+        return returned, cached, stored
+
+    returned, cached, stored = asyncio.run(run())
+    results.close_results()
+
+    assert returned["evaluation_status"] == "pending"
+    assert cached["evaluation_status"] == "complete" and cached["final_score"] == 0.8
+    assert stored["result"]["evaluation_status"] == "complete"
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import pytest
+from deepeval.metrics import SummarizationMetric
+from backend import cache, evaluator
+from backend.deepeval_metrics import PreparedSummarizationMetric
+from backend.evaluator import analyze_notes
+
+
+def test_note_analysis_is_computed_once_and_reused(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    calls = []
+
+    async def truths(self, text):
+        calls.append("truths")
+        await asyncio.sleep(0.02)
+        return ["Patient has hypertension."]
+
+    async def questions(self, text):
+        calls.append("questions")
+        return ["Does the patient have hypertension?"]
+
+    async def answers(self, text):
+        calls.append(f"answers:{text}")
+        return ["yes"]
+
+    monkeypatch.setattr(SummarizationMetric, "_a_generate_truths", truths)
+    monkeypatch.setattr(SummarizationMetric, "_a_generate_assessment_questions", questions)
+    monkeypatch.setattr(SummarizationMetric, "_a_generate_answers", answers)
+    notes = "Evaluator test notes: 62M with hypertension."
+
+    async def run():
+        results = await asyncio.gather(*(analyze_notes(notes) for _ in range(3)))
+        return results + [await analyze_notes(notes)]
+
+    results = asyncio.run(run())
+
+    assert calls == ["truths", "questions", f"answers:{notes}"]
+    assert all(result == results[0] for result in results)
+    assert results[0]["questions"] == ["Does the patient have hypertension?"]
+
+    # Variant metrics reuse the analysis for the notes and only ask about the summary.
+    metric = PreparedSummarizationMetric(notes, results[0], n=1)
+    assert asyncio.run(metric._a_generate_truths(notes)) == ["Patient has hypertension."]
+    assert asyncio.run(metric._a_generate_answers(notes)) == ["yes"]
+    asyncio.run(metric._a_generate_answers("summary text"))
+    assert calls[-1] == "answers:summary text"
+
+
+def test_failed_truth_fallback_is_not_cached(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+
+    async def missing_method(self, text):
+        raise AttributeError("no _a_generate_truths")
+
+    async def questions(self, text):
+        return ["Is the patient on insulin?"]
+
+    class DownClient:
+        class chat:
+            class completions:
+                @staticmethod
+                async def create(**kwargs):
+                    raise ConnectionError("LLM unavailable")
+
+    monkeypatch.setattr(SummarizationMetric, "_a_generate_truths", missing_method)
+    monkeypatch.setattr(SummarizationMetric, "_a_generate_assessment_questions", questions)
+    monkeypatch.setattr(evaluator, "get_async_client", DownClient)
+    notes = "Evaluator fallback notes: 48F with type 1 diabetes on insulin pump."
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(analyze_notes(notes))
+    key = evaluator.make_cache_key("eval-notes", notes, evaluator._evaluation_model(),
+                                   evaluator.SUMMARIZATION_QUESTIONS, evaluator.TRUTHS_EXTRACTION_LIMIT)
+    assert cache.memory_cache.get(key) is None
+
+
+def test_metric_scores_are_cached_per_pair_and_subset(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(evaluator, "_evaluation_model", lambda: "fake-model")
+    computed = []
+
+    async def fake_compute(notes, summary_texts, pending):
+        computed.append({name: [summary_texts[i] for i in indices] for name, indices in pending.items()})
+        return {(name, i): {"score": 0.5, "reason": "ok"} for name, indices in pending.items() for i in indices}
+
+    monkeypatch.setattr(evaluator, "_compute_metrics", fake_compute)
+    notes = "Evaluation cache test notes."
+    summaries = [{"summary": "A"}, {"summary": "B"}, {"summary": "A"}]
+
+    first = asyncio.run(evaluator.evaluate_summary_deepeval(notes, summaries, ["coherence", "summarization"]))
+    second = asyncio.run(evaluator.evaluate_summary_deepeval(notes, [{"summary": "B"}], ["summarization"]))
+    third = asyncio.run(evaluator.evaluate_summary_deepeval(notes, [{"summary": "B"}], ["vagueness"]))
+
+    assert computed == [{"coherence": ["A", "B"], "summarization": ["A", "B"]}, {"vagueness": ["B"]}]
+    assert set(first[2]["metrics"]) == {"Coherence Score", "Summarization Score", "Alignment Score",
+                                        "Coverage Score", "final score"}
+    assert second[0]["metrics"]["final score"] == 0.5 and second[0]["feedback"] == "ok"
+    assert third[0]["metrics"] == {"Vagueness Score": 0.5}
+
+    with pytest.raises(ValueError):
+        asyncio.run(evaluator.evaluate_summary_deepeval(notes, summaries, ["bogus"]))
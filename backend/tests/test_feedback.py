@@ -0,0 +1,56 @@
+import asyncio
+import json
+from backend import feedback
+
+
+def test_feedback_is_batched_into_sqlite_and_paginated(tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback, "FEEDBACK_DB", str(tmp_path / "feedback.db"))
+    feedback.close_feedback()
+
+    async def run():
+        await asyncio.gather(*(feedback.store_feedback(f"req-{i % 3}", f"summary {i}", f"note {i}") for i in range(7)))
+        await feedback.stop_feedback_writer()
+
+    asyncio.run(run())
+
+    page = feedback.query_feedback(limit=3)
+    assert [entry["feedback"] for entry in page["feedback"]] == ["note 6", "note 5", "note 4"]
+    next_page = feedback.query_feedback(limit=3, before_id=page["next_before"])
+    assert [entry["feedback"] for entry in next_page["feedback"]] == ["note 3", "note 2", "note 1"]
+    assert feedback.query_feedback(limit=10, before_id=next_page["next_before"])["next_before"] is None
+
+    by_request = feedback.query_feedback(request_id="req-1")
+    assert [entry["feedback"] for entry in by_request["feedback"]] == ["note 4", "note 1"]
+    feedback.close_feedback()
+
+
+def test_legacy_jsonl_import(tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback, "FEEDBACK_DB", str(tmp_path / "feedback.db"))
+    feedback.close_feedback()
+    legacy = tmp_path / "feedback.json"
+    entries = [{"request_id": "a", "summary": "s", "feedback": "good", "timestamp": "2024-01-01T10:00:00"},
+               {"request_id": "b", "summary": "s", "feedback": "bad", "timestamp": "2024-02-01T10:00:00"}]
+    legacy.write_text("\n".join(json.dumps(e) for e in entries) + "\n{torn", encoding="utf-8")
+
+    assert feedback.import_jsonl(str(legacy)) == 2
+    assert not legacy.exists() and (tmp_path / "feedback.json.imported").exists()
+    since = feedback.query_feedback(since="2024-01-15")
+    assert [entry["request_id"] for entry in since["feedback"]] == ["b"]
+    feedback.close_feedback()
+
+
+def test_queue_full_fallback_shares_the_writer_connection_safely(tmp_path, monkeypatch):
+    monkeypatch.setattr(feedback, "FEEDBACK_DB", str(tmp_path / "feedback.db"))
+    monkeypatch.setattr(feedback, "FEEDBACK_QUEUE_SIZE", 2)
+    feedback.close_feedback()
+
+    async def run():
+        # Most entries overflow the tiny queue and are inserted from worker threads
+        # while the batch writer uses the same connection.
+        await asyncio.gather(*(feedback.store_feedback(f"req-{i}", "summary", f"note {i}") for i in range(40)))
+        await feedback.stop_feedback_writer()
+
+    asyncio.run(run())
+
+    assert len(feedback.query_feedback(limit=100)["feedback"]) == 40
+    feedback.close_feedback()
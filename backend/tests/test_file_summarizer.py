@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 import pytest
 import traceback
@@ -39,7 +40,7 @@ def test_summarize_text_files():
             try:
                 
                 logging.info(f"Processing: {file_name}")
-                result = generate_summary(notes, "general")
+                result = asyncio.run(generate_summary(notes, "general"))
 
                 assert isinstance(result, dict), f"Invalid response type for `{file_name}`"
                 assert "summary" in result, f"No summary generated for `{file_name}`"
@@ -0,0 +1,33 @@
+import asyncio
+import time
+from backend import cache, results, summarizer
+
+DAY_ONE = "ADMISSION H&P\nIncremental test: Jane Roe, 58F, dyspnea.\n2024-05-01 BNP 900. Furosemide IV started.\n2024-05-02 Diuresed 2 L. Echo EF 30%."
+DAY_TWO = DAY_ONE + "\n2024-05-03 Switched to oral furosemide. Discharge planned."
+
+
+def test_growing_notes_only_summarize_new_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    results.close_results()
+    prompts = []
+
+    async def fake_call_llm(messages, temperature=0.4, num_variants=2):
+        prompts.append(messages)
+        text = messages[-1]["content"]
+        return [{"summary": f"summary of {len(text)} chars", "input_tokens": len(text.split()), "output_tokens": 4}]
+
+    monkeypatch.setattr(summarizer, "call_llm", fake_call_llm)
+
+    first = asyncio.run(summarizer.summarize_incremental(DAY_ONE, "general"))
+    first_calls, prompts[:] = len(prompts), []
+    second = asyncio.run(summarizer.summarize_incremental(DAY_TWO, "general"))
+    results.close_results()
+
+    assert first["incremental"] == {"mode": "rebuilt", "segments": 3, "segments_covered": 0, "segments_summarized": 3}
+    assert first_calls == 4  # three segments plus the final structured summary
+    assert second["incremental"] == {"mode": "updated", "segments": 4, "segments_covered": 3, "segments_summarized": 1}
+    assert len(prompts) == 2
+    assert "Switched to oral furosemide" in prompts[0][-1]["content"]
+    assert "Echo EF 30%" not in prompts[0][-1]["content"] + prompts[1][-1]["content"]
+    assert first["summary"] in prompts[1][-1]["content"]
@@ -0,0 +1,27 @@
+import asyncio
+from backend import llm_client
+
+
+def test_each_loop_gets_its_own_client_and_closes_it_at_shutdown():
+    async def use_client():
+        client = llm_client.get_async_client()
+        assert llm_client.get_async_client() is client
+        return client
+
+    first = asyncio.run(use_client())
+    second = asyncio.run(use_client())
+
+    assert first is not second
+    assert first.is_closed() and second.is_closed()
+    assert llm_client._clients == {}
+
+
+def test_close_async_client_closes_the_running_loops_client():
+    async def run():
+        client = llm_client.get_async_client()
+        await llm_client.close_async_client()
+        return client, llm_client.get_async_client()
+
+    closed, reopened = asyncio.run(run())
+
+    assert closed.is_closed() and closed is not reopened
@@ -0,0 +1,62 @@
+import asyncio
+import io
+import os
+import time
+import zipfile
+from backend.log_reader import follow_logs, reverse_lines, tail_logs
+
+
+def record(minute, level, message):
+    return f"2024-05-01 10:{minute:02d}:00.000 | {level:<8} | backend.summarizer:call_llm:1 - {message}\n"
+
+
+def test_reverse_lines_across_block_boundaries():
+    data = "".join(f"line {i}\n" for i in range(100)).encode()
+    lines = [line for line in reverse_lines(io.BytesIO(data), block_size=7) if line]
+    assert lines == [f"line {i}" for i in reversed(range(100))]
+
+
+def test_tail_spans_rotated_and_zipped_segments_with_filters(tmp_path):
+    path = tmp_path / "summary.log"
+    with zipfile.ZipFile(tmp_path / "summary.2024-05-01_10-00.log.zip", "w") as archive:
+        archive.writestr("summary.2024-05-01_10-00.log", record(0, "INFO", "oldest") + record(1, "ERROR", "zipped error"))
+    rotated = tmp_path / "summary.2024-05-01_10-10.log"
+    rotated.write_text(record(10, "INFO", "rotated") + record(11, "WARNING", "multi\n  line detail"))
+    path.write_text(record(20, "DEBUG", "noise") + record(21, "INFO", "latest"))
+    now = time.time()
+    os.utime(tmp_path / "summary.2024-05-01_10-00.log.zip", (now - 20, now - 20))
+    os.utime(rotated, (now - 10, now - 10))
+
+    assert [r.rsplit(" - ", 1)[1] for r in tail_logs(str(path), lines=3)] == ["multi\n  line detail", "noise", "latest"]
+    warnings = tail_logs(str(path), lines=10, level="warning")
+    assert [r.rsplit(" - ", 1)[1] for r in warnings] == ["zipped error", "multi\n  line detail"]
+    window = tail_logs(str(path), lines=10, since="2024-05-01T10:05", until="2024-05-01T10:21")
+    assert [r.rsplit(" - ", 1)[1] for r in window] == ["rotated", "multi\n  line detail", "noise"]
+
+
+def test_follow_yields_appended_records(tmp_path):
+    path = tmp_path / "summary.log"
+    path.write_text(record(0, "INFO", "before"))
+
+    async def run():
+        follower = follow_logs(str(path), level="INFO", poll_interval=0.01)
+        first = asyncio.ensure_future(follower.__anext__())
+        await asyncio.sleep(0.05)
+        with open(path, "a") as file:
+            file.write(record(1, "DEBUG", "skipped") + record(2, "INFO", "after"))
+        line = await asyncio.wait_for(first, 2)
+        await follower.aclose()
+        return line
+
+    assert asyncio.run(run()).endswith("after")
+
+
+def test_tail_reads_structured_json_records(tmp_path):
+    path = tmp_path / "summary.log"
+    path.write_text(
+        '{"time": "2024-05-01T10:00:00.000+02:00", "level": "INFO", "message": "first"}\n'
+        '{"time": "2024-05-01T10:01:00.000+02:00", "level": "ERROR", "message": "second"}\n'
+    )
+    assert tail_logs(str(path), lines=5, level="ERROR", since="2024-05-01T10:00:30") == [
+        '{"time": "2024-05-01T10:01:00.000+02:00", "level": "ERROR", "message": "second"}'
+    ]
@@ -0,0 +1,28 @@
+import json
+import logging
+from backend import logger as log_module
+from backend.logger import logger, sampled_text
+
+
+def test_records_are_capped_json_lines(monkeypatch):
+    lines = []
+    monkeypatch.setattr(log_module, "LOG_MAX_MESSAGE_CHARS", 50)
+    sink = logger.add(lines.append, format=log_module._format)
+    try:
+        logger.bind(event="request", input_tokens=12).info("x" * 80)
+        logging.getLogger("httpx").warning("from stdlib")
+    finally:
+        logger.remove(sink)
+
+    first, second = (json.loads(line) for line in lines)
+    assert first["event"] == "request" and first["input_tokens"] == 12
+    assert first["message"] == "x" * 50 + "... [truncated 30 chars]"
+    assert second["logger"] == "httpx" and second["level"] == "WARNING"
+
+
+def test_full_text_is_sampled():
+    text = "Patient admitted with chest pain. " * 20
+    assert sampled_text(text, sample_rate=1.0) == text
+    preview = sampled_text(text, sample_rate=0.0)
+    assert len(preview) < len(text) and f"[{len(text)} chars, sha256:" in preview
+    assert sampled_text("short", sample_rate=0.0) == "short"
@@ -0,0 +1,48 @@
+import asyncio
+import re
+import time
+from backend import cache, results, summarizer
+from backend.prompts import CHUNK_SYSTEM_PROMPT, MERGE_SYSTEM_PROMPT
+
+NOTES = "\n\n".join(
+    f"PROGRESS NOTE {day}\nMap-reduce test day {day}: vitals stable, creatinine {day}.{day % 7}, ambulating with assistance."
+    for day in range(1, 41)
+)
+FILLER = " stable overnight, no new complaints, plan unchanged" * 3
+
+
+def test_long_notes_merge_in_chunk_order_over_several_levels(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    results.close_results()
+    merges, finals = [], []
+
+    async def fake_call_llm(messages, temperature=0.4, num_variants=2):
+        system, text = messages[0]["content"], messages[-1]["content"]
+        if system == CHUNK_SYSTEM_PROMPT:
+            summary = "[" + re.search(r"part (\d+) of", text).group(1) + "]"
+        elif system == MERGE_SYSTEM_PROMPT:
+            labels = re.findall(r"\[[\d ]+\]", text)
+            merges.append(labels)
+            summary = "[" + " ".join(label.strip("[]") for label in labels) + "]"
+        else:
+            finals.append(text)
+            summary = "Final summary."
+        return [{"summary": summary + FILLER, "input_tokens": 1, "output_tokens": 1}]
+
+    monkeypatch.setattr(summarizer, "call_llm", fake_call_llm)
+
+    result = asyncio.run(summarizer.summarize_notes(NOTES, "general", model_max_tokens=120))
+    results.close_results()
+
+    chunks = result["chunks_used"]
+    assert chunks > 4 and result["merge_depth"] > 1
+    # Level one merges consecutive chunk summaries; read left to right, the groups cover every chunk once, in order.
+    level_one = [label for group in merges if all(" " not in label for label in group) for label in group]
+    assert level_one == [f"[{i}]" for i in range(1, chunks + 1)]
+    # Every later merge also keeps its inputs in order, and the final prompt lists all chunks in order.
+    for group in merges:
+        numbers = [int(n) for label in group for n in label.strip("[]").split()]
+        assert numbers == sorted(numbers)
+    final_numbers = [int(n) for label in re.findall(r"\[[\d ]+\]", finals[0]) for n in label.strip("[]").split()]
+    assert final_numbers == list(range(1, chunks + 1))
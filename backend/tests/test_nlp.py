@@ -0,0 +1,47 @@
+import spacy
+from backend import nlp
+
+SUMMARIES = [
+    "Patient on metoprolol and lisinopril for hypertension.",
+    "No acute distress.",
+    "Started aspirin after the stent; continue metoprolol.   ",
+]
+
+
+def fake_pipeline():
+    pipeline = spacy.blank("en")
+    ruler = pipeline.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "DRUG", "pattern": drug} for drug in ("metoprolol", "lisinopril", "aspirin")]
+                       + [{"label": "CONDITION", "pattern": "hypertension"}])
+    return pipeline
+
+
+# Importing the app without importing spaCy is checked in test_startup.py.
+def test_model_loads_once_on_first_use_with_excluded_pipes(monkeypatch):
+    loads = []
+
+    def fake_load(name, exclude=()):
+        loads.append((name, list(exclude)))
+        return fake_pipeline()
+
+    monkeypatch.setattr(spacy, "load", fake_load)
+    monkeypatch.setattr(nlp, "_nlp", None)
+
+    assert loads == []
+    nlp.entity_densities(SUMMARIES[:1])
+    nlp.entity_densities(SUMMARIES[1:])
+    assert loads == [(nlp.SPACY_MODEL, nlp.NLP_EXCLUDE_PIPES)]
+    assert "parser" in loads[0][1]
+
+
+def test_batched_densities_match_one_text_at_a_time(monkeypatch):
+    monkeypatch.setattr(nlp, "_nlp", fake_pipeline())
+
+    batched = nlp.entity_densities(SUMMARIES, batch_size=2)
+    single = [nlp.entity_densities([text], batch_size=1)[0] for text in SUMMARIES]
+
+    assert batched == single
+    assert batched[0] == 3 / 8 and batched[1] == 0.0
+    # Trailing whitespace is not counted as a token.
+    assert batched[2] == 2 / 9
+
@@ -0,0 +1,56 @@
+from backend import preprocess
+from backend.preprocess import older_duplicates, prepare_notes, record_preprocessing, strip_boilerplate
+from backend.tracing import preprocess_tokens
+
+MEDS = "Home medications: metoprolol succinate 50 mg daily, lisinopril 20 mg daily, atorvastatin 80 mg nightly."
+
+
+def test_strip_boilerplate_keeps_clinical_lines():
+    text, removed = strip_boilerplate(
+        "Troponin 2.1.\nElectronically signed by Dr. Smith, MD\n-----\nPage 2 of 3\nAllergies: ____\nAllergies: penicillin"
+    )
+    assert text == "Troponin 2.1.\nAllergies: penicillin"
+    assert removed == 4
+
+
+def test_older_duplicates_marks_the_older_copy():
+    texts = [MEDS, "Chest pain resolved after the second dose of nitroglycerin.", MEDS.upper() + " Continue."]
+    assert older_duplicates(texts, [(0, 0), (0, 1), (0, 2)]) == {0}
+    # An explicit later date wins over position.
+    assert older_duplicates(texts, [(739000, 0), (0, 1), (738000, 2)]) == {2}
+
+
+def test_prepare_notes_collapses_copy_forward_and_reports_savings(monkeypatch):
+    monkeypatch.setattr(preprocess, "PREPROCESS_ENABLED", True)
+    notes = "\n\n".join(
+        f"03/0{day}/2024 Progress note\nBP {110 + day}/70, pain {5 - day}/10.\n\n{MEDS}\n\nElectronically signed by Dr. Smith"
+        for day in range(1, 5)
+    )
+    prepared = prepare_notes(notes)
+
+    assert prepared["text"].count("Home medications") == 1
+    assert all(f"BP {110 + day}/70" in prepared["text"] for day in range(1, 5))
+    assert "03/01/2024" in prepared["text"] and "signed" not in prepared["text"]
+    stats = prepared["stats"]
+    assert stats["duplicate_paragraphs"] == 3 and stats["boilerplate_lines"] == 4
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"] > 0
+
+
+def test_text_outside_dated_entries_is_never_collapsed(monkeypatch):
+    monkeypatch.setattr(preprocess, "PREPROCESS_ENABLED", True)
+    notes = f"ADMISSION H&P\n{MEDS}\n\n03/02/2024 Progress note\nStable overnight.\n{MEDS}\n\nDISCHARGE\n{MEDS}"
+    prepared = prepare_notes(notes)
+
+    # The admission list precedes any dated entry and stays, though the entry repeats it.
+    assert prepared["text"].startswith(f"ADMISSION H&P\n{MEDS}")
+    assert prepared["stats"]["duplicate_paragraphs"] == 0
+
+
+def test_savings_are_counted_for_every_prompt_not_once_per_cached_notes(monkeypatch):
+    monkeypatch.setattr(preprocess, "PREPROCESS_ENABLED", True)
+    notes = f"03/01/2024 Day one.\n{MEDS}\n\n03/02/2024 Day two.\n{MEDS}"
+    before = preprocess_tokens.value(stage="before")
+    for _ in range(2):
+        record_preprocessing(prepare_notes(notes))
+
+    assert preprocess_tokens.value(stage="before") - before == 2 * prepare_notes(notes)["stats"]["tokens_before"]
@@ -0,0 +1,23 @@
+from backend.prompts import PROMPT_VERSION, ROLE_PROMPTS, build_summary_messages, normalize_whitespace
+
+
+def test_system_prefix_is_shared_and_role_instruction_is_inserted():
+    general = build_summary_messages("Patient admitted with pneumonia.", "general")
+    cardio = build_summary_messages("Patient admitted with pneumonia.", "Cardiologist")
+
+    assert general[0] == cardio[0]
+    assert general[0]["role"] == "system"
+    assert ROLE_PROMPTS["cardiologist"] in cardio[1]["content"]
+    assert cardio[1]["content"].endswith("Patient admitted with pneumonia.")
+    assert build_summary_messages("x", "surgeon")[1] == build_summary_messages("x", "general")[1]
+
+
+def test_templates_are_whitespace_normalized():
+    system = build_summary_messages("notes")[0]["content"]
+    assert "\t" not in system and "  " not in system and "\n\n\n" not in system
+    assert normalize_whitespace("  BP  120/80\t\n\n\n\nHR 72  ") == "BP 120/80\n\nHR 72"
+
+
+def test_prompt_version_is_a_stable_hash():
+    assert len(PROMPT_VERSION) == 12
+    int(PROMPT_VERSION, 16)
@@ -0,0 +1,57 @@
+import asyncio
+import time
+import httpx
+import openai
+from backend import cache
+from backend.rate_limit import ClusterRateLimiter, LocalBuckets, retry_after_seconds
+from backend.summarizer import is_retryable
+
+
+def rate_limit_error(headers=None, body=None):
+    response = httpx.Response(429, headers=headers or {}, request=httpx.Request("POST", "http://llm/v1/chat/completions"))
+    return openai.RateLimitError("Rate limit reached", response=response, body=body)
+
+
+def test_lower_lanes_keep_a_reserve_for_interactive_calls():
+    buckets = LocalBuckets(requests_per_minute=0, tokens_per_minute=6000)
+    buckets.tokens = 2000
+
+    # Batch may not draw the bucket below 30% of capacity (1800 tokens); interactive may.
+    assert buckets.try_acquire(500, 1, reserve=0.3) > 0
+    assert buckets.try_acquire(500, 1, reserve=0.0) == 0
+    assert 1400 <= buckets.tokens < 1510
+
+
+def test_interactive_lane_goes_first_after_a_pause(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    limiter = ClusterRateLimiter("test-lanes", requests_per_minute=600, tokens_per_minute=60000)
+    order = []
+
+    async def call(lane):
+        await limiter.acquire(100, lane=lane)
+        order.append(lane)
+
+    async def scenario():
+        await limiter.pause(0.2)
+        batch = asyncio.create_task(call("batch"))
+        await asyncio.sleep(0.05)
+        interactive = asyncio.create_task(call("interactive"))
+        start = time.monotonic()
+        await asyncio.gather(batch, interactive)
+        return time.monotonic() - start
+
+    waited = asyncio.run(scenario())
+    assert order == ["interactive", "batch"]
+    assert waited >= 0.1
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(rate_limit_error({"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(rate_limit_error({"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(rate_limit_error()) == 2.0
+
+
+def test_exhausted_quota_is_not_retried():
+    assert is_retryable(rate_limit_error())
+    assert not is_retryable(rate_limit_error(body={"code": "insufficient_quota"}))
+    assert not is_retryable(ValueError("bad prompt"))
@@ -0,0 +1,80 @@
+import asyncio
+import time
+import pytest
+from backend import cache, results, summarizer
+
+
+def test_saved_summaries_are_stored_and_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    results.close_results()
+    notes = "Result store test notes: 70F admitted with pneumonia, treated with ceftriaxone."
+    variants = [{"summary": "Pneumonia treated.", "input_tokens": 30, "output_tokens": 4, "duration": 0.5,
+                 "evaluation": {"final score": 0.8}}]
+
+    async def run():
+        result = summarizer.build_result(variants[0], variants[0]["evaluation"])
+        await summarizer.save_summary(notes, "General", result, variants)
+        cached = await summarizer.get_cached_summary(notes, "general")
+        return result, cached, await results.get_result(result["request_id"])
+
+    result, cached, record = asyncio.run(run())
+    results.close_results()
+
+    assert cached["request_id"] == result["request_id"]
+    assert record["notes"] == notes and record["role"] == "general"
+    assert record["notes_hash"] == results.notes_hash(notes)
+    assert record["result"]["final_score"] == 0.8
+    assert record["variants"][0]["evaluation"] == {"final score": 0.8}
+    assert "duration" in record["timings"]
+
+
+def test_rescore_reads_stored_variants(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    results.close_results()
+    scored = []
+
+    async def fake_evaluate(notes, summary_variants):
+        scored.append((notes, [v["summary"] for v in summary_variants]))
+        return [{"summary_index": i, "metrics": {"final score": 0.5 + i / 10}} for i in range(len(summary_variants))]
+
+    monkeypatch.setattr(summarizer, "evaluate_summary_deepeval", fake_evaluate)
+    variants = [{"summary": s, "input_tokens": 10, "output_tokens": 2, "duration": 0.1} for s in ("first", "second")]
+
+    async def run():
+        result = summarizer.build_result(variants[0])
+        await summarizer.save_summary("stored notes", "general", result, variants)
+        return result["request_id"], await summarizer.rescore_summary(result["request_id"])
+
+    request_id, rescored = asyncio.run(run())
+    assert asyncio.run(summarizer.rescore_summary("missing")) is None
+    results.close_results()
+
+    assert scored[0] == ("stored notes", ["first", "second"])
+    assert rescored["request_id"] == request_id
+    assert rescored["summary"] == "second" and rescored["evaluation_status"] == "complete"
+
+
+def test_old_records_are_pruned_and_notes_can_be_left_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    monkeypatch.setattr(results, "RESULTS_STORE_NOTES", False)
+    results.close_results()
+    notes = "Retention test notes: 55M seen for chest pain, troponin negative, discharged home."
+    summary = {"summary": "Chest pain, troponin negative.", "input_tokens": 20, "output_tokens": 5, "duration": 0.2}
+
+    results.write_result("old", notes, "general", "model", "v1", summary)
+    with results._lock, results._connection() as conn:
+        conn.execute("UPDATE summaries SET created_at = '2000-01-01T00:00:00' WHERE id = 'old'")
+    results.write_result("new", notes, "general", "model", "v1", summary)
+    assert results.read_result("old") is not None  # pruning runs at most hourly
+
+    results.close_results()
+    results.write_result("newer", notes, "general", "model", "v1", summary)
+    record = results.read_result("new")
+
+    assert results.read_result("old") is None
+    assert record["notes"] is None and record["notes_hash"] == results.notes_hash(notes)
+    with pytest.raises(summarizer.SummarizationError):
+        asyncio.run(summarizer.rescore_summary("new"))
+    results.close_results()
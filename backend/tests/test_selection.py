@@ -0,0 +1,51 @@
+import pytest
+from backend import selection
+from backend.selection import get_selection_policy, parse_selection_policies, missing_info_ratio, run_cheap_checks
+
+GOOD = """Patient admitted with NSTEMI and treated with PCI.
+1. Case Overview
+- Patient Name: John Doe
+- Admission Date: 2024-03-01
+2. Medical History
+- Allergies: Penicillin
+3. Hospital Course
+- Procedures Performed: PCI to LAD
+4. Discharge Plan
+- Medications on Discharge: Aspirin 81 mg daily"""
+
+SPARSE = """1. Case Overview
+- Patient Name: No information available
+- Admission Date: No information available
+3. Hospital Course
+- Procedures Performed: No information available"""
+
+
+def test_missing_info_ratio():
+    assert missing_info_ratio(GOOD) == 0
+    assert missing_info_ratio(SPARSE) == 1.0
+
+
+def test_cheap_checks_pass_good_and_fail_sparse_summaries(monkeypatch):
+    monkeypatch.setattr(selection, "entity_densities", lambda texts: [0.1 for _ in texts])
+    good, sparse = run_cheap_checks([GOOD, SPARSE], get_selection_policy("general"))
+
+    assert good["passed"] and good["reasons"] == []
+    assert not sparse["passed"]
+    assert sparse["missing_sections"] == ["Medical History", "Discharge Plan"]
+    assert any("missing-info ratio" in reason for reason in sparse["reasons"])
+
+
+def test_policies_are_configurable_per_role(monkeypatch):
+    assert get_selection_policy("Nurse")["min_entity_density"] == 0.03
+    monkeypatch.setattr(selection, "POLICY_OVERRIDES", parse_selection_policies('{"Oncologist": {"max_variants": 3}}'))
+    assert get_selection_policy("oncologist")["max_variants"] == 3
+    assert get_selection_policy("general")["max_variants"] == 2
+
+
+def test_bad_policy_overrides_are_rejected_with_the_key():
+    with pytest.raises(ValueError, match="'max_varaints'"):
+        parse_selection_policies('{"oncologist": {"max_varaints": 3}}')
+    with pytest.raises(ValueError, match="'max_missing_ratio'"):
+        parse_selection_policies('{"nurse": {"max_missing_ratio": "high"}}')
+    with pytest.raises(ValueError, match="not valid JSON"):
+        parse_selection_policies("{oncologist: 3}")
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from backend import cache, results, similarity, summarizer
+from backend.similarity import SimilarityIndex, added_lines, fingerprint, removed_lines
+
+NOTES = "\n".join(
+    [f"Similarity test: Jane Roe, 58F, admitted for heart failure exacerbation."]
+    + [f"Day {day}: weight {80 - day} kg, creatinine 1.{day}, furosemide 40 mg IV twice daily." for day in range(1, 21)]
+)
+
+
+def test_fingerprint_ignores_whitespace_and_line_order():
+    reordered = "\n".join(reversed(NOTES.splitlines())).replace(", ", ",   ")
+    index = SimilarityIndex()
+    index.add("source", fingerprint(NOTES))
+
+    assert index.query(fingerprint(reordered)) == [(1.0, "source")]
+    assert index.query(fingerprint(NOTES + "\nDay 21: discharged home on oral furosemide."))[0][0] >= 0.9
+    assert index.query(fingerprint("Unrelated: 30M with appendicitis, laparoscopic appendectomy.")) == []
+    assert added_lines(NOTES, reordered + "\n  New line  ") == ["New line"]
+    assert removed_lines(NOTES, NOTES.replace("furosemide 40 mg", "furosemide 20 mg", 1)) == [NOTES.splitlines()[1]]
+
+
+def test_near_duplicate_notes_reuse_or_update_the_cached_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    monkeypatch.setattr(similarity, "_indexes", {})
+    monkeypatch.setattr(summarizer, "SIMILARITY_CACHE_ENABLED", True)
+    results.close_results()
+    prompts = []
+
+    async def fake_call_llm(messages, temperature=0.4, num_variants=2):
+        prompts.append(messages[-1]["content"])
+        return [{"summary": "Updated summary.", "input_tokens": 50, "output_tokens": 3, "duration": 0.1}]
+
+    monkeypatch.setattr(summarizer, "call_llm", fake_call_llm)
+
+    async def run():
+        source = summarizer.build_result({"summary": "Heart failure, diuresed.", "input_tokens": 900, "output_tokens": 40, "duration": 2.0})
+        await summarizer.save_summary(NOTES, "general", source)
+        reused = await summarizer.process_medical_notes(NOTES.replace("\n", "\n\n"), "general")
+        updated = await summarizer.process_medical_notes(NOTES + "\nDay 21: discharged home on oral furosemide.", "general")
+        return source, reused, updated, len(await similarity.get_index("general"))
+
+    source, reused, updated, indexed = asyncio.run(run())
+    results.close_results()
+
+    assert reused["summary"] == source["summary"] and reused["input_tokens"] == 0
+    assert reused["near_duplicate"]["mode"] == "reused" and reused["near_duplicate"]["source_request_id"] == source["request_id"]
+    assert updated["summary"] == "Updated summary." and updated["near_duplicate"]["mode"] == "updated"
+    assert len(prompts) == 1 and "Day 21: discharged home" in prompts[0] and "Day 20" not in prompts[0]
+    # Only the summary written from its own notes is a lookup source.
+    assert indexed == 1
+
+
+def test_changed_or_unknown_source_notes_are_summarized_in_full(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    monkeypatch.setattr(similarity, "_indexes", {})
+    monkeypatch.setattr(summarizer, "SIMILARITY_CACHE_ENABLED", True)
+    results.close_results()
+    summarized = []
+
+    async def fake_summarize_notes(notes, role, model_max_tokens):
+        summarized.append(notes)
+        result = {"summary": "Full summary."}
+        await summarizer.save_summary(notes, role, result)
+        return result
+
+    monkeypatch.setattr(summarizer, "summarize_notes", fake_summarize_notes)
+    changed = NOTES.replace("furosemide 40 mg IV twice daily.", "furosemide discontinued.", 1)
+    pruned = NOTES + "\nDay 21: transferred to cardiac rehabilitation."
+
+    async def run():
+        source = {"summary": "Heart failure, on IV furosemide.", "input_tokens": 900, "output_tokens": 40, "duration": 2.0}
+        await summarizer.save_summary(NOTES, "general", source)
+        first = await summarizer.process_medical_notes(changed, "general")
+        # The source record is gone from the result store (pruned, or another host's store).
+        monkeypatch.setattr(summarizer, "get_result", lambda request_id: asyncio.sleep(0))
+        second = await summarizer.process_medical_notes(pruned, "general")
+        return first, second
+
+    first, second = asyncio.run(run())
+    results.close_results()
+
+    assert first["summary"] == second["summary"] == "Full summary."
+    assert "near_duplicate" not in first and "near_duplicate" not in second
+    assert summarized == [changed, pruned]
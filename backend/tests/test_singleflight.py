@@ -0,0 +1,61 @@
+import asyncio
+import time
+from backend import cache
+from backend.singleflight import single_flight
+
+
+def test_concurrent_identical_requests_share_one_computation(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        await cache.set_cached("summary:sf-test", {"summary": "ok"})
+        return {"summary": "ok"}
+
+    async def run():
+        return await asyncio.gather(*(single_flight("summary:sf-test", compute) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results == [{"summary": "ok"}] * 5
+
+
+def test_failed_computation_is_not_reused(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    attempts = []
+
+    async def compute():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("LLM unavailable")
+        return {"summary": "ok"}
+
+    async def run():
+        try:
+            await single_flight("summary:sf-retry", compute)
+        except RuntimeError:
+            pass
+        return await single_flight("summary:sf-retry", compute)
+
+    assert asyncio.run(run()) == {"summary": "ok"}
+    assert len(attempts) == 2
+
+
+def test_leader_reuses_a_result_stored_before_it_took_the_lease(monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"summary": "recomputed"}
+
+    async def run():
+        # A peer finished and released its lease right after this caller's cache miss.
+        await cache.set_cached("summary:sf-late-peer", {"summary": "from peer"})
+        return await single_flight("summary:sf-late-peer", compute)
+
+    assert asyncio.run(run()) == {"summary": "from peer"}
+    assert calls == []
@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+# Budgets for importing the app in a fresh interpreter (one cold worker start).
+# Generous enough for slow CI machines; today's figures are well under half.
+IMPORT_TIME_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "3.0"))
+RSS_BUDGET_MB = float(os.getenv("STARTUP_RSS_BUDGET_MB", "150"))
+LAZY_MODULES = ("deepeval", "langchain", "langchain_openai", "llama_index", "spacy", "nltk", "scipy", "torch", "sentence_transformers")
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - start
+try:
+    # Peak RSS of this interpreter only; ru_maxrss can carry over the parent's peak across fork/exec.
+    with open("/proc/self/status") as status:
+        rss_mb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM")) / 1024
+except OSError:
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_mb, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def test_app_import_stays_lazy_and_within_budget():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-test")}
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=root, env=env, capture_output=True, text=True, check=True)
+    probe = json.loads(output.stdout.strip().splitlines()[-1])
+
+    assert not set(LAZY_MODULES) & set(probe["modules"])
+    assert probe["seconds"] < IMPORT_TIME_BUDGET
+    assert probe["rss_mb"] < RSS_BUDGET_MB
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from backend import cache, results, summarizer
+from backend.streaming import SummaryStreamParser
+
+SUMMARY = """Patient admitted for chest pain.
+
+1. Case Overview
+- Patient Name: John Doe
+2. Medical History
+- Allergies: None (critical: none known)
+### **3. Hospital Course**
+- Procedures Performed: PCI
+4. Discharge Plan
+- Follow-up Recommendations: Cardiology in 2 weeks"""
+
+
+def test_parser_emits_sections_and_highlights_incrementally():
+    parser = SummaryStreamParser()
+    events = []
+    # Feed in small, line-splitting deltas as a streaming LLM would.
+    for i in range(0, len(SUMMARY), 7):
+        events.extend(parser.feed(SUMMARY[i:i + 7]))
+    events.extend(parser.close())
+
+    sections = [data for event, data in events if event == "section"]
+    highlights = [data["line"] for event, data in events if event == "highlight"]
+
+    assert [s["title"] for s in sections] == ["Case Overview", "Medical History", "Hospital Course", "Discharge Plan"]
+    assert sections[2]["content"] == "- Procedures Performed: PCI"
+    assert sections[3]["content"] == "- Follow-up Recommendations: Cardiology in 2 weeks"
+    assert highlights == ["- Allergies: None (critical: none known)"]
+    # The highlight is emitted before the section containing it closes.
+    assert events.index(("highlight", {"line": highlights[0]})) < events.index(("section", sections[1]))
+
+
+def test_concurrent_identical_streams_share_one_llm_call_and_are_evaluated(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_redis_down_until", time.monotonic() + 60)
+    monkeypatch.setattr(results, "RESULTS_DB", str(tmp_path / "results.db"))
+    monkeypatch.setattr(summarizer, "SELECTION_STRATEGY", "full")
+    monkeypatch.setattr(summarizer, "EVALUATION_MODE", "sync")
+    results.close_results()
+    calls = []
+
+    async def fake_stream_llm(messages, temperature=0.4, usage=None):
+        calls.append(messages)
+        for i in range(0, len(SUMMARY), 7):
+            await asyncio.sleep(0.001)
+            yield SUMMARY[i:i + 7]
+
+    async def fake_evaluate(notes, variants):
+        return {**summarizer.build_result(variants[0], {"final score": 0.7}), "best_summary_index": 0}
+
+    monkeypatch.setattr(summarizer, "stream_llm", fake_stream_llm)
+    monkeypatch.setattr(summarizer, "evaluate_and_select", fake_evaluate)
+    notes = "Streaming test: 61M admitted for chest pain, troponin 2.1, PCI to the LAD, discharged on aspirin."
+
+    async def collect():
+        return [event async for event in summarizer.stream_summary(notes, "general")]
+
+    async def run():
+        return await asyncio.gather(collect(), collect())
+
+    first, second = asyncio.run(run())
+    results.close_results()
+
+    assert len(calls) == 1
+    for events in (first, second):
+        name, done = events[-1]
+        assert name == "done" and done["summary"] == SUMMARY
+        assert done["evaluation_status"] == "complete" and done["final_score"] == 0.7
+        assert sum(1 for name, _ in events if name == "section") == 4
+    # One caller saw the tokens as they arrived; the other got the finished summary.
+    assert sorted(any(name == "token" for name, _ in events) for events in (first, second)) == [False, True]
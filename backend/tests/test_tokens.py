@@ -0,0 +1,30 @@
+import hashlib
+import pytest
+from backend import tokens
+from backend.tokens import ContextWindowExceeded, count_message_tokens, count_tokens, plan_token_budget
+
+
+def test_count_tokens_is_an_integer_and_cached_without_the_text():
+    text = "Patient admitted with acute decompensated heart failure."
+    assert isinstance(count_tokens(text), int)
+    assert count_tokens(text) > 0
+    assert count_tokens("") == 0
+    assert count_tokens(text) == count_tokens(text)
+    assert (hashlib.sha256(text.encode("utf-8")).digest(), tokens.LLM_MODEL) in tokens._token_counts
+    assert all(text not in key for key in tokens._token_counts)
+
+
+def test_message_tokens_include_chat_overhead():
+    messages = [{"role": "user", "content": "Summarize."}]
+    assert count_message_tokens(messages) == count_tokens("Summarize.") + 6
+
+
+def test_budget_is_capped_by_context_window(monkeypatch):
+    monkeypatch.setattr(tokens, "MODEL_CONTEXT_WINDOW", 1000)
+    messages = [{"role": "user", "content": "word " * 100}]
+
+    prompt_tokens, max_tokens = plan_token_budget(messages, desired_completion_tokens=2000)
+    assert max_tokens == 1000 - prompt_tokens
+
+    with pytest.raises(ContextWindowExceeded):
+        plan_token_budget([{"role": "user", "content": "word " * 5000}], desired_completion_tokens=500)
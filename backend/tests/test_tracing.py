@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from backend import tracing
+from backend.tracing import record_cache_lookup, render_metrics, server_timing, span, start_trace, traced
+
+
+def test_spans_feed_the_request_trace_and_histograms():
+    @traced("test.stage")
+    async def stage():
+        await asyncio.sleep(0.01)
+
+    async def request():
+        trace = start_trace()
+        with span("test.request"):
+            await asyncio.gather(stage(), stage())
+        return trace
+
+    trace = asyncio.run(request())
+
+    assert [name for name, _ in trace] == ["test.stage", "test.stage", "test.request"]
+    assert tracing.stage_latency._series[("test.stage",)]["count"] >= 2
+    header = server_timing(trace)
+    assert header.startswith("test.stage;dur=") and ", test.request;dur=" in header
+
+
+def test_render_metrics_exposes_histograms_and_hit_ratio():
+    record_cache_lookup("test", True)
+    record_cache_lookup("test", False)
+    with span("test render"):
+        pass
+
+    text = render_metrics()
+
+    assert 'summarizer_stage_latency_seconds_bucket{stage="test render",le="+Inf"} 1' in text
+    assert 'summarizer_cache_requests_total{cache="test",result="hit"} 1' in text
+    assert 'summarizer_cache_hit_ratio{cache="test"} 0.5' in text
+
+
+def test_metrics_render_while_new_series_are_added():
+    counter = tracing.Counter("test_total", "Test.", ("key",))
+
+    def add_series():
+        for i in range(20000):
+            counter.inc(key=i)
+
+    writer = threading.Thread(target=add_series)
+    writer.start()
+    while writer.is_alive():
+        counter.render()
+    writer.join()
+
+    assert len(counter.items()) == 20000 and counter.value(key=19999) == 1
@@ -0,0 +1,109 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from loguru import logger
+from backend.config import LLM_MODEL, MODEL_CONTEXT_WINDOW
+
+# Context windows (prompt + completion) for the models we run; MODEL_CONTEXT_WINDOW overrides.
+CONTEXT_WINDOWS = {
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+
+# Chat formatting overhead per message and for priming the reply (OpenAI cookbook).
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+_encodings = {}
+_fallback_warned = False
+
+# Token counts keyed on (SHA-256 of the text, model): the same notes are counted
+# several times per request, but the cache must not keep note text (PHI) alive.
+TOKEN_COUNT_CACHE_SIZE = 4096
+_token_counts = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+class ContextWindowExceeded(ValueError):
+    pass
+
+
+def get_encoding(model=LLM_MODEL):
+    """Return the tiktoken encoding for `model`, or None if no local BPE is available."""
+    global _fallback_warned
+    if model in _encodings:
+        return _encodings[model]
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken missing, or its BPE file is not cached and cannot be downloaded.
+        if not _fallback_warned:
+            logger.warning(f"No tokenizer available for {model} ({e}); using a character-based estimate.")
+            _fallback_warned = True
+        encoding = None
+    _encodings[model] = encoding
+    return encoding
+
+
+def count_tokens(text, model=LLM_MODEL):
+    """Exact BPE token count of `text` for `model` (estimated if no tokenizer is available)."""
+    if not text:
+        return 0
+    key = (hashlib.sha256(text.encode("utf-8")).digest(), model)
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+
+    encoding = get_encoding(model)
+    count = math.ceil(len(text) / 4) if encoding is None else len(encoding.encode(text, disallowed_special=()))
+    with _token_counts_lock:
+        _token_counts[key] = count
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return count
+
+
+def count_message_tokens(messages, model=LLM_MODEL):
+    """Prompt tokens billed for a list of chat messages."""
+    return sum(TOKENS_PER_MESSAGE + count_tokens(m["content"], model) for m in messages) + TOKENS_PER_REPLY
+
+
+def context_window(model=LLM_MODEL):
+    if MODEL_CONTEXT_WINDOW:
+        return MODEL_CONTEXT_WINDOW
+    for name in sorted(CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(name):
+            return CONTEXT_WINDOWS[name]
+    return 8192
+
+
+def plan_token_budget(messages, desired_completion_tokens, model=LLM_MODEL, min_completion_tokens=256):
+    """
+    Compute the prompt size and the `max_tokens` to reserve for one call,
+    enforcing the model's context window before anything is sent.
+
+    Returns:
+        tuple[int, int]: (prompt_tokens, max_tokens)
+
+    Raises:
+        ContextWindowExceeded: if the prompt leaves less than `min_completion_tokens`.
+    """
+    prompt_tokens = count_message_tokens(messages, model)
+    available = context_window(model) - prompt_tokens
+    if available < min_completion_tokens:
+        raise ContextWindowExceeded(
+            f"Prompt uses {prompt_tokens} tokens; {model} window of {context_window(model)} "
+            f"leaves {available} for the completion (need {min_completion_tokens})."
+        )
+    return prompt_tokens, min(desired_completion_tokens, available)
@@ -0,0 +1,178 @@
+import asyncio
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Lightweight in-process tracing: `span(name)` times a stage into the
+# stage-latency histogram and, when a trace is active for the current request,
+# records it there too so it can be returned as a Server-Timing header.
+# Metrics are rendered in the Prometheus text format by render_metrics().
+#
+# The counters live in process memory, so each gunicorn worker reports only the
+# requests it served itself and a scrape of /metrics sees whichever worker
+# answered. Metrics are therefore only supported for single-worker deployments
+# (WEB_CONCURRENCY=1); gunicorn.conf.py warns when more workers are configured.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+_current_trace = ContextVar("current_trace", default=None)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                pairs = list(zip(self.label_names, key))
+                labels = _format_labels(pairs)
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(pairs, le=bound)} {count}")
+                lines.append(f'{self.name}_bucket{_format_labels(pairs, le="+Inf")} {series["count"]}')
+                lines.append(f"{self.name}_sum{labels} {series['sum']}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def items(self):
+        """Snapshot of (label values, count) pairs, sorted by labels."""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in self.items():
+            lines.append(f"{self.name}{_format_labels(zip(self.label_names, key))} {value}")
+        return lines
+
+
+def _format_labels(pairs, **extra):
+    items = list(pairs) + list(extra.items())
+    if not items:
+        return ""
+    escaped = ((name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+stage_latency = Histogram("summarizer_stage_latency_seconds", "Latency of each pipeline stage.", ("stage",), LATENCY_BUCKETS)
+llm_tokens = Histogram("summarizer_llm_tokens", "Tokens per LLM call.", ("direction",), TOKEN_BUCKETS)
+cache_requests = Counter("summarizer_cache_requests_total", "Cache lookups by result.", ("cache", "result"))
+preprocess_tokens = Counter("summarizer_preprocess_tokens_total", "Note tokens before and after preprocessing.", ("stage",))
+
+
+def record_cache_lookup(cache, hit):
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_llm_tokens(input_tokens, output_tokens):
+    llm_tokens.observe(input_tokens, direction="input")
+    llm_tokens.observe(output_tokens, direction="output")
+
+
+def start_trace():
+    """Begin collecting spans for the current request; returns the span list."""
+    trace = []
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as stage `name` (usable around sync and async code)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        stage_latency.observe(duration, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.append((name, duration))
+
+
+def stage_totals(trace=None):
+    """Total seconds per stage in `trace` (default: the current request's trace)."""
+    trace = _current_trace.get() if trace is None else trace
+    totals = {}
+    for name, duration in trace or []:
+        totals[name] = totals.get(name, 0.0) + duration
+    return totals
+
+
+def server_timing(trace):
+    """Server-Timing header value with the total milliseconds spent per stage."""
+    return ", ".join(
+        f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)};dur={seconds * 1000:.1f}" for name, seconds in stage_totals(trace).items()
+    )
+
+
+def render_metrics():
+    lines = []
+    for metric in (stage_latency, llm_tokens, cache_requests, preprocess_tokens):
+        lines.extend(metric.render())
+
+    lines += ["# HELP summarizer_cache_hit_ratio Share of cache lookups that hit.", "# TYPE summarizer_cache_hit_ratio gauge"]
+    counts = {}
+    for (cache, result), value in cache_requests.items():
+        counts.setdefault(cache, {})[result] = value
+    for cache, by_result in sorted(counts.items()):
+        hits, misses = by_result.get("hit", 0), by_result.get("miss", 0)
+        lines.append(f'summarizer_cache_hit_ratio{{cache="{cache}"}} {hits / (hits + misses) if hits + misses else 0}')
+    return "\n".join(lines) + "\n"
+
+
+def traced(name):
+    """Decorator form of `span` for plain and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -6,6 +6,7 @@ function App() {
   const [notes, setNotes] = useState('');
   const [role, setRole] = useState('general');
   const [summary, setSummary] = useState('');
+  const [requestId, setRequestId] = useState(''); // id of the stored summary, for linking feedback
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
   const [progress, setProgress] = useState(0); // Progress bar state
@@ -20,6 +21,7 @@ function App() {
   const handleInputChange = (e) => {
     setNotes(e.target.value);
     setSummary(''); 
+    setRequestId('');
     setFeedback('');
     setShowFeedbackForm(false); 
   };
@@ -29,6 +31,7 @@ function App() {
      
     setSummary("");
     setError("");
+    setRequestId('');
     setFeedbackMessage('');
 
     if (!notes.trim()) {
@@ -68,22 +71,56 @@ function App() {
       }
 
       
-      const response = await axios.post(`${apiUrl}/summarize`, {
-        notes,
-        role
-      }, {
-        onDownloadProgress: (progressEvent) => {
-          setProgress(Math.min(90, (progressEvent.loaded / progressEvent.total) * 100)); 
-        }
+      // Stream the summary so tokens render as soon as the model produces them
+      const response = await fetch(`${apiUrl}/summarize/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ notes, role })
       });
 
-      
-      setSummary(response.data.summary);
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.detail || "An error occurred");
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let sectionsDone = 0;
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const rawEvent of events) {
+          const eventName = rawEvent.match(/^event: (.*)$/m)?.[1];
+          const dataLine = rawEvent.match(/^data: (.*)$/m)?.[1];
+          if (!eventName || !dataLine) continue;
+          const data = JSON.parse(dataLine);
+
+          if (eventName === 'token') {
+            setSummary((prev) => prev + data.text);
+          } else if (eventName === 'section') {
+            sectionsDone += 1;
+            setProgress(Math.min(90, 10 + sectionsDone * 20));
+          } else if (eventName === 'done') {
+            setSummary(data.summary);
+            setRequestId(data.request_id);
+          } else if (eventName === 'error') {
+            throw new Error(data.detail);
+          }
+        }
+      }
+
       setProgress(100);
       setError('');
     } catch (err) {
       
-      setError(err.response?.data?.detail || "An error occurred");
+      setError(err.response?.data?.detail || err.message || "An error occurred");
       console.error("API Error:", err.response?.data);
     } finally {
       
@@ -97,13 +134,14 @@ function App() {
   const handleSubmitFeedback = async () => {
     try {
       await axios.post(`${apiUrl}/feedback`, {
-        request_id: Date.now().toString(),
+        request_id: requestId,
         summary,
         feedback,
       });
       setFeedbackMessage('Feedback submitted successfully!');
       
       setSummary('');
+      setRequestId('');
       setNotes('');
       setFeedback('');
       setShowFeedbackForm(false);